@@ -5,22 +5,153 @@ class Settings(BaseSettings):
     whisper_model: str = "base"  # Options: tiny, base, small, medium, large
     whisper_language: str = "auto"  # Auto-detect or specify language code (e.g., "en", "es")
     
+    # Transcription backend: "whisper" (openai-whisper, FP32 PyTorch) or
+    # "faster-whisper" (CTranslate2 with int8-quantized weights on CPU)
+    transcription_backend: str = "whisper"
+    faster_whisper_compute_type: str = "int8"  # int8, int8_float32, float32
+    faster_whisper_beam_size: int = 1  # 1 = greedy, like openai-whisper's default
+    
+    # openai-whisper tuning: dynamic INT8 quantization of the Linear layers,
+    # torch threads (0 = available CPUs / (service_processes * concurrent
+    # decodes per process)) and a warmup decode right after loading
+    whisper_quantize: bool = False
+    torch_threads: int = 0
+    torch_interop_threads: int = 1
+    model_warmup: bool = False
+    # Service processes on the host (gunicorn.conf.py exports its worker count)
+    service_processes: int = 1
+    
+    # Inference engine: "thread" (one shared model in the thread pool)
+    # or "process" (dedicated inference processes, one model each)
+    inference_engine: str = "thread"
+    inference_processes: int = 2
+    threads_per_process: int = 0  # 0 = cpu_count // inference_processes
+    
+    # Load the model at import time so gunicorn (preload_app) forks
+    # workers that share the weights copy-on-write
+    preload_model: bool = False
+    
     # Main backend
     backend_url: str = "http://localhost:4000"
     backend_endpoint: str = "/api/transcripts/ingest"
+    backend_batch_endpoint: str = "/api/transcripts/ingest/batch"
+    
+    # Backend callback client (one pooled keep-alive client per process)
+    callback_timeout: float = 30.0
+    callback_max_connections: int = 20
+    callback_max_keepalive: int = 10
+    callback_http2: bool = False  # needs an HTTPS backend (negotiated via ALPN)
     
-    # Retry settings
+    # Bulk callbacks: coalesce transcripts per window into one batch POST
+    callback_bulk_enabled: bool = False
+    callback_bulk_window_ms: int = 200
+    callback_bulk_max_items: int = 50
+    
+    # Retry settings: filtering and transcription are retried per stage
+    # with these; delivery to the backend has its own policy below
     max_retries: int = 3
     retry_backoff_base: float = 2.0
+    delivery_max_attempts: int = 5
+    delivery_backoff_base: float = 2.0
+    delivery_backoff_max: float = 30.0
+    
+    # Dead-letter outbox: transcripts still undeliverable after
+    # delivery_max_attempts are kept on disk and re-sent once the backend
+    # answers again. A failing entry backs off on its own, from the drain
+    # interval up to outbox_retry_max_seconds, and is poisoned (kept, never
+    # re-sent) after outbox_max_retries; so is anything the backend rejects
+    outbox_enabled: bool = True
+    outbox_path: str = "./data/outbox"
+    outbox_max_entries: int = 10000
+    outbox_drain_interval_seconds: float = 30.0
+    outbox_retry_max_seconds: float = 3600.0
+    outbox_max_retries: int = 20
     
     # Queue settings
     max_queue_size: int = 1000
     worker_count: int = 4
     
+    # Queue backend: "memory" (per-process, lost on restart) or "sqlite"
+    # (durable, shared by all workers on the host)
+    queue_backend: str = "memory"
+    queue_path: str = "./data/queue"
+    queue_visibility_timeout: float = 300.0  # seconds before an unacked task is redelivered
+    queue_max_deliveries: int = 5
+    queue_poll_interval_ms: int = 200
+    
+    # Admission control on /transcribe-chunk/async (429 + Retry-After)
+    admission_enabled: bool = True
+    admission_max_bytes_mb: float = 64.0  # queued raw audio per process
+    admission_max_wait_seconds: float = 120.0  # refuse when the backlog takes longer to clear
+    admission_rate_window_seconds: float = 60.0  # window for the processing rate estimate
+    admission_default_retry_after: int = 10  # before any rate is known
+    admission_max_retry_after: int = 300
+    
+    # Batch uploads from devices catching up on a backlog
+    batch_upload_max_chunks: int = 32  # chunks per /transcribe-chunk/batch request
+    
+    # Autoscaler: sizes the queue workers (and the process engine's model
+    # copies) from queue wait, real-time factor and available RAM
+    autoscale_enabled: bool = False
+    autoscale_min_workers: int = 1
+    autoscale_max_workers: int = 8
+    autoscale_interval_seconds: float = 10.0
+    autoscale_target_wait_seconds: float = 30.0  # scale up when chunks wait longer
+    autoscale_cooldown_seconds: float = 60.0  # no further change for this long after one
+    autoscale_down_intervals: int = 3  # consecutive idle intervals before scaling down
+    autoscale_min_gain: float = 1.1  # throughput gain a scale-up step must have shown
+    autoscale_model_memory_mb: float = 0.0  # per model copy; 0 = estimate from whisper_model
+    autoscale_memory_reserve_mb: float = 512.0
+    
+    # Fair-queuing weights per session, e.g. "pendant-a=2,pendant-b=0.5" (default 1)
+    session_weights: str = ""
+    
+    # Sessions reported under their own label in /metrics; the rest are "other"
+    metrics_max_sessions: int = 50
+    
+    # Micro-batching (batch_max_size=1 disables it)
+    batch_max_size: int = 1
+    batch_max_wait_ms: int = 250
+    
     # Audio processing
     sample_rate: int = 16000
+    resample_block_seconds: float = 2.0  # Polyphase resampling block size (0 = whole signal)
+    # Filter stage order; stages: resample, vad, denoise, normalize
+    # (previous order: "denoise,resample,vad,normalize")
+    filter_pipeline: str = "resample,vad,denoise,normalize"
+    
+    # Transcript cache keyed by a hash of the raw upload + model/filter settings
+    cache_enabled: bool = True
+    cache_memory_entries: int = 2048
+    cache_disk_enabled: bool = False  # shared by all workers on the host
+    cache_path: str = "./data/transcripts"
+    cache_disk_max_mb: float = 256.0
+    
+    # Early-exit silence gate on raw uploads (before filtering / model loading)
+    silence_gate_enabled: bool = True
+    silence_gate_rms: float = 0.003  # ~-50 dBFS
+    silence_gate_speech_ratio: float = 0.05  # min fraction of VAD speech frames
+    
+    # Re-segment consecutive chunks of a session at pauses (async queue path).
+    # Its per-session state is process-local: needs service_processes=1 and
+    # queue_backend="memory" (refused at startup otherwise)
+    segmenter_enabled: bool = False
+    segmenter_tail_seconds: float = 2.0  # window at the end of a chunk searched for a pause
+    segmenter_min_gap_ms: int = 150  # shortest pause to cut at
+    segmenter_flush_seconds: float = 15.0  # transcribe a held tail alone after this much quiet
+    segmenter_prompt_chars: int = 200  # previous transcript passed as initial_prompt
+    
+    # WebSocket streaming (/transcribe-stream) utterance segmentation
+    stream_vad_aggressiveness: int = 2
+    stream_silence_ms: int = 600  # non-speech that closes an utterance
+    stream_min_speech_ms: int = 250  # shorter utterances are dropped
+    stream_max_utterance_seconds: float = 25.0  # force-close to stay in Whisper's 30s window
+    stream_pre_roll_ms: int = 300  # context kept before/after speech
+    stream_partial_interval_ms: int = 1500  # 0 disables partial transcripts
     
     class Config:
         env_file = ".env"
+        # Fields may start with "model_" (model_warmup)
+        protected_namespaces = ("settings_",)
 
 settings = Settings()
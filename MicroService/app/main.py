@@ -1,21 +1,33 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from contextlib import asynccontextmanager
 import logging
-from app.routes import audio
+from app.routes import audio, stream
 from app.queue.worker import start_worker, stop_worker
+from app.services.transcribe import start_engine, stop_engine, preload_whisper_model
+from app.services.callback import start_callback_client, stop_callback_client
+from app.services.metrics import render_metrics
+from app.config import settings
 
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 
+if settings.preload_model and settings.inference_engine == "thread":
+    # Runs in the gunicorn master when preload_app is on
+    preload_whisper_model()
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    await start_callback_client()
+    await start_engine()
     await start_worker()
     yield
     # Shutdown
     await stop_worker()
+    await stop_engine()
+    await stop_callback_client()
 
 app = FastAPI(
     title="Audio Transcription Microservice",
@@ -24,7 +36,14 @@ app = FastAPI(
 )
 
 app.include_router(audio.router)
+app.include_router(stream.router)
 
 @app.get("/health")
 async def health():
     return {"status": "healthy"}
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus exposition, aggregated across gunicorn workers."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
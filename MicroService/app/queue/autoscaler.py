@@ -0,0 +1,172 @@
+import math
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional
+
+# Resident memory of one loaded model copy (fp32 weights + runtime), in MB
+MODEL_MEMORY_MB = {
+    "tiny": 400,
+    "base": 600,
+    "small": 1400,
+    "medium": 3500,
+    "large": 7000
+}
+# int8 CTranslate2 weights (faster-whisper) take roughly a third of that
+INT8_MEMORY_FACTOR = 0.35
+
+@dataclass
+class Observation:
+    """What the controller saw over one interval."""
+    workers: int
+    queue_depth: int
+    queue_wait: float  # average wait of the tasks picked up this interval
+    completed: int
+    interval: float
+    rtf: Optional[float] = None  # average real-time factor this interval
+    available_mb: Optional[float] = None
+
+@dataclass
+class Decision:
+    workers: int
+    action: str  # "up", "down" or "hold"
+    reason: str
+
+@dataclass
+class ScalingPolicy:
+    """
+    Decides the number of queue workers (and, for the process engine,
+    model copies) from queue pressure, inference efficiency and free RAM.
+
+    - Scale up when chunks wait longer than target_wait, or the backlog
+      would take longer than that to drain at the current rate. The step
+      is sized to drain the backlog within target_wait, at most doubling.
+    - Scale-ups are learned: the real-time factor is tracked per worker
+      count (outside cooldowns, so it reflects one concurrency). A step
+      whose throughput gain (workers / RTF) turns out below min_gain is
+      reverted and not repeated. That is the point where workers only
+      contend for the same cores.
+    - Scale down one worker after down_intervals consecutive idle
+      intervals. Every change starts a cooldown, so the two thresholds
+      and the cooldown give hysteresis.
+    - With model_memory_mb set, never hold more model copies than
+      available RAM (less reserve_mb) allows; shed workers if it shrinks.
+    """
+    min_workers: int
+    max_workers: int
+    target_wait: float
+    cooldown: float
+    down_intervals: int = 3
+    min_gain: float = 1.1
+    model_memory_mb: float = 0.0
+    reserve_mb: float = 512.0
+    rtf_by_workers: Dict[int, float] = field(default_factory=dict)
+    _idle_run: int = 0
+    _last_change: float = -math.inf
+    _before_up: Optional[int] = None  # worker count before the last scale-up
+
+    def memory_cap(self, obs: Observation) -> int:
+        """Most workers the available RAM allows (each extra one loads a model)."""
+        if not self.model_memory_mb or obs.available_mb is None:
+            return self.max_workers
+        headroom = math.floor((obs.available_mb - self.reserve_mb) / self.model_memory_mb)
+        return max(self.min_workers, obs.workers + headroom)
+
+    def _learn(self, obs: Observation):
+        # Only busy intervals say how fast inference runs at this concurrency
+        if obs.rtf is not None and obs.queue_depth > 0:
+            previous = self.rtf_by_workers.get(obs.workers)
+            self.rtf_by_workers[obs.workers] = obs.rtf if previous is None else 0.7 * previous + 0.3 * obs.rtf
+
+    def _saturated(self, workers: int, target: int) -> bool:
+        current = self.rtf_by_workers.get(workers)
+        larger = self.rtf_by_workers.get(target)
+        if not current or not larger:
+            return False
+        gain = (target / larger) / (workers / current)
+        return gain < self.min_gain
+
+    def decide(self, obs: Observation, now: float) -> Decision:
+        cooling = now - self._last_change < self.cooldown
+        if not cooling:
+            self._learn(obs)
+        workers = obs.workers
+        cap = min(self.max_workers, self.memory_cap(obs))
+
+        if workers > cap:
+            return self._change(max(self.min_workers, cap), "down", "memory", now)
+        if workers < self.min_workers:
+            return self._change(self.min_workers, "up", "minimum", now)
+
+        rate = obs.completed / obs.interval if obs.interval else 0.0
+        drain = obs.queue_depth / rate if rate else (math.inf if obs.queue_depth else 0.0)
+        pressure = obs.queue_wait > self.target_wait or drain > self.target_wait
+        idle = obs.queue_depth == 0 and obs.queue_wait < self.target_wait / 4
+
+        self._idle_run = self._idle_run + 1 if idle else 0
+
+        if pressure:
+            if cooling:
+                return Decision(workers, "hold", "cooldown")
+
+            # The last step up bought (almost) nothing: take it back
+            previous, self._before_up = self._before_up, None
+            if previous is not None and self._saturated(previous, workers):
+                return self._change(previous, "down", "saturated", now)
+
+            if workers >= cap:
+                return Decision(workers, "hold", "memory" if cap < self.max_workers else "max_workers")
+
+            # Workers needed to drain the backlog within target_wait
+            per_worker = rate / workers if rate else 0.0
+            needed = math.ceil(obs.queue_depth / (per_worker * self.target_wait)) if per_worker else workers + 1
+            target = min(cap, max(workers + 1, min(needed, workers * 2)))
+            if self._saturated(workers, target):
+                # Probe a single extra worker unless that is known not to help either
+                target = workers + 1
+                if self._saturated(workers, target):
+                    return Decision(workers, "hold", "saturated")
+
+            self._before_up = workers
+            return self._change(target, "up", "queue_wait", now)
+
+        if self._idle_run >= self.down_intervals and workers > self.min_workers and not cooling:
+            self._idle_run = 0
+            return self._change(workers - 1, "down", "idle", now)
+
+        return Decision(workers, "hold", "steady")
+
+    def _change(self, workers: int, action: str, reason: str, now: float) -> Decision:
+        self._last_change = now
+        return Decision(workers, action, reason)
+
+def available_memory_mb() -> Optional[float]:
+    """
+    Memory the host (or the container's cgroup, whichever is tighter) can
+    still give out, in MB. None when it can't be read (non-Linux).
+    """
+    available = None
+    try:
+        for line in Path("/proc/meminfo").read_text().splitlines():
+            if line.startswith("MemAvailable:"):
+                available = int(line.split()[1]) / 1024
+    except OSError:
+        return None
+
+    # cgroup v2 limit, e.g. a Docker --memory limit
+    try:
+        limit = Path("/sys/fs/cgroup/memory.max").read_text().strip()
+        if limit != "max":
+            used = int(Path("/sys/fs/cgroup/memory.current").read_text())
+            remaining = (int(limit) - used) / (1024 * 1024)
+            available = remaining if available is None else min(available, remaining)
+    except (OSError, ValueError):
+        pass
+
+    return available
+
+def model_memory_mb(model_name: str, configured: float, quantized: bool = False) -> float:
+    """Per-copy model memory: the configured value, else an estimate by model size."""
+    if configured:
+        return configured
+    estimate = MODEL_MEMORY_MB.get(model_name.split(".")[0].split("-")[0], MODEL_MEMORY_MB["large"])
+    return estimate * INT8_MEMORY_FACTOR if quantized else estimate
@@ -0,0 +1,396 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import itertools
+from abc import ABC, abstractmethod
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Optional
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=8)
+def parse_session_weights(spec: str) -> Dict[str, float]:
+    """
+    Parse "pendant-a=2,pendant-b=0.5" into per-session scheduling weights.
+    Sessions not listed have weight 1. Malformed items (no session, no
+    number, a weight <= 0) are logged and ignored.
+    """
+    weights = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        session_id, _, weight = item.partition("=")
+        try:
+            value = float(weight)
+        except ValueError:
+            value = 0.0
+        if not session_id.strip() or not 0 < value < float("inf"):
+            logger.warning(f"Ignoring malformed session weight {item.strip()!r}; expected session=weight > 0")
+            continue
+        weights[session_id.strip()] = value
+    return weights
+
+def session_weight(session_id: str) -> float:
+    return parse_session_weights(settings.session_weights).get(session_id, 1.0)
+
+@dataclass
+class QueuedTask:
+    """A task handed out by a queue backend; ack it once it is done."""
+    session_id: str
+    data: Dict[str, Any]
+    finish: float = 0.0  # weighted fair queuing finish tag
+    receipt: Any = None
+
+class QueueBackend(ABC):
+    """
+    Task queue behind /transcribe-chunk/async.
+    Selected with settings.queue_backend.
+
+    Tasks are FIFO within a session (task_data["session_id"]) and sessions
+    share the workers by weighted fair queuing: each task gets a virtual
+    finish tag of max(virtual time, the session's last tag) + 1 / weight
+    and the lowest tag is served first. A device that floods the queue only
+    lengthens its own backlog.
+    """
+
+    async def start(self):
+        """Open any resources the queue needs."""
+
+    async def stop(self):
+        """Release queue resources."""
+
+    @abstractmethod
+    async def put(self, task_data: Dict[str, Any]):
+        """Enqueue a task; waits while the queue is full."""
+
+    @abstractmethod
+    async def get(self, timeout: float) -> Optional[QueuedTask]:
+        """Next task in fair order, or None if none arrives within timeout."""
+
+    @abstractmethod
+    async def ack(self, task: QueuedTask):
+        """Mark a task finished so it is never delivered again."""
+
+    @abstractmethod
+    async def release(self, task: QueuedTask):
+        """Hand an unfinished task back for immediate redelivery."""
+
+    @abstractmethod
+    async def qsize(self) -> int:
+        """Number of tasks waiting (not counting tasks being processed)."""
+
+    @abstractmethod
+    async def session_depths(self) -> Dict[str, int]:
+        """Waiting tasks per session."""
+
+class MemoryQueue(QueueBackend):
+    """In-process fair queue; tasks are lost when the worker exits."""
+
+    def __init__(self, maxsize: int):
+        # Entries are (finish, seq, session_id, task_data); seq breaks ties
+        # so task dicts are never compared. The queue itself is unbounded:
+        # put() enforces maxsize, so release() can always hand a task back
+        self._queue = asyncio.PriorityQueue()
+        self._maxsize = maxsize
+        self._not_full = asyncio.Condition()
+        self._seq = itertools.count()
+        self._vtime = 0.0
+        self._last_finish: Dict[str, float] = {}
+        self._depths: Counter = Counter()
+
+    async def put(self, task_data: Dict[str, Any]):
+        session_id = task_data.get("session_id", "default")
+        async with self._not_full:
+            await self._not_full.wait_for(lambda: self._maxsize <= 0 or self._queue.qsize() < self._maxsize)
+            finish = max(self._vtime, self._last_finish.get(session_id, 0.0)) + 1.0 / session_weight(session_id)
+            self._last_finish[session_id] = finish
+            self._depths[session_id] += 1
+            self._queue.put_nowait((finish, next(self._seq), session_id, task_data))
+
+    async def get(self, timeout: float) -> Optional[QueuedTask]:
+        try:
+            finish, _, session_id, task_data = await asyncio.wait_for(self._queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+        async with self._not_full:
+            self._not_full.notify()
+        self._vtime = max(self._vtime, finish)
+        self._depths[session_id] -= 1
+        if self._depths[session_id] <= 0:
+            # An idle session's tag is behind virtual time; forget it
+            del self._depths[session_id]
+            if self._last_finish.get(session_id, 0.0) <= self._vtime:
+                self._last_finish.pop(session_id, None)
+        return QueuedTask(session_id, task_data, finish)
+
+    async def ack(self, task: QueuedTask):
+        self._queue.task_done()
+
+    async def release(self, task: QueuedTask):
+        # Goes back even past maxsize: it held a place in the queue before
+        self._queue.task_done()
+        self._depths[task.session_id] += 1
+        self._queue.put_nowait((task.finish, next(self._seq), task.session_id, task.data))
+
+    async def qsize(self) -> int:
+        return self._queue.qsize()
+
+    async def session_depths(self) -> Dict[str, int]:
+        return dict(self._depths)
+
+class SQLiteQueue(QueueBackend):
+    """
+    Durable queue shared by every worker process on the host.
+
+    Task metadata lives in a SQLite database in WAL mode; audio is spooled
+    to files next to it. get() leases a task for visibility_timeout seconds;
+    a task that is not acked by then (its worker was recycled or crashed)
+    becomes visible again to any worker. Tasks delivered max_deliveries
+    times without an ack are dropped as poison. Fair-queuing tags and
+    virtual time are kept in the database, so all workers share them.
+    """
+
+    def __init__(self, path: str, maxsize: int, visibility_timeout: float,
+                 max_deliveries: int, poll_interval: float):
+        self.path = path
+        self.maxsize = maxsize
+        self.visibility_timeout = visibility_timeout
+        self.max_deliveries = max_deliveries
+        self.poll_interval = poll_interval
+        self._spool = os.path.join(path, "audio")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+
+    async def start(self):
+        os.makedirs(self._spool, exist_ok=True)
+        self._wakeup = asyncio.Event()
+        await asyncio.to_thread(self._open)
+        logger.info(f"SQLite queue at {self.path}: {await self.qsize()} tasks pending")
+
+    def _open(self):
+        conn = sqlite3.connect(
+            os.path.join(self.path, "tasks.db"),
+            timeout=30.0,
+            isolation_level=None,
+            check_same_thread=False
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                priority INTEGER NOT NULL,
+                payload TEXT NOT NULL,
+                audio_path TEXT NOT NULL,
+                visible_at REAL NOT NULL,
+                deliveries INTEGER NOT NULL DEFAULT 0,
+                lease TEXT,
+                session_id TEXT NOT NULL DEFAULT 'default',
+                finish REAL NOT NULL DEFAULT 0
+            )
+        """)
+        # Queues created before fair scheduling lack the session columns
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(tasks)")}
+        if "session_id" not in columns:
+            conn.execute("ALTER TABLE tasks ADD COLUMN session_id TEXT NOT NULL DEFAULT 'default'")
+            conn.execute("ALTER TABLE tasks ADD COLUMN finish REAL NOT NULL DEFAULT 0")
+        conn.execute("CREATE INDEX IF NOT EXISTS tasks_fair ON tasks (finish, id)")
+        conn.execute("CREATE TABLE IF NOT EXISTS sessions (session_id TEXT PRIMARY KEY, last_finish REAL NOT NULL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS clock (id INTEGER PRIMARY KEY CHECK (id = 0), vtime REAL NOT NULL)")
+        conn.execute("INSERT OR IGNORE INTO clock (id, vtime) VALUES (0, 0)")
+        self._conn = conn
+
+    async def stop(self):
+        if self._conn is not None:
+            await asyncio.to_thread(self._conn.close)
+            self._conn = None
+
+    def _execute(self, sql: str, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _put(self, task_data: Dict[str, Any]) -> bool:
+        payload = {k: v for k, v in task_data.items() if k != "audio_data"}
+        session_id = task_data.get("session_id", "default")
+        audio_path = os.path.join(self._spool, f"{uuid.uuid4().hex}.bin")
+
+        with self._lock:
+            # Cheap early refusal; the count that decides is taken under the write lock
+            if self._pending() >= self.maxsize:
+                return False
+
+            # Audio is on disk before the row that points at it is committed
+            tmp_path = audio_path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(task_data["audio_data"])
+            os.replace(tmp_path, audio_path)
+
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Another process may have filled the queue since the check above
+                if self._pending() >= self.maxsize:
+                    self._conn.execute("ROLLBACK")
+                    os.remove(audio_path)
+                    return False
+                (vtime,) = self._conn.execute("SELECT vtime FROM clock").fetchone()
+                row = self._conn.execute(
+                    "SELECT last_finish FROM sessions WHERE session_id = ?", (session_id,)
+                ).fetchone()
+                finish = max(vtime, row[0] if row else 0.0) + 1.0 / session_weight(session_id)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO sessions (session_id, last_finish) VALUES (?, ?)",
+                    (session_id, finish)
+                )
+                self._conn.execute(
+                    "INSERT INTO tasks (priority, payload, audio_path, visible_at, session_id, finish) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (task_data.get("chunk_number", 0), json.dumps(payload), audio_path, time.time(), session_id, finish)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                os.remove(audio_path)
+                raise
+        return True
+
+    def _pending(self) -> int:
+        (pending,) = self._conn.execute("SELECT COUNT(*) FROM tasks").fetchone()
+        return pending
+
+    async def put(self, task_data: Dict[str, Any]):
+        while not await asyncio.to_thread(self._put, task_data):
+            await asyncio.sleep(self.poll_interval)
+        self._wakeup.set()
+
+    def _lease(self) -> Optional[QueuedTask]:
+        now = time.time()
+        lease = uuid.uuid4().hex
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT id, session_id, finish, payload, audio_path, deliveries FROM tasks "
+                    "WHERE visible_at <= ? ORDER BY finish, id LIMIT 1",
+                    (now,)
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE tasks SET visible_at = ?, deliveries = deliveries + 1, lease = ? WHERE id = ?",
+                        (now + self.visibility_timeout, lease, row[0])
+                    )
+                    self._conn.execute("UPDATE clock SET vtime = MAX(vtime, ?)", (row[2],))
+                    # Sessions whose last tag virtual time has passed are idle
+                    self._conn.execute("DELETE FROM sessions WHERE last_finish <= ?", (row[2],))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        if row is None:
+            return None
+
+        task_id, session_id, finish, payload, audio_path, deliveries = row
+        task = QueuedTask(session_id, json.loads(payload), finish, (task_id, lease, audio_path))
+
+        if deliveries >= self.max_deliveries:
+            logger.error(
+                f"Dropping chunk {task.data.get('chunk_number')} after {deliveries} unacked deliveries"
+            )
+            self._ack(task)
+            return None
+
+        try:
+            with open(audio_path, "rb") as f:
+                task.data["audio_data"] = f.read()
+        except FileNotFoundError:
+            logger.error(f"Spooled audio for chunk {task.data.get('chunk_number')} is missing, dropping task")
+            self._ack(task)
+            return None
+
+        return task
+
+    async def get(self, timeout: float) -> Optional[QueuedTask]:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+
+        while True:
+            self._wakeup.clear()
+            task = await asyncio.to_thread(self._lease)
+            if task is not None:
+                return task
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return None
+
+            # Local puts wake us at once; other processes' puts and expired
+            # leases are picked up on the next poll
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=min(remaining, self.poll_interval))
+            except asyncio.TimeoutError:
+                pass
+
+    def _ack(self, task: QueuedTask):
+        task_id, lease, audio_path = task.receipt
+        # Only the current lease holder may delete; an expired lease may
+        # already have been handed to another worker
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM tasks WHERE id = ? AND lease = ?", (task_id, lease)).rowcount
+        if deleted:
+            try:
+                os.remove(audio_path)
+            except FileNotFoundError:
+                pass
+
+    async def ack(self, task: QueuedTask):
+        await asyncio.to_thread(self._ack, task)
+
+    async def release(self, task: QueuedTask):
+        task_id, lease, _ = task.receipt
+        await asyncio.to_thread(
+            self._execute,
+            "UPDATE tasks SET visible_at = ?, deliveries = deliveries - 1 WHERE id = ? AND lease = ?",
+            (time.time(), task_id, lease)
+        )
+        self._wakeup.set()
+
+    async def qsize(self) -> int:
+        rows = await asyncio.to_thread(
+            self._execute, "SELECT COUNT(*) FROM tasks WHERE visible_at <= ?", (time.time(),)
+        )
+        return rows[0][0]
+
+    async def session_depths(self) -> Dict[str, int]:
+        rows = await asyncio.to_thread(
+            self._execute,
+            "SELECT session_id, COUNT(*) FROM tasks WHERE visible_at <= ? GROUP BY session_id",
+            (time.time(),)
+        )
+        return dict(rows)
+
+def create_queue() -> QueueBackend:
+    """Build the queue selected by settings.queue_backend."""
+    if settings.queue_backend == "sqlite":
+        return SQLiteQueue(
+            settings.queue_path,
+            settings.max_queue_size,
+            settings.queue_visibility_timeout,
+            settings.queue_max_deliveries,
+            settings.queue_poll_interval_ms / 1000
+        )
+
+    if settings.queue_backend != "memory":
+        raise ValueError(f"Unknown queue backend: {settings.queue_backend}")
+
+    return MemoryQueue(settings.max_queue_size)
@@ -0,0 +1,230 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+import httpx
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional
+from app.services.callback import RejectedTranscript
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class DeadLetter:
+    id: int
+    chunk_number: int
+    text: str
+    time: str
+    session_id: str
+    attempts: int
+    retries: int
+
+@dataclass
+class DrainResult:
+    delivered: int = 0
+    poisoned: int = 0
+    more: bool = False  # a full page went out: more entries are due now
+
+class Outbox:
+    """
+    Dead-letter outbox for transcripts the backend would not take.
+
+    A SQLite table in WAL mode under `path`, shared by every worker on the
+    host and kept across restarts. drain() sends entries oldest first.
+    An entry that fails is retried on its own schedule (retry_interval,
+    doubling up to retry_max) and the drain moves past it; if the backend
+    couldn't be reached at all the drain stops, so a backend that is
+    still down costs one request per drain. Entries the backend rejects
+    (4xx), or that fail max_retries times, are kept as poisoned for
+    inspection and never sent again. Rows are leased while a drain sends
+    them so two processes never deliver the same entry at once. Past
+    max_entries the oldest entries are dropped.
+    """
+
+    LEASE_SECONDS = 60.0
+
+    def __init__(self, path: str, max_entries: int, retry_interval: float = 30.0,
+                 retry_max: float = 3600.0, max_retries: int = 20):
+        self.path = path
+        self.max_entries = max_entries
+        self.retry_interval = retry_interval
+        self.retry_max = retry_max
+        self.max_retries = max_retries
+        self.backlogged = False  # the last drain failed; the backend is likely still down
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+
+    async def start(self):
+        os.makedirs(self.path, exist_ok=True)
+        self._wakeup = asyncio.Event()
+        await asyncio.to_thread(self._open)
+        pending = await self.size()
+        self.backlogged = pending > 0
+        logger.info(f"Dead-letter outbox at {self.path}: {pending} transcripts pending")
+
+    async def stop(self):
+        if self._conn is not None:
+            await asyncio.to_thread(self._conn.close)
+            self._conn = None
+
+    def _open(self):
+        conn = sqlite3.connect(
+            os.path.join(self.path, "outbox.db"),
+            timeout=30.0,
+            isolation_level=None,
+            check_same_thread=False
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                chunk_number INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                time TEXT NOT NULL,
+                session_id TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                created_at REAL NOT NULL,
+                leased_until REAL NOT NULL DEFAULT 0
+            )
+        """)
+        # Columns added since the first release
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(outbox)")}
+        for column in ("retries INTEGER NOT NULL DEFAULT 0",
+                       "next_attempt_at REAL NOT NULL DEFAULT 0",
+                       "poisoned INTEGER NOT NULL DEFAULT 0"):
+            if column.split()[0] not in columns:
+                conn.execute(f"ALTER TABLE outbox ADD COLUMN {column}")
+        self._conn = conn
+
+    def _execute(self, sql: str, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _add(self, chunk_number: int, text: str, time_str: str, session_id: str, attempts: int,
+             error: str, poisoned: bool) -> int:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT INTO outbox (chunk_number, text, time, session_id, attempts, last_error, created_at, poisoned) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (chunk_number, text, time_str, session_id, attempts, error, time.time(), int(poisoned))
+                )
+                dropped = self._conn.execute(
+                    "DELETE FROM outbox WHERE id NOT IN (SELECT id FROM outbox ORDER BY id DESC LIMIT ?)",
+                    (self.max_entries,)
+                ).rowcount
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return dropped
+
+    async def add(self, chunk_number: int, text: str, time_str: str, session_id: str,
+                  attempts: int, error: str, poisoned: bool = False) -> int:
+        """
+        Park an undeliverable transcript (poisoned: rejected by the backend,
+        kept but never retried); returns how many old entries were dropped for it.
+        """
+        if not poisoned:
+            self.backlogged = True
+        dropped = await asyncio.to_thread(
+            self._add, chunk_number, text, time_str, session_id, attempts, error, poisoned
+        )
+        if dropped:
+            logger.error(f"Dead-letter outbox full, dropped {dropped} oldest transcripts")
+        return dropped
+
+    def _lease(self, limit: int) -> List[DeadLetter]:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT id, chunk_number, text, time, session_id, attempts, retries FROM outbox "
+                    "WHERE poisoned = 0 AND leased_until <= ? AND next_attempt_at <= ? ORDER BY id LIMIT ?",
+                    (now, now, limit)
+                ).fetchall()
+                self._conn.executemany(
+                    "UPDATE outbox SET leased_until = ? WHERE id = ?",
+                    [(now + self.LEASE_SECONDS, row[0]) for row in rows]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [DeadLetter(*row) for row in rows]
+
+    def _unlease(self, entries: List[DeadLetter]):
+        with self._lock:
+            self._conn.executemany("UPDATE outbox SET leased_until = 0 WHERE id = ?", [(entry.id,) for entry in entries])
+
+    def _failed(self, entry: DeadLetter, error: str, poison: bool) -> bool:
+        """Back the entry off, or poison it; returns whether it was poisoned."""
+        retries = entry.retries + 1
+        poison = poison or retries >= self.max_retries
+        delay = min(self.retry_interval * 2 ** min(retries - 1, 30), self.retry_max)
+        self._execute(
+            "UPDATE outbox SET leased_until = 0, attempts = attempts + 1, retries = ?, last_error = ?, "
+            "next_attempt_at = ?, poisoned = ? WHERE id = ?",
+            (retries, error, time.time() + delay, int(poison), entry.id)
+        )
+        return poison
+
+    async def drain(self, send: Callable[[DeadLetter], Awaitable[object]], limit: int = 50) -> DrainResult:
+        """
+        Send up to `limit` due entries oldest first with `send`; delivered
+        entries are deleted.
+        """
+        entries = await asyncio.to_thread(self._lease, limit)
+        result = DrainResult()
+        failed = False
+
+        for i, entry in enumerate(entries):
+            try:
+                await send(entry)
+            except Exception as e:
+                rejected = isinstance(e, RejectedTranscript)
+                if await asyncio.to_thread(self._failed, entry, str(e), rejected):
+                    logger.error(f"Outbox entry for chunk {entry.chunk_number} poisoned: {e}")
+                    result.poisoned += 1
+                if not rejected:
+                    failed = True
+                if not isinstance(e, (RejectedTranscript, httpx.HTTPStatusError)):
+                    # Unreachable: unlease the rest for the next drain
+                    await asyncio.to_thread(self._unlease, entries[i + 1:])
+                    break
+                continue
+
+            await asyncio.to_thread(self._execute, "DELETE FROM outbox WHERE id = ?", (entry.id,))
+            result.delivered += 1
+
+        result.more = not failed and len(entries) == limit
+        self.backlogged = failed or result.more
+        return result
+
+    def notify(self):
+        """A live delivery just succeeded: drain now instead of at the next interval."""
+        if self.backlogged and self._wakeup is not None:
+            self._wakeup.set()
+
+    async def wait(self, timeout: float):
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def size(self) -> int:
+        """Entries still to be delivered (poisoned ones excluded)."""
+        rows = await asyncio.to_thread(self._execute, "SELECT COUNT(*) FROM outbox WHERE poisoned = 0")
+        return rows[0][0]
+
+    async def poisoned(self) -> int:
+        rows = await asyncio.to_thread(self._execute, "SELECT COUNT(*) FROM outbox WHERE poisoned = 1")
+        return rows[0][0]
@@ -1,41 +1,126 @@
 import asyncio
-from typing import Dict, Any
+import math
+import time as time_module
+from typing import Dict, Any, List, Optional
 import logging
-from collections import defaultdict
-from app.services.filter import filter_audio
-from app.services.transcribe import transcribe_audio
-from app.services.callback import send_to_backend
+from collections import defaultdict, deque
+from dataclasses import dataclass
+import numpy as np
+from app.services.filter import filter_audio_array, decode_audio, apply_filters, encode_wav
+from app.services.transcribe import transcribe_audio, transcribe_batch, is_audio_silent, get_engine
+from app.services.callback import RejectedTranscript, send_to_backend
+from app.services.gate import is_chunk_silent
+from app.services.segmenter import split_chunk, record_transcript, take_expired_tails
+from app.services.cache import CachedTranscript, lookup, store
+from app.services.metrics import (
+    ADMISSION, AUTOSCALER_DECISIONS, AUTOSCALER_MEMORY_CAP, AUTOSCALER_WORKERS, BATCH_SIZE,
+    CHUNK_SECONDS, CHUNKS, OUTBOX, OUTBOX_DEPTH, OUTBOX_POISONED, QUEUE_BYTES, QUEUE_DEPTH,
+    QUEUE_WAIT_SECONDS, SESSION_CHUNKS, SESSION_LATENCY_SECONDS, SESSION_QUEUE_DEPTH,
+    SESSION_QUEUE_WAIT_SECONDS, STAGE_RETRIES, session_label
+)
+from app.queue.backends import QueueBackend, QueuedTask, create_queue
+from app.queue.outbox import DeadLetter, Outbox
+from app.queue.autoscaler import Observation, ScalingPolicy, available_memory_mb, model_memory_mb
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
-# Task queue with priority ordering
-task_queue: asyncio.PriorityQueue = None
+# Task queue with per-session fair ordering (backend from settings.queue_backend)
+task_queue: QueueBackend = None
+# Dead-letter outbox for transcripts the backend would not take (None when disabled)
+outbox: Optional[Outbox] = None
 workers: list = []
 running = False
 
-# Metrics
+# Per-chunk queue workers by id; the autoscaler adds and retires them
+worker_tasks: Dict[int, asyncio.Task] = {}
+_retiring: set = set()
+
+# Live queue state read by admission control and the autoscaler; the
+# counters and histograms for monitoring are in app.services.metrics
 metrics = {
     "queue_depth": 0,
-    "total_processed": 0,
-    "total_failures": 0,
-    "latency_sum": 0.0
+    "session_depths": {},
+    "bytes_in_flight": 0
 }
 
+# Completion timestamps for the recent processing rate used by admission
+completion_times: deque = deque()
+
+# Totals since the autoscaler's last look
+interval_stats = {
+    "wait_sum": 0.0,
+    "dequeued": 0,
+    "completed": 0,
+    "rtf_sum": 0.0,
+    "rtf_count": 0
+}
+
+# Session labels given a depth so far; emptied sessions go back to 0
+_depth_labels: set = set()
+
 async def start_worker():
     """Initialize and start worker tasks."""
-    global task_queue, workers, running
+    global task_queue, outbox, workers, running
     
-    task_queue = asyncio.PriorityQueue(maxsize=settings.max_queue_size)
+    batching = settings.batch_max_size > 1
+    if batching and settings.autoscale_enabled:
+        # The autoscaler adds and retires per-chunk workers, which batching replaces
+        raise ValueError("AUTOSCALE_ENABLED needs per-chunk workers; set BATCH_MAX_SIZE=1 or disable it")
+    if settings.segmenter_enabled and (settings.service_processes > 1 or settings.queue_backend == "sqlite"):
+        # Segmenter state lives in this process: a session's next chunk handled
+        # by another process (or taken from the shared SQLite queue) would miss it
+        raise ValueError("SEGMENTER_ENABLED needs SERVICE_PROCESSES=1 and QUEUE_BACKEND=memory")
+    scaling = settings.autoscale_enabled and not settings.segmenter_enabled
+    if scaling and settings.inference_engine == "thread" and settings.transcription_backend == "whisper":
+        # One shared openai-whisper model decodes one chunk at a time: more
+        # workers can't change inference concurrency, only the queueing
+        raise ValueError(
+            "AUTOSCALE_ENABLED needs INFERENCE_ENGINE=process or TRANSCRIPTION_BACKEND=faster-whisper"
+        )
+    
+    task_queue = create_queue()
+    await task_queue.start()
     running = True
     
-    # Start worker tasks
-    workers = [
-        asyncio.create_task(worker_loop(i))
-        for i in range(settings.worker_count)
-    ]
+    workers = []
+    if settings.outbox_enabled:
+        outbox = Outbox(
+            settings.outbox_path,
+            settings.outbox_max_entries,
+            settings.outbox_drain_interval_seconds,
+            settings.outbox_retry_max_seconds,
+            settings.outbox_max_retries
+        )
+        await outbox.start()
+        workers.append(asyncio.create_task(outbox_drain_loop()))
+    
+    if batching:
+        # A single scheduler feeds the shared model with batches
+        workers.append(asyncio.create_task(batch_worker_loop(0)))
+        logger.info(
+            f"Started batching worker (max batch {settings.batch_max_size}, "
+            f"max wait {settings.batch_max_wait_ms}ms)"
+        )
+    else:
+        # The segmenter carries state from each chunk of a session to the next,
+        # so chunks must go through it one at a time in queue (chunk) order
+        count = settings.worker_count
+        if settings.segmenter_enabled and count > 1:
+            logger.warning(f"Segmenter enabled: running 1 worker instead of WORKER_COUNT={count}")
+            count = 1
+        
+        # Start worker tasks
+        for i in range(count):
+            worker_tasks[i] = asyncio.create_task(worker_loop(i))
+        logger.info(f"Started {count} worker tasks")
     
-    logger.info(f"Started {settings.worker_count} worker tasks")
+    if settings.segmenter_enabled:
+        workers.append(asyncio.create_task(segment_flush_loop()))
+    if settings.autoscale_enabled and settings.segmenter_enabled:
+        logger.warning("Segmenter enabled: autoscaler not started, it needs a single worker")
+    elif settings.autoscale_enabled:
+        workers.append(asyncio.create_task(autoscale_loop()))
 
 async def stop_worker():
     """Stop all worker tasks."""
@@ -44,24 +129,122 @@ async def stop_worker():
     running = False
     
     # Cancel all workers
-    for worker in workers:
+    tasks = workers + list(worker_tasks.values())
+    for worker in tasks:
         worker.cancel()
     
-    await asyncio.gather(*workers, return_exceptions=True)
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await task_queue.stop()
+    if outbox is not None:
+        await outbox.stop()
     logger.info("All workers stopped")
 
 async def enqueue_task(task_data: Dict[str, Any]):
     """
     Enqueue a transcription task.
-    Tasks are ordered by chunk_number for processing.
+    Tasks run in arrival order within a session; sessions are
+    interleaved by weighted fair queuing.
     """
     chunk_number = task_data["chunk_number"]
+    session_id = task_data.setdefault("session_id", "default")
+    task_data.setdefault("enqueued_at", time_module.time())
+    
+    # Only the memory queue holds audio in this process
+    if settings.queue_backend == "memory":
+        metrics["bytes_in_flight"] += len(task_data["audio_data"])
+        QUEUE_BYTES.set(metrics["bytes_in_flight"])
+    await task_queue.put(task_data)
     
-    # Use chunk_number as priority (lower = higher priority)
-    await task_queue.put((chunk_number, task_data))
+    SESSION_CHUNKS.labels(session_label(session_id), "enqueued").inc()
+    await _refresh_depths()
+    logger.info(
+        f"Task enqueued: chunk {chunk_number} of session {session_id}, "
+        f"queue depth: {metrics['queue_depth']}"
+    )
+
+async def _refresh_depths():
+    metrics["queue_depth"] = await task_queue.qsize()
+    QUEUE_DEPTH.set(metrics["queue_depth"])
+    metrics["session_depths"] = await task_queue.session_depths()
+    
+    depths: Dict[str, int] = defaultdict(int)
+    for session_id, depth in metrics["session_depths"].items():
+        depths[session_label(session_id)] += depth
+    _depth_labels.update(depths)
+    for label in _depth_labels:
+        SESSION_QUEUE_DEPTH.labels(label).set(depths.get(label, 0))
+
+async def _record_dequeued(task: QueuedTask):
+    wait = max(time_module.time() - task.data.get("enqueued_at", time_module.time()), 0.0)
+    interval_stats["wait_sum"] += wait
+    interval_stats["dequeued"] += 1
+    QUEUE_WAIT_SECONDS.observe(wait)
+    SESSION_QUEUE_WAIT_SECONDS.labels(session_label(task.session_id)).observe(wait)
+    await _refresh_depths()
+
+def _record_done(task_data: Dict[str, Any], outcome: str = "processed"):
+    if settings.queue_backend == "memory":
+        metrics["bytes_in_flight"] -= len(task_data["audio_data"])
+        QUEUE_BYTES.set(metrics["bytes_in_flight"])
+    interval_stats["completed"] += 1
+    now = time_module.time()
+    completion_times.append(now)
+    while completion_times and completion_times[0] < now - settings.admission_rate_window_seconds:
+        completion_times.popleft()
+    
+    CHUNKS.labels(outcome).inc()
     
-    metrics["queue_depth"] = task_queue.qsize()
-    logger.info(f"Task enqueued: chunk {chunk_number}, queue depth: {metrics['queue_depth']}")
+    session = session_label(task_data.get("session_id", "default"))
+    SESSION_CHUNKS.labels(session, outcome).inc()
+    if outcome == "processed":
+        latency = time_module.time() - task_data.get("enqueued_at", time_module.time())
+        SESSION_LATENCY_SECONDS.labels(session).observe(max(latency, 0.0))
+
+def processing_rate() -> Optional[float]:
+    """Chunks completed per second over the recent window, if known yet."""
+    if len(completion_times) < 5:
+        return None
+    span = max(time_module.time() - completion_times[0], 1.0)
+    return len(completion_times) / span
+
+def check_admission(audio_size: int) -> Optional[int]:
+    """
+    Decide whether a new chunk of audio_size bytes may be queued.
+    
+    A chunk is refused when the queue is at max_queue_size, when audio held
+    in memory would exceed admission_max_bytes_mb (memory queue only; the
+    SQLite queue spools to disk), or when the backlog at the
+    recent processing rate would take longer than admission_max_wait_seconds
+    to clear. Returns None to admit, or a Retry-After in seconds: the time
+    the backlog needs to drain back under the limit it exceeds.
+    """
+    if not settings.admission_enabled:
+        return None
+    
+    depth = metrics["queue_depth"]
+    rate = processing_rate()
+    
+    # Tasks that have to finish before this one would be admitted
+    excess = 0.0
+    if depth >= settings.max_queue_size:
+        excess = max(excess, depth - settings.max_queue_size + 1)
+    
+    max_bytes = settings.admission_max_bytes_mb * 1024 * 1024
+    if settings.queue_backend == "memory" and metrics["bytes_in_flight"] + audio_size > max_bytes:
+        avg_size = metrics["bytes_in_flight"] / depth if depth else audio_size
+        excess = max(excess, (metrics["bytes_in_flight"] + audio_size - max_bytes) / max(avg_size, 1))
+    
+    if rate is not None and depth / rate > settings.admission_max_wait_seconds:
+        excess = max(excess, depth - rate * settings.admission_max_wait_seconds)
+    
+    if excess <= 0:
+        ADMISSION.labels("admitted").inc()
+        return None
+    
+    ADMISSION.labels("rejected").inc()
+    if rate is None:
+        return settings.admission_default_retry_after
+    return min(max(1, math.ceil(excess / rate)), settings.admission_max_retry_after)
 
 async def worker_loop(worker_id: int):
     """
@@ -69,95 +252,540 @@ async def worker_loop(worker_id: int):
     """
     logger.info(f"Worker {worker_id} started")
     
-    while running:
+    while running and worker_id not in _retiring:
+        task = None
         try:
             # Get task with timeout to allow graceful shutdown
-            priority, task_data = await asyncio.wait_for(
-                task_queue.get(),
-                timeout=1.0
-            )
+            task = await task_queue.get(timeout=1.0)
+            if task is None:
+                continue
             
-            metrics["queue_depth"] = task_queue.qsize()
+            await _record_dequeued(task)
             
             # Process task with retry logic
-            await process_task_with_retry(task_data, worker_id)
+            await process_task_with_retry(task.data, worker_id)
             
-            task_queue.task_done()
+            await task_queue.ack(task)
         
-        except asyncio.TimeoutError:
-            continue
         except asyncio.CancelledError:
+            # Hand the unfinished task to another worker instead of
+            # waiting out its visibility timeout
+            if task is not None:
+                await task_queue.release(task)
             break
         except Exception as e:
             logger.error(f"Worker {worker_id} error: {str(e)}")
+    
+    if worker_id in _retiring:
+        _retiring.discard(worker_id)
+        worker_tasks.pop(worker_id, None)
+        logger.info(f"Worker {worker_id} retired")
+
+async def batch_worker_loop(worker_id: int):
+    """
+    Worker loop that collects up to batch_max_size tasks, waiting at most
+    batch_max_wait_ms after the first one, and processes them together.
+    """
+    logger.info(f"Batching worker {worker_id} started")
+    loop = asyncio.get_running_loop()
+    
+    while running:
+        try:
+            first = await task_queue.get(timeout=1.0)
+        except asyncio.CancelledError:
+            break
+        except Exception as e:
+            logger.error(f"Batching worker {worker_id} error: {str(e)}")
+            continue
+        if first is None:
+            continue
+        
+        batch = [first]
+        deadline = loop.time() + settings.batch_max_wait_ms / 1000
+        
+        try:
+            while len(batch) < settings.batch_max_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    task = await task_queue.get(timeout=remaining)
+                except Exception as e:
+                    # Process what was collected rather than dropping it
+                    logger.error(f"Batching worker {worker_id} error: {str(e)}")
+                    break
+                if task is None:
+                    break
+                batch.append(task)
+            
+            for task in batch:
+                await _record_dequeued(task)
+            await process_batch([task.data for task in batch], worker_id)
+            
+            for task in batch:
+                await task_queue.ack(task)
+        
+        except asyncio.CancelledError:
+            for task in batch:
+                await task_queue.release(task)
+            break
+        except Exception as e:
+            # Left unacked, like a failed per-chunk task: the SQLite queue
+            # redelivers the batch after its visibility timeout
+            logger.error(f"Batching worker {worker_id} error: {str(e)}")
+
+async def segment_flush_loop():
+    """
+    Queue held-back chunk tails whose session has gone quiet, so the end
+    of a recording is transcribed even though no next chunk arrives.
+    """
+    while running:
+        try:
+            await asyncio.sleep(1.0)
+            for tail in take_expired_tails(settings.segmenter_flush_seconds):
+                logger.info(f"Flushing {len(tail.audio) / tail.sample_rate:.2f}s tail of session {tail.session_id}")
+                await enqueue_task({
+                    "audio_data": encode_wav(tail.audio, tail.sample_rate),
+                    "chunk_number": tail.chunk_number,
+                    "time": tail.time,
+                    "filename": tail.filename,
+                    "session_id": tail.session_id,
+                    "segment_tail": True
+                })
+        except asyncio.CancelledError:
+            break
+        except Exception as e:
+            logger.error(f"Segment flush error: {str(e)}")
+
+@dataclass
+class ChunkJob:
+    """
+    Checkpointed progress of one chunk through the stages
+    received -> filtered -> transcribed -> delivered. A retry resumes
+    from the stage that failed instead of starting over.
+    """
+    stage: str = "received"
+    filtered_audio: Optional[np.ndarray] = None
+    transcript: Optional[CachedTranscript] = None
+
+async def process_batch(batch: List[Dict[str, Any]], worker_id: int):
+    """
+    Filter a batch of tasks concurrently, run one batched Whisper decode over
+    the non-silent chunks and fan the transcripts out to send_to_backend.
+    Tasks that fail at any step fall back to process_task_with_retry,
+    resuming from the stage that failed.
+    """
+    start_time = time_module.time()
+    
+    logger.info(f"Worker {worker_id} processing batch of {len(batch)} chunks")
+    BATCH_SIZE.observe(len(batch))
+    
+    # (task, ChunkJob checkpoint or None to start over) for the per-chunk path
+    retry_tasks = []
+    
+    # Step 0: Serve repeated uploads from the transcript cache
+    keys = {}
+    pending = []
+    hits = []
+    for task in batch:
+        key, cached = await lookup(task["audio_data"])
+        keys[id(task)] = key
+        if cached is None:
+            pending.append(task)
+        elif cached.status == "skipped" or not cached.text.strip():
+            CHUNK_SECONDS.observe(time_module.time() - start_time)
+            _record_done(task)
+        else:
+            hits.append((task, cached))
+    
+    if hits:
+        sent = await asyncio.gather(
+            *(send_to_backend(task["chunk_number"], cached.text, task["time"]) for task, cached in hits),
+            return_exceptions=True
+        )
+        for (task, cached), outcome in zip(hits, sent):
+            if isinstance(outcome, RejectedTranscript):
+                await deliver_rejected(task["chunk_number"], cached.text, task["time"],
+                                       task.get("session_id", "default"), 1, outcome)
+                _record_done(task, outcome="rejected")
+            elif isinstance(outcome, Exception):
+                retry_tasks.append((task, ChunkJob(stage="transcribed", transcript=cached)))
+            else:
+                CHUNK_SECONDS.observe(time_module.time() - start_time)
+                _record_done(task)
+    
+    # Early exit for silent chunks that haven't been gated at ingestion
+    silent = await asyncio.gather(*(
+        asyncio.to_thread(is_chunk_silent, task["audio_data"], task["chunk_number"])
+        if not task.get("gated") else asyncio.sleep(0, False)
+        for task in pending
+    ))
+    for task, is_silent in zip(pending, silent):
+        if is_silent:
+            CHUNK_SECONDS.observe(time_module.time() - start_time)
+            _record_done(task)
+    pending = [task for task, is_silent in zip(pending, silent) if not is_silent]
+    
+    # Step 1: Filter all chunks concurrently
+    filtered = await asyncio.gather(
+        *(
+            asyncio.to_thread(filter_audio_array, task["audio_data"], task.get("filename", "audio"))
+            for task in pending
+        ),
+        return_exceptions=True
+    )
+    
+    speech_tasks = []
+    speech_audio = []
+    for task, audio in zip(pending, filtered):
+        if isinstance(audio, Exception):
+            logger.error(f"Filtering failed for chunk {task['chunk_number']}: {str(audio)}")
+            retry_tasks.append((task, None))
+        elif is_audio_silent(audio):
+            logger.info(f"Chunk {task['chunk_number']} skipped (silent audio)")
+            await store(keys[id(task)], "", "skipped", time_module.time() - start_time)
+            CHUNK_SECONDS.observe(time_module.time() - start_time)
+            _record_done(task)
+        else:
+            speech_tasks.append(task)
+            speech_audio.append(audio)
+    
+    # Step 2: One batched transcription for every non-silent chunk
+    if speech_tasks:
+        try:
+            results = await transcribe_batch(speech_audio)
+        except Exception as e:
+            logger.error(f"Batched transcription failed: {str(e)}")
+            results = None
+            retry_tasks.extend(
+                (task, ChunkJob(stage="filtered", filtered_audio=audio))
+                for task, audio in zip(speech_tasks, speech_audio)
+            )
+        
+        # Step 3: Fan results out to the backend; a failed callback resumes
+        # at delivery with the transcript it already has
+        if results is not None:
+            share = (time_module.time() - start_time) / len(speech_tasks)
+            transcripts = [
+                CachedTranscript(
+                    text=result["text"] or "",
+                    status="completed" if (result["text"] or "").strip() else "skipped",
+                    compute_seconds=share
+                )
+                for result in results
+            ]
+            for task, transcript in zip(speech_tasks, transcripts):
+                await store(keys[id(task)], transcript.text, transcript.status, transcript.compute_seconds)
+            # Nothing was said: nothing to deliver
+            sent = await asyncio.gather(
+                *(
+                    send_to_backend(task["chunk_number"], transcript.text, task["time"])
+                    if transcript.status == "completed" else asyncio.sleep(0)
+                    for task, transcript in zip(speech_tasks, transcripts)
+                ),
+                return_exceptions=True
+            )
+            elapsed = time_module.time() - start_time
+            for task, transcript, outcome in zip(speech_tasks, transcripts, sent):
+                if isinstance(outcome, RejectedTranscript):
+                    await deliver_rejected(task["chunk_number"], transcript.text, task["time"],
+                                           task.get("session_id", "default"), 1, outcome)
+                    _record_done(task, outcome="rejected")
+                elif isinstance(outcome, Exception):
+                    retry_tasks.append((task, ChunkJob(stage="transcribed", transcript=transcript)))
+                else:
+                    CHUNK_SECONDS.observe(elapsed)
+                    _record_done(task)
+    
+    for task, job in retry_tasks:
+        await process_task_with_retry(task, worker_id, job)
+    
+    logger.info(f"Batch of {len(batch)} chunks processed in {time_module.time() - start_time:.2f}s")
 
-async def process_task_with_retry(task_data: Dict[str, Any], worker_id: int):
+async def _retry_stage(stage: str, chunk_number: int, action, attempts: int,
+                       backoff_base: float, backoff_max: float = math.inf):
+    """Run `action` up to `attempts` times with exponential backoff; re-raise the last error."""
+    for attempt in range(attempts):
+        try:
+            return await action()
+        except Exception as e:
+            logger.error(f"Chunk {chunk_number} {stage} attempt {attempt + 1}/{attempts} failed: {str(e)}")
+            if attempt == attempts - 1 or isinstance(e, RejectedTranscript):
+                raise
+            STAGE_RETRIES.labels(stage).inc()
+            wait_time = min(backoff_base ** attempt, backoff_max)
+            logger.info(f"Retrying {stage} in {wait_time}s...")
+            await asyncio.sleep(wait_time)
+
+async def process_task_with_retry(task_data: Dict[str, Any], worker_id: int, job: Optional[ChunkJob] = None):
     """
-    Process a single task with exponential backoff retry.
+    Process a single task as a staged job. Filtering and transcription
+    are each retried with max_retries / retry_backoff_base; delivery has
+    its own delivery_* policy and, once exhausted, parks the transcript
+    in the dead-letter outbox. A job passed in resumes from its stage.
     """
     chunk_number = task_data["chunk_number"]
     audio_data = task_data["audio_data"]
     time = task_data["time"]
+    session_id = task_data.get("session_id", "default")
+    job = job or ChunkJob()
     
-    import time as time_module
     start_time = time_module.time()
+    logger.info(f"Worker {worker_id} processing chunk {chunk_number} from stage {job.stage}")
+    
+    # Identical bytes (a redelivery, a resend, a replay) reuse the earlier
+    # transcript; segmented chunks depend on session state, so never those
+    cache_key = None
+    if job.stage != "transcribed" and not settings.segmenter_enabled:
+        cache_key, cached = await lookup(audio_data)
+        if cached is not None:
+            logger.info(f"Chunk {chunk_number} served from the transcript cache")
+            job.transcript, job.filtered_audio, job.stage = cached, None, "transcribed"
     
-    for attempt in range(settings.max_retries):
+    # Early exit for silent chunks that haven't been gated at ingestion
+    if job.stage == "received" and not task_data.get("gated") and await asyncio.to_thread(is_chunk_silent, audio_data, chunk_number):
+        CHUNK_SECONDS.observe(time_module.time() - start_time)
+        _record_done(task_data)
+        return
+    
+    # Re-cut at a pause across the boundary with the session's previous
+    # chunk; decode errors fall through to the normal path below
+    segment = None
+    prompt = None
+    if job.stage == "received" and settings.segmenter_enabled and not task_data.get("segment_tail"):
         try:
-            logger.info(f"Worker {worker_id} processing chunk {chunk_number}, attempt {attempt + 1}")
-            
-            # Step 1: Filter audio
-            filtered_audio = await asyncio.to_thread(
-                filter_audio,
-                audio_data,
-                task_data.get("filename", "audio")
+            data, sample_rate = await asyncio.to_thread(decode_audio, audio_data)
+            head, prompt = split_chunk(
+                session_id, chunk_number, data, sample_rate, time, task_data.get("filename", "audio")
             )
-            
-            # Step 2: Transcribe with Whisper
-            from app.services.transcribe import transcribe_audio_chunk
-            result = await transcribe_audio_chunk(
-                audio_data=filtered_audio,
-                chunk_number=chunk_number,
-                timestamp=time,
-                skip_if_silent=True
+            segment = (head, sample_rate)
+        except Exception as e:
+            logger.warning(f"Segmenting chunk {chunk_number} failed, transcribing it as is: {e}")
+    
+    compute_start = time_module.time()
+    
+    # Step 1: Filter audio (float32 16kHz array, no WAV round-trip)
+    async def filter_stage():
+        if segment is not None:
+            return await asyncio.to_thread(apply_filters, *segment)
+        return await asyncio.to_thread(filter_audio_array, audio_data, task_data.get("filename", "audio"))
+    
+    # Step 2: Transcribe with Whisper
+    async def transcribe_stage():
+        from app.services.transcribe import transcribe_audio_chunk
+        return await transcribe_audio_chunk(
+            audio_data=job.filtered_audio,
+            chunk_number=chunk_number,
+            timestamp=time,
+            skip_if_silent=True,
+            initial_prompt=prompt
+        )
+    
+    try:
+        if job.stage == "received":
+            job.filtered_audio = await _retry_stage(
+                "filter", chunk_number, filter_stage, settings.max_retries, settings.retry_backoff_base
             )
+            job.stage = "filtered"
+        
+        if job.stage == "filtered":
+            result = await _retry_stage(
+                "transcribe", chunk_number, transcribe_stage, settings.max_retries, settings.retry_backoff_base
+            )
+            if result.get("duration") and len(job.filtered_audio):
+                interval_stats["rtf_sum"] += result["duration"] / (len(job.filtered_audio) / settings.sample_rate)
+                interval_stats["rtf_count"] += 1
             
-            # Step 3: Send to backend (only if not skipped)
-            if result.get("status") != "skipped":
-                await send_to_backend(chunk_number, result["text"], time)
-            else:
-                logger.info(f"Chunk {chunk_number} skipped (silent audio)")
-            
-            # Success
-            elapsed = time_module.time() - start_time
-            metrics["total_processed"] += 1
-            metrics["latency_sum"] += elapsed
-            
-            logger.info(f"Chunk {chunk_number} processed successfully in {elapsed:.2f}s")
+            text = result["text"] or ""
+            job.transcript = CachedTranscript(
+                text=text,
+                status="skipped" if result.get("status") == "skipped" or not text.strip() else "completed",
+                compute_seconds=time_module.time() - compute_start
+            )
+            job.filtered_audio = None
+            job.stage = "transcribed"
+            await store(cache_key, job.transcript.text, job.transcript.status, job.transcript.compute_seconds)
+            if settings.segmenter_enabled and job.transcript.status != "skipped":
+                record_transcript(session_id, job.transcript.text)
+    except Exception:
+        _record_done(task_data, outcome="failed")
+        logger.error(f"Chunk {chunk_number} failed at stage {job.stage} after {settings.max_retries} attempts")
+        return
+    
+    # Step 3: Send to backend (only if not skipped; the backend refuses empty text)
+    if job.transcript.status == "skipped" or not job.transcript.text.strip():
+        logger.info(f"Chunk {chunk_number} skipped (silent audio)")
+    else:
+        outcome = await deliver(chunk_number, job.transcript.text, time, session_id)
+        if outcome == "failed":
+            _record_done(task_data, outcome="failed")
             return
-        
+        if outcome in ("dead_lettered", "rejected"):
+            _record_done(task_data, outcome=outcome)
+            return
+    
+    job.stage = "delivered"
+    elapsed = time_module.time() - start_time
+    CHUNK_SECONDS.observe(elapsed)
+    _record_done(task_data)
+    
+    logger.info(f"Chunk {chunk_number} processed successfully in {elapsed:.2f}s")
+
+async def deliver(chunk_number: int, text: str, time: str, session_id: str) -> str:
+    """
+    Send a transcript with the delivery retry policy. Returns "delivered",
+    "dead_lettered" (parked in the outbox), "rejected" (the backend refused
+    it with a 4xx; not retried) or "failed" (outbox disabled).
+    While the outbox holds a backlog the backend is known to be down, so
+    only one attempt is made before the transcript joins the backlog.
+    """
+    attempts = settings.delivery_max_attempts
+    if outbox is not None and outbox.backlogged:
+        attempts = 1
+    
+    try:
+        await _retry_stage(
+            "deliver", chunk_number, lambda: send_to_backend(chunk_number, text, time),
+            attempts, settings.delivery_backoff_base, settings.delivery_backoff_max
+        )
+    except RejectedTranscript as e:
+        await deliver_rejected(chunk_number, text, time, session_id, 1, e)
+        return "rejected"
+    except Exception as e:
+        if outbox is None:
+            logger.error(f"Chunk {chunk_number} could not be delivered after {attempts} attempts")
+            return "failed"
+        dropped = await outbox.add(chunk_number, text, time, session_id, attempts, str(e))
+        OUTBOX.labels("added").inc()
+        if dropped:
+            OUTBOX.labels("dropped").inc(dropped)
+        logger.warning(f"Chunk {chunk_number} moved to the dead-letter outbox after {attempts} attempts")
+        return "dead_lettered"
+    
+    if outbox is not None:
+        outbox.notify()
+    return "delivered"
+
+async def deliver_rejected(chunk_number: int, text: str, time: str, session_id: str,
+                           attempts: int, error: RejectedTranscript):
+    """Keep a transcript the backend refused as poisoned in the outbox, for inspection."""
+    logger.error(f"Backend rejected the transcript of chunk {chunk_number}: {error}")
+    if outbox is not None:
+        await outbox.add(chunk_number, text, time, session_id, attempts, str(error), poisoned=True)
+        OUTBOX.labels("poisoned").inc()
+
+async def outbox_drain_loop():
+    """
+    Re-send dead-lettered transcripts oldest first, every
+    outbox_drain_interval_seconds or as soon as a live delivery succeeds.
+    """
+    async def send(entry: DeadLetter):
+        await send_to_backend(entry.chunk_number, entry.text, entry.time)
+    
+    while running:
+        try:
+            await outbox.wait(settings.outbox_drain_interval_seconds)
+            result = await outbox.drain(send)
+            if result.delivered:
+                OUTBOX.labels("delivered").inc(result.delivered)
+                logger.info(f"Delivered {result.delivered} transcripts from the dead-letter outbox")
+            if result.poisoned:
+                OUTBOX.labels("poisoned").inc(result.poisoned)
+            OUTBOX_DEPTH.set(await outbox.size())
+            OUTBOX_POISONED.set(await outbox.poisoned())
+            # More due and the backend is taking them: keep going
+            if result.more:
+                outbox.notify()
+        except asyncio.CancelledError:
+            break
         except Exception as e:
-            logger.error(f"Attempt {attempt + 1} failed for chunk {chunk_number}: {str(e)}")
+            logger.error(f"Outbox drain error: {str(e)}")
+
+async def set_worker_count(count: int):
+    """
+    Start or retire per-chunk workers so `count` are active. Retired
+    workers finish the chunk they hold first. The engine follows: one
+    model copy per worker for the process engine, torch's thread pool
+    re-split across the workers for the thread engine.
+    """
+    active = sorted(i for i in worker_tasks if i not in _retiring)
+    if count > len(active):
+        next_id = max(worker_tasks, default=-1) + 1
+        for worker_id in range(next_id, next_id + count - len(active)):
+            worker_tasks[worker_id] = asyncio.create_task(worker_loop(worker_id))
+    else:
+        _retiring.update(active[count:])
+    
+    await get_engine().resize(count)
+    AUTOSCALER_WORKERS.set(count)
+
+def _take_observation(worker_count: int, interval: float) -> Observation:
+    stats = dict(interval_stats)
+    for key in interval_stats:
+        interval_stats[key] = 0 if isinstance(interval_stats[key], int) else 0.0
+    
+    return Observation(
+        workers=worker_count,
+        queue_depth=metrics["queue_depth"],
+        queue_wait=stats["wait_sum"] / stats["dequeued"] if stats["dequeued"] else 0.0,
+        completed=stats["completed"],
+        interval=interval,
+        rtf=stats["rtf_sum"] / stats["rtf_count"] if stats["rtf_count"] else None,
+        available_mb=available_memory_mb()
+    )
+
+async def autoscale_loop():
+    """
+    Resize the per-chunk workers every autoscale_interval_seconds from
+    what ScalingPolicy makes of queue wait, backlog, real-time factor and
+    free RAM. Replaces CPU-based gunicorn scaling: a model server is at
+    100% CPU under any load, so CPU says nothing about demand.
+    """
+    policy = ScalingPolicy(
+        min_workers=settings.autoscale_min_workers,
+        max_workers=settings.autoscale_max_workers,
+        target_wait=settings.autoscale_target_wait_seconds,
+        cooldown=settings.autoscale_cooldown_seconds,
+        down_intervals=settings.autoscale_down_intervals,
+        min_gain=settings.autoscale_min_gain,
+        # Extra thread-engine workers share one model; only processes add copies
+        model_memory_mb=(
+            model_memory_mb(
+                settings.whisper_model,
+                settings.autoscale_model_memory_mb,
+                quantized=(
+                    settings.transcription_backend == "faster-whisper"
+                    and settings.faster_whisper_compute_type.startswith("int8")
+                )
+            )
+            if settings.inference_engine == "process" else 0.0
+        ),
+        reserve_mb=settings.autoscale_memory_reserve_mb
+    )
+    
+    count = min(max(len(worker_tasks), policy.min_workers), policy.max_workers)
+    await set_worker_count(count)
+    logger.info(f"Autoscaler started with {count} workers ({policy.min_workers}-{policy.max_workers})")
+    
+    while running:
+        try:
+            await asyncio.sleep(settings.autoscale_interval_seconds)
+            await _refresh_depths()
+            observation = _take_observation(count, settings.autoscale_interval_seconds)
+            decision = policy.decide(observation, time_module.monotonic())
             
-            if attempt < settings.max_retries - 1:
-                # Exponential backoff
-                wait_time = settings.retry_backoff_base ** attempt
-                logger.info(f"Retrying in {wait_time}s...")
-                await asyncio.sleep(wait_time)
-            else:
-                # Final failure
-                metrics["total_failures"] += 1
-                logger.error(f"Chunk {chunk_number} failed after {settings.max_retries} attempts")
-
-def get_metrics() -> Dict[str, Any]:
-    """Get current metrics."""
-    avg_latency = 0.0
-    if metrics["total_processed"] > 0:
-        avg_latency = metrics["latency_sum"] / metrics["total_processed"]
-    
-    return {
-        "queue_depth": metrics["queue_depth"],
-        "total_processed": metrics["total_processed"],
-        "total_failures": metrics["total_failures"],
-        "average_latency": avg_latency
-    }
+            AUTOSCALER_DECISIONS.labels(decision.action, decision.reason).inc()
+            AUTOSCALER_MEMORY_CAP.set(policy.memory_cap(observation))
+            
+            if decision.workers != count:
+                logger.info(
+                    f"Autoscaler: {count} -> {decision.workers} workers ({decision.reason}; "
+                    f"depth {observation.queue_depth}, wait {observation.queue_wait:.1f}s, "
+                    f"rtf {observation.rtf if observation.rtf is not None else '-'})"
+                )
+                count = decision.workers
+                await set_worker_count(count)
+        except asyncio.CancelledError:
+            break
+        except Exception as e:
+            logger.error(f"Autoscaler error: {str(e)}")
@@ -1,10 +1,15 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from typing import List, Optional
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Response
+from app.config import settings
 from app.schemas.request import TranscribeRequest
-from app.schemas.response import TranscribeResponse, TranscribeResponseWithText
-from app.queue.worker import enqueue_task
-from app.services.filter import filter_audio
+from app.schemas.response import BatchTranscribeResponse, TranscribeResponse, TranscribeResponseWithText
+from app.queue.worker import enqueue_task, check_admission
+from app.services.filter import filter_audio_array
 from app.services.transcribe import transcribe_audio
 from app.services.callback import send_to_backend
+from app.services.gate import is_chunk_silent
+from app.services.cache import lookup, store
+from time import perf_counter
 import logging
 import asyncio
 
@@ -15,7 +20,8 @@ logger = logging.getLogger(__name__)
 async def transcribe_chunk(
     audio_file: UploadFile = File(...),
     chunk_number: int = Form(...),
-    time: str = Form(...)
+    time: str = Form(...),
+    session_id: str = Form("default")
 ):
     """
     Receive audio chunk, process it, and return the transcript.
@@ -28,25 +34,52 @@ async def transcribe_chunk(
         if not audio_data:
             raise HTTPException(status_code=400, detail="Empty audio file")
         
-        logger.info(f"Processing chunk {chunk_number}")
+        # Identical bytes (a resend, a replay) reuse the earlier transcript
+        cache_key, cached = await lookup(audio_data)
+        if cached is not None:
+            logger.info(f"Chunk {chunk_number} served from the transcript cache")
+            if cached.status == "completed" and cached.text.strip():
+                asyncio.create_task(send_to_backend(chunk_number, cached.text, time))
+            return TranscribeResponseWithText(
+                status=cached.status,
+                chunk=chunk_number,
+                text=cached.text,
+                time=time
+            )
         
-        # Filter audio
+        # Early exit for silent chunks, before filtering or model loading
+        if await asyncio.to_thread(is_chunk_silent, audio_data, chunk_number):
+            return TranscribeResponseWithText(
+                status="skipped",
+                chunk=chunk_number,
+                text="",
+                time=time
+            )
+        
+        logger.info(f"Processing chunk {chunk_number} of session {session_id}")
+        
+        # Filter audio (float32 16kHz array, no WAV round-trip)
+        started = perf_counter()
         filtered_audio = await asyncio.to_thread(
-            filter_audio,
+            filter_audio_array,
             audio_data,
             audio_file.filename or "audio"
         )
         
         # Transcribe
         transcript = await transcribe_audio(filtered_audio)
+        status = "completed" if transcript.strip() else "skipped"
+        await store(cache_key, transcript, status, perf_counter() - started)
         
-        # Send to backend asynchronously (fire and forget)
-        asyncio.create_task(send_to_backend(chunk_number, transcript, time))
+        # Send to backend asynchronously (fire and forget); the backend
+        # refuses empty text
+        if status == "completed":
+            asyncio.create_task(send_to_backend(chunk_number, transcript, time))
         
         logger.info(f"Chunk {chunk_number} processed successfully, transcript length: {len(transcript)}")
         
         return TranscribeResponseWithText(
-            status="completed",
+            status=status,
             chunk=chunk_number,
             text=transcript,
             time=time
@@ -56,11 +89,72 @@ async def transcribe_chunk(
         logger.error(f"Failed to process chunk {chunk_number}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to process audio: {str(e)}")
 
+async def admit_chunk(
+    audio_data: bytes,
+    chunk_number: int,
+    time: str,
+    filename: Optional[str],
+    session_id: str
+) -> TranscribeResponse:
+    """
+    Cache lookup, admission control, silence gate and enqueue for one
+    uploaded chunk. Raises HTTPException 400 for an empty file and 429
+    (with Retry-After) when the queue is saturated.
+    """
+    if not audio_data:
+        raise HTTPException(status_code=400, detail="Empty audio file")
+    
+    # A cached transcript needs no queue slot: deliver it right away
+    _, cached = await lookup(audio_data)
+    if cached is not None:
+        logger.info(f"Chunk {chunk_number} served from the transcript cache")
+        if cached.status == "completed" and cached.text.strip():
+            asyncio.create_task(send_to_backend(chunk_number, cached.text, time))
+        return TranscribeResponse(
+            status=cached.status,
+            chunk=chunk_number
+        )
+    
+    # Fail fast instead of blocking on a full queue (before any decoding)
+    retry_after = check_admission(len(audio_data))
+    if retry_after is not None:
+        logger.warning(f"Rejected chunk {chunk_number} of session {session_id}, retry after {retry_after}s")
+        raise HTTPException(
+            status_code=429,
+            detail="Transcription queue is saturated",
+            headers={"Retry-After": str(retry_after)}
+        )
+    
+    # Silent chunks never reach the queue
+    if await asyncio.to_thread(is_chunk_silent, audio_data, chunk_number):
+        return TranscribeResponse(
+            status="skipped",
+            chunk=chunk_number
+        )
+    
+    # Enqueue task
+    await enqueue_task({
+        "audio_data": audio_data,
+        "chunk_number": chunk_number,
+        "time": time,
+        "filename": filename,
+        "session_id": session_id,
+        "gated": True
+    })
+    
+    logger.info(f"Enqueued chunk {chunk_number} of session {session_id} for transcription")
+    
+    return TranscribeResponse(
+        status="queued",
+        chunk=chunk_number
+    )
+
 @router.post("/async", response_model=TranscribeResponse, status_code=202)
 async def transcribe_chunk_async(
     audio_file: UploadFile = File(...),
     chunk_number: int = Form(...),
-    time: str = Form(...)
+    time: str = Form(...),
+    session_id: str = Form("default")
 ):
     """
     Receive audio chunk and enqueue for transcription.
@@ -69,25 +163,67 @@ async def transcribe_chunk_async(
     try:
         # Read audio data
         audio_data = await audio_file.read()
-        
-        if not audio_data:
-            raise HTTPException(status_code=400, detail="Empty audio file")
-        
-        # Enqueue task
-        await enqueue_task({
-            "audio_data": audio_data,
-            "chunk_number": chunk_number,
-            "time": time,
-            "filename": audio_file.filename
-        })
-        
-        logger.info(f"Enqueued chunk {chunk_number} for transcription")
-        
-        return TranscribeResponse(
-            status="queued",
-            chunk=chunk_number
-        )
+        return await admit_chunk(audio_data, chunk_number, time, audio_file.filename, session_id)
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to enqueue chunk {chunk_number}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to enqueue task: {str(e)}")
+
+@router.post("/batch", response_model=BatchTranscribeResponse, status_code=202)
+async def transcribe_chunk_batch(
+    response: Response,
+    audio_files: List[UploadFile] = File(...),
+    chunk_numbers: List[int] = Form(...),
+    times: List[str] = Form(...),
+    session_id: str = Form("default")
+):
+    """
+    Receive several chunks of one session in one request, e.g. a device
+    catching up after being offline, and admit them in order as /async
+    does for each. Per-chunk results are "queued", "skipped", a cached
+    status, "invalid" (empty file) or "failed". Once admission control
+    refuses a chunk, it and every later chunk are "rejected" and the
+    response carries Retry-After; 429 when not even the first was admitted.
+    """
+    if not len(audio_files) == len(chunk_numbers) == len(times):
+        raise HTTPException(status_code=400, detail="audio_files, chunk_numbers and times must have the same length")
+    if len(audio_files) > settings.batch_upload_max_chunks:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.batch_upload_max_chunks} chunks per batch"
+        )
+    
+    results: List[TranscribeResponse] = []
+    retry_after: Optional[str] = None
+    for audio_file, chunk_number, time in zip(audio_files, chunk_numbers, times):
+        if retry_after is not None:
+            results.append(TranscribeResponse(status="rejected", chunk=chunk_number))
+            continue
+        
+        try:
+            audio_data = await audio_file.read()
+            results.append(await admit_chunk(audio_data, chunk_number, time, audio_file.filename, session_id))
+        except HTTPException as e:
+            if e.status_code == 429:
+                retry_after = e.headers["Retry-After"]
+                results.append(TranscribeResponse(status="rejected", chunk=chunk_number))
+            else:
+                results.append(TranscribeResponse(status="invalid", chunk=chunk_number))
+        except Exception as e:
+            logger.error(f"Failed to enqueue chunk {chunk_number}: {str(e)}")
+            results.append(TranscribeResponse(status="failed", chunk=chunk_number))
+    
+    if retry_after is not None:
+        if results[0].status == "rejected":
+            raise HTTPException(
+                status_code=429,
+                detail="Transcription queue is saturated",
+                headers={"Retry-After": retry_after}
+            )
+        response.headers["Retry-After"] = retry_after
+    
+    logger.info(f"Batch of {len(results)} chunks from session {session_id}: "
+                f"{sum(r.status == 'queued' for r in results)} queued")
+    return BatchTranscribeResponse(results=results)
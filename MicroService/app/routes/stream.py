@@ -0,0 +1,145 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from app.schemas.response import StreamTranscript
+from app.services.filter import FILTER_STAGES
+from app.services.stream import UtteranceSegmenter
+from app.services.transcribe import transcribe_audio_chunk
+from app.services.callback import send_to_backend
+from app.config import settings
+import numpy as np
+import logging
+import asyncio
+
+router = APIRouter(tags=["transcription"])
+logger = logging.getLogger(__name__)
+
+# Highest sample_rate a stream may declare (Hz)
+MAX_SAMPLE_RATE = 192000
+
+def _format_time(moment: datetime) -> str:
+    return moment.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+def _parse_time(value: Optional[str]) -> datetime:
+    if not value:
+        return datetime.now(timezone.utc)
+    moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+@router.websocket("/transcribe-stream")
+async def transcribe_stream(
+    websocket: WebSocket,
+    sample_rate: int = 16000,
+    time: Optional[str] = None
+):
+    """
+    Stream raw PCM and receive transcripts as utterances close.
+
+    Binary messages carry little-endian int16 mono PCM at `sample_rate`
+    (1 to MAX_SAMPLE_RATE Hz, otherwise the socket is closed with 1008);
+    `time` is the ISO timestamp of the first sample. The text message
+    "end" flushes the open utterance; the server answers with the last
+    finals and {"type": "done"}. Each final is also sent to the backend.
+    """
+    await websocket.accept()
+
+    try:
+        started = _parse_time(time)
+    except ValueError:
+        await websocket.send_json({"type": "error", "detail": f"Invalid time: {time}"})
+        await websocket.close(code=1003)
+        return
+
+    if not 0 < sample_rate <= MAX_SAMPLE_RATE:
+        # Checked before the resampler is built: it can't take a zero or negative rate
+        await websocket.send_json({"type": "error", "detail": f"Invalid sample_rate: {sample_rate}"})
+        await websocket.close(code=1008)
+        return
+
+    segmenter = UtteranceSegmenter(sample_rate)
+    jobs: asyncio.Queue = asyncio.Queue()
+    connected = True
+    leftover = b""
+    partial_at = 0  # open-utterance length (samples) at the last partial
+    partial_step = settings.sample_rate * settings.stream_partial_interval_ms // 1000
+
+    async def send(message: dict):
+        if connected:
+            try:
+                await websocket.send_json(message)
+            except Exception:
+                pass
+
+    async def transcriber():
+        # Utterances are transcribed one at a time, so finals arrive in order
+        while True:
+            job = await jobs.get()
+            if job is None:
+                return
+            kind, index, start, end, audio = job
+
+            try:
+                audio, _ = FILTER_STAGES["normalize"](audio, settings.sample_rate, {})
+                moment = _format_time(started + timedelta(seconds=start))
+                result = await transcribe_audio_chunk(audio, index, moment, skip_if_silent=False)
+            except Exception as e:
+                logger.error(f"Stream transcription failed for utterance {index}: {str(e)}")
+                continue
+
+            text = result["text"]
+            await send(StreamTranscript(
+                type=kind, utterance=index, text=text, start=start, end=end,
+                time=moment if kind == "final" else None
+            ).model_dump(exclude_none=True))
+
+            if kind == "final" and text:
+                asyncio.create_task(send_to_backend(index, text, moment))
+
+    def queue_finals(utterances):
+        nonlocal partial_at
+        for utterance in utterances:
+            jobs.put_nowait(("final", utterance.index, utterance.start, utterance.end, utterance.audio))
+            partial_at = 0
+
+    def queue_partial():
+        nonlocal partial_at
+        audio = segmenter.current_audio()
+        # Partials only fill idle time; they never queue up behind finals
+        if audio is None or not partial_step or not jobs.empty() or len(audio) - partial_at < partial_step:
+            return
+        partial_at = len(audio)
+        start = segmenter.current_start
+        jobs.put_nowait(("partial", segmenter.next_index, start, start + len(audio) / settings.sample_rate, audio))
+
+    worker = asyncio.create_task(transcriber())
+    logger.info(f"Stream opened ({sample_rate}Hz, starting {_format_time(started)})")
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                connected = False
+                break
+
+            if message.get("bytes"):
+                data = leftover + message["bytes"]
+                usable = len(data) - len(data) % 2
+                leftover = data[usable:]
+                samples = np.frombuffer(data[:usable], dtype="<i2").astype(np.float32) / 32768.0
+                queue_finals(segmenter.feed(samples))
+                queue_partial()
+            elif (message.get("text") or "").strip() == "end":
+                break
+    except WebSocketDisconnect:
+        connected = False
+
+    # Transcribe whatever was still open, even if the client is gone
+    queue_finals(segmenter.flush())
+    jobs.put_nowait(None)
+    await worker
+
+    if connected:
+        await send({"type": "done"})
+        await websocket.close()
+
+    logger.info(f"Stream closed after {segmenter.next_index - 1} utterances")
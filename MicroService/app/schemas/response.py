@@ -1,9 +1,13 @@
+from typing import List, Optional
 from pydantic import BaseModel
 
 class TranscribeResponse(BaseModel):
     status: str
     chunk: int
 
+class BatchTranscribeResponse(BaseModel):
+    results: List[TranscribeResponse]
+
 class TranscribeResponseWithText(BaseModel):
     status: str
     chunk: int
@@ -15,3 +19,11 @@ class BackendPayload(BaseModel):
     text: str
     time: str
     source: str = "ai-pendant"
+
+class StreamTranscript(BaseModel):
+    type: str  # "partial" or "final"
+    utterance: int
+    text: str
+    start: float
+    end: float
+    time: Optional[str] = None
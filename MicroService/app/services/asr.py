@@ -0,0 +1,227 @@
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Union
+import numpy as np
+import torch
+import whisper
+from app.config import settings
+from app.services.metrics import MODEL_LOAD_SECONDS
+
+logger = logging.getLogger(__name__)
+
+AudioInput = Union[np.ndarray, str]  # float32 16kHz mono array, or a file path
+
+def decode_batch(model, audio_arrays: List[np.ndarray], language: Optional[str]) -> List[str]:
+    """
+    Run one batched Whisper encoder/decoder pass over float32 16kHz arrays.
+    Arrays longer than Whisper's 30s window fall back to model.transcribe.
+    """
+    texts: List[Optional[str]] = [None] * len(audio_arrays)
+    batched = [i for i, audio in enumerate(audio_arrays) if len(audio) <= whisper.audio.N_SAMPLES]
+
+    if batched:
+        mel = torch.stack([
+            whisper.log_mel_spectrogram(
+                whisper.pad_or_trim(audio_arrays[i].astype(np.float32, copy=False)),
+                model.dims.n_mels
+            )
+            for i in batched
+        ]).to(model.device)
+        options = whisper.DecodingOptions(language=language, fp16=False, without_timestamps=True)
+        for i, decoded in zip(batched, model.decode(mel, options)):
+            texts[i] = decoded.text
+
+    for i, audio in enumerate(audio_arrays):
+        if texts[i] is None:
+            texts[i] = model.transcribe(
+                audio.astype(np.float32, copy=False),
+                language=language,
+                fp16=False,
+                verbose=False
+            )["text"]
+
+    return texts
+
+class TranscriptionBackend(ABC):
+    """
+    A loaded speech-to-text model. Selected with settings.transcription_backend;
+    the inference engine decides where (thread pool or inference process)
+    its calls run.
+
+    Options passed to transcribe() are Whisper's: "language" (None to
+    detect), "initial_prompt", plus runtime-specific keys a backend may
+    ignore ("fp16", "verbose").
+    """
+
+    name: str
+
+    @abstractmethod
+    def transcribe(self, audio: AudioInput, options: Dict[str, Any]) -> Dict[str, Any]:
+        """Transcribe one input; returns at least {"text": ...}."""
+
+    @abstractmethod
+    def transcribe_batch(self, audio_arrays: List[np.ndarray], language: Optional[str]) -> List[str]:
+        """Transcribe several arrays, batched where the runtime supports it."""
+
+    def warmup(self, seconds: float = 2.0) -> float:
+        """
+        Decode a short stretch of low noise (language detection included)
+        so the first real chunk doesn't pay for lazy initialisation and
+        first-touch allocations. Returns the time it took.
+        """
+        audio = (np.random.default_rng(0).standard_normal(int(seconds * 16000)) * 0.01).astype(np.float32)
+        start = time.perf_counter()
+        self.transcribe(audio, {"language": None, "fp16": False, "verbose": None})
+        return time.perf_counter() - start
+
+def quantize_whisper(model):
+    """
+    Dynamic INT8 quantization of a Whisper model's Linear layers: weights
+    are stored as int8 and activations quantized on the fly per batch.
+    Convolutions and the token embedding (also the output projection)
+    stay FP32.
+    """
+    # Whisper's Linear subclass only casts weights to the input dtype,
+    # which is a no-op in FP32; quantize_dynamic matches exact nn.Linear
+    for module in model.modules():
+        if isinstance(module, whisper.model.Linear):
+            module.__class__ = torch.nn.Linear
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+class WhisperBackend(TranscriptionBackend):
+    """
+    openai-whisper: FP32 PyTorch on CPU, optionally with INT8 Linear layers.
+
+    Decoding installs kv-cache hooks on the model itself, so two decodes
+    on one model at once mix up each other's caches; calls are serialized.
+    """
+
+    name = "whisper"
+
+    def __init__(self, model_name: str, quantize: bool = False):
+        self.model = whisper.load_model(model_name)
+        if quantize:
+            self.model = quantize_whisper(self.model)
+        self._lock = threading.Lock()
+
+    def transcribe(self, audio: AudioInput, options: Dict[str, Any]) -> Dict[str, Any]:
+        if isinstance(audio, np.ndarray):
+            audio = audio.astype(np.float32, copy=False)
+        with self._lock:
+            return self.model.transcribe(audio, **options)
+
+    def transcribe_batch(self, audio_arrays: List[np.ndarray], language: Optional[str]) -> List[str]:
+        with self._lock:
+            return decode_batch(self.model, audio_arrays, language)
+
+class FasterWhisperBackend(TranscriptionBackend):
+    """
+    faster-whisper: the same Whisper checkpoints converted to CTranslate2,
+    run with int8 weights (faster_whisper_compute_type) on CPU. Model names
+    are the Whisper sizes or a path to a converted model directory.
+    """
+
+    name = "faster-whisper"
+
+    def __init__(self, model_name: str, compute_type: str, cpu_threads: int = 0, num_workers: int = 1):
+        # Imported here so the default backend doesn't need the package
+        from faster_whisper import WhisperModel
+
+        # num_workers: calls from that many threads decode in parallel
+        # instead of queueing for one CTranslate2 worker
+        self.model = WhisperModel(
+            model_name, device="cpu", compute_type=compute_type, cpu_threads=cpu_threads, num_workers=num_workers
+        )
+
+    def transcribe(self, audio: AudioInput, options: Dict[str, Any]) -> Dict[str, Any]:
+        if isinstance(audio, np.ndarray):
+            audio = audio.astype(np.float32, copy=False)
+        segments, info = self.model.transcribe(
+            audio,
+            language=options.get("language"),
+            initial_prompt=options.get("initial_prompt"),
+            beam_size=settings.faster_whisper_beam_size
+        )
+        # segments is a generator; decoding happens while it is consumed
+        text = "".join(segment.text for segment in segments)
+        return {"text": text, "language": info.language}
+
+    def transcribe_batch(self, audio_arrays: List[np.ndarray], language: Optional[str]) -> List[str]:
+        # CTranslate2 batches within one input; separate chunks run in turn
+        return [self.transcribe(audio, {"language": language})["text"] for audio in audio_arrays]
+
+def available_cpus() -> int:
+    """CPUs this process may run on (respects cpusets / taskset)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def inference_concurrency(workers: Optional[int] = None) -> int:
+    """
+    Inference calls one service process runs at once with the thread
+    engine, given `workers` per-chunk workers (default settings.worker_count).
+    """
+    if settings.batch_max_size > 1 or settings.segmenter_enabled:
+        return 1
+    if settings.transcription_backend == "whisper":
+        # WhisperBackend runs one decode at a time
+        return 1
+    return max(1, settings.worker_count if workers is None else workers)
+
+def max_inference_concurrency() -> int:
+    """
+    Most inference calls one service process may run at once with the
+    thread engine: the autoscaler's ceiling when it is on.
+    """
+    return inference_concurrency(settings.autoscale_max_workers if settings.autoscale_enabled else None)
+
+def configure_torch_threads(concurrency: int) -> int:
+    """
+    Size torch's intra-op pool so `concurrency` simultaneous decodes in
+    each of settings.service_processes processes fill the CPUs without
+    oversubscribing them (torch_threads overrides). Inter-op parallelism
+    is set to torch_interop_threads. Returns the intra-op thread count.
+    """
+    threads = settings.torch_threads or max(
+        1, available_cpus() // (max(1, settings.service_processes) * max(1, concurrency))
+    )
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(settings.torch_interop_threads)
+    except RuntimeError:
+        # Only settable before the first inter-op work in the process
+        pass
+    return threads
+
+def load_backend(model_name: str, backend: Optional[str] = None, threads: int = 0,
+                 warmup: Optional[bool] = None, concurrency: int = 1) -> TranscriptionBackend:
+    """
+    Load `model_name` with the selected backend (default
+    settings.transcription_backend). `threads` caps faster-whisper's CPU
+    threads (0 = library default) and `concurrency` sets how many of its
+    calls run in parallel; openai-whisper follows torch's setting, runs one
+    call at a time and is INT8-quantized with settings.whisper_quantize.
+    With `warmup` (default settings.model_warmup) one short decode runs
+    before returning.
+    """
+    backend = backend or settings.transcription_backend
+    warmup = settings.model_warmup if warmup is None else warmup
+
+    with MODEL_LOAD_SECONDS.time():
+        if backend == "whisper":
+            loaded = WhisperBackend(model_name, settings.whisper_quantize)
+        elif backend == "faster-whisper":
+            loaded = FasterWhisperBackend(model_name, settings.faster_whisper_compute_type, threads, concurrency)
+        else:
+            raise ValueError(f"Unknown transcription backend: {backend}")
+
+    quantized = " (INT8 Linear layers)" if backend == "whisper" and settings.whisper_quantize else ""
+    logger.info(f"Loaded '{model_name}' with the {backend} backend{quantized}")
+
+    if warmup:
+        logger.info(f"Warmup decode took {loaded.warmup():.2f}s")
+    return loaded
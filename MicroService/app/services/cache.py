@@ -0,0 +1,186 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Optional, Tuple
+from app.config import settings
+from app.services.metrics import CACHE_LOOKUPS, CACHE_SAVED_SECONDS
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class CachedTranscript:
+    text: str
+    status: str  # "completed" or "skipped" (silent after filtering)
+    compute_seconds: float  # filter + transcription time it took to produce
+
+class TranscriptCache:
+    """
+    Transcripts keyed by cache_key(): an in-memory LRU of max_entries and,
+    with disk_path set, a directory of small JSON files shared by every
+    process on the host. The disk tier is evicted least recently used
+    first (by mtime, touched on every hit) once it exceeds disk_max_bytes.
+    """
+
+    def __init__(self, max_entries: int, disk_path: Optional[str] = None, disk_max_bytes: int = 0):
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, CachedTranscript]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.disk_path = Path(disk_path) if disk_path else None
+        self.disk_max_bytes = disk_max_bytes
+        self._disk_index: "OrderedDict[str, int]" = OrderedDict()  # key -> size, oldest first
+        self._disk_bytes = 0
+        if self.disk_path is not None:
+            self.disk_path.mkdir(parents=True, exist_ok=True)
+            self._rescan_disk()
+
+    def get(self, key: str) -> Tuple[Optional[CachedTranscript], str]:
+        """Return (entry or None, tier it came from: "memory", "disk" or "miss")."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return entry, "memory"
+
+        if self.disk_path is None:
+            return None, "miss"
+
+        path = self._path(key)
+        try:
+            entry = CachedTranscript(**json.loads(path.read_text()))
+            os.utime(path)
+        except (OSError, ValueError, TypeError):
+            return None, "miss"
+
+        with self._lock:
+            self._remember(key, entry)
+            if key in self._disk_index:
+                self._disk_index.move_to_end(key)
+        return entry, "disk"
+
+    def put(self, key: str, entry: CachedTranscript):
+        with self._lock:
+            self._remember(key, entry)
+
+        if self.disk_path is None:
+            return
+
+        # Write then rename, so other processes never read a partial file
+        data = json.dumps(asdict(entry)).encode()
+        path = self._path(key)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+        with self._lock:
+            self._disk_bytes += len(data) - self._disk_index.pop(key, 0)
+            self._disk_index[key] = len(data)
+            if self._disk_bytes > self.disk_max_bytes:
+                self._evict_disk()
+
+    def _remember(self, key: str, entry: CachedTranscript):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _path(self, key: str) -> Path:
+        return self.disk_path / f"{key}.json"
+
+    def _rescan_disk(self):
+        """Rebuild the disk index from the directory; other processes write to it too."""
+        files = []
+        for entry in os.scandir(self.disk_path):
+            if entry.name.endswith(".json"):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, entry.name[:-5], stat.st_size))
+
+        files.sort()
+        self._disk_index = OrderedDict((key, size) for _, key, size in files)
+        self._disk_bytes = sum(size for _, _, size in files)
+
+    def _evict_disk(self):
+        self._rescan_disk()
+        # Evict down to 90% so every put near the limit doesn't rescan
+        target = self.disk_max_bytes * 0.9
+        while self._disk_index and self._disk_bytes > target:
+            key, size = self._disk_index.popitem(last=False)
+            self._disk_bytes -= size
+            try:
+                self._path(key).unlink()
+            except FileNotFoundError:
+                pass
+
+_cache: Optional[TranscriptCache] = None
+
+def get_cache() -> Optional[TranscriptCache]:
+    """The process-wide cache, or None when settings.cache_enabled is off."""
+    global _cache
+
+    if _cache is None and settings.cache_enabled:
+        _cache = TranscriptCache(
+            settings.cache_memory_entries,
+            settings.cache_path if settings.cache_disk_enabled else None,
+            int(settings.cache_disk_max_mb * 1024 * 1024)
+        )
+    return _cache
+
+def cache_key(audio_data: bytes) -> str:
+    """
+    Hash of the raw upload plus every setting that changes its transcript,
+    so a model or filter change never serves stale text.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(
+        f"{settings.transcription_backend}|{settings.faster_whisper_compute_type}|{settings.whisper_quantize}|"
+        f"{settings.whisper_model}|{settings.whisper_language}|"
+        f"{settings.filter_pipeline}|{settings.sample_rate}\0".encode()
+    )
+    digest.update(audio_data)
+    return digest.hexdigest()
+
+async def lookup(audio_data: bytes) -> Tuple[Optional[str], Optional[CachedTranscript]]:
+    """
+    Look the raw upload up before any decoding. Returns (key, entry);
+    key is None when caching is off, entry is None on a miss.
+    """
+    cache = get_cache()
+    if cache is None:
+        return None, None
+
+    key = cache_key(audio_data)
+    if cache.disk_path is None:
+        entry, tier = cache.get(key)
+    else:
+        entry, tier = await asyncio.to_thread(cache.get, key)
+
+    CACHE_LOOKUPS.labels(tier).inc()
+    if entry is None:
+        return key, None
+
+    CACHE_SAVED_SECONDS.inc(entry.compute_seconds)
+    return key, entry
+
+async def store(key: Optional[str], text: str, status: str, compute_seconds: float):
+    """Remember a transcript under a key from lookup(); disk errors only log."""
+    cache = get_cache()
+    if cache is None or key is None:
+        return
+
+    entry = CachedTranscript(text=text, status=status, compute_seconds=compute_seconds)
+    try:
+        if cache.disk_path is None:
+            cache.put(key, entry)
+        else:
+            await asyncio.to_thread(cache.put, key, entry)
+    except OSError as e:
+        logger.warning(f"Could not write transcript cache entry: {e}")
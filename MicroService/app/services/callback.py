@@ -1,36 +1,200 @@
+import asyncio
 import httpx
 import logging
+from typing import Any, Dict, List, Optional, Tuple
 from app.config import settings
+from app.services.metrics import stage_timer
 
 logger = logging.getLogger(__name__)
 
+# Pooled keep-alive client, opened in the app lifespan
+_client: Optional[httpx.AsyncClient] = None
+_batcher: Optional["CallbackBatcher"] = None
+
+class RejectedTranscript(Exception):
+    """The backend refused a transcript for good (a 4xx); retrying can't help."""
+
+def is_rejection(status_code: int) -> bool:
+    """4xx other than timeouts and rate limiting: the request itself is wrong."""
+    return 400 <= status_code < 500 and status_code not in (408, 429)
+
+def _create_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.callback_max_connections,
+        max_keepalive_connections=settings.callback_max_keepalive
+    )
+    return httpx.AsyncClient(
+        timeout=settings.callback_timeout,
+        limits=limits,
+        http2=settings.callback_http2
+    )
+
+async def start_callback_client():
+    """Open the shared backend client (and the bulk batcher if enabled)."""
+    global _client, _batcher
+
+    if _client is None:
+        _client = _create_client()
+        logger.info(
+            f"Backend client ready (max {settings.callback_max_connections} connections, "
+            f"http2={settings.callback_http2})"
+        )
+
+    if settings.callback_bulk_enabled and _batcher is None:
+        _batcher = CallbackBatcher(settings.callback_bulk_window_ms / 1000, settings.callback_bulk_max_items)
+        logger.info(
+            f"Bulk callbacks enabled ({settings.callback_bulk_max_items} items / "
+            f"{settings.callback_bulk_window_ms}ms per request)"
+        )
+
+async def stop_callback_client():
+    """Flush pending bulk callbacks and close the shared client."""
+    global _client, _batcher
+
+    if _batcher is not None:
+        await _batcher.close()
+        _batcher = None
+
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        logger.info("Backend client closed")
+
+def get_client() -> httpx.AsyncClient:
+    """Shared client; created lazily when used outside the app lifespan."""
+    global _client
+    if _client is None:
+        _client = _create_client()
+    return _client
+
+class CallbackBatcher:
+    """
+    Coalesces transcripts sent within one time window into a single POST
+    to the backend's batch endpoint.
+
+    Each caller awaits its own future, which resolves with that item's
+    result, so per-chunk retries behave as with single callbacks.
+    """
+
+    def __init__(self, window: float, max_items: int):
+        self.window = window
+        self.max_items = max(1, max_items)
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._timer: Optional[asyncio.Task] = None
+        self._inflight = set()
+
+    async def submit(self, payload: Dict[str, Any]):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((payload, future))
+
+        if len(self._pending) >= self.max_items:
+            self._flush_now()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+        return await future
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.window)
+        self._timer = None
+        self._flush_now()
+
+    def _flush_now(self):
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+            self._timer = None
+
+        items, self._pending = self._pending, []
+        if items:
+            task = asyncio.create_task(self._post(items))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _post(self, items: List[Tuple[Dict[str, Any], asyncio.Future]]):
+        url = f"{settings.backend_url}{settings.backend_batch_endpoint}"
+
+        # The backend refuses empty text; there is nothing to deliver anyway
+        for payload, future in items:
+            if not (payload.get("text") or "").strip() and not future.done():
+                future.set_result(True)
+        items = [(payload, future) for payload, future in items if not future.done()]
+        if not items:
+            return
+
+        try:
+            response = await get_client().post(url, json={"transcripts": [payload for payload, _ in items]})
+            response.raise_for_status()
+            results = response.json().get("data", {}).get("results", [])
+        except Exception as e:
+            if isinstance(e, httpx.HTTPStatusError):
+                logger.error(f"Bulk callback failed: {e.response.status_code} - {e.response.text}")
+                if is_rejection(e.response.status_code):
+                    e = RejectedTranscript(f"{e.response.status_code} - {e.response.text}")
+            else:
+                logger.error(f"Bulk callback error: {str(e)}")
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        logger.info(f"Bulk callback delivered {len(items)} transcripts")
+
+        for i, (payload, future) in enumerate(items):
+            if future.done():
+                continue
+            result = results[i] if i < len(results) else {}
+            error = result.get("error")
+            if error and is_rejection(result.get("status", 500)):
+                # Failed validation: resending it can't help
+                future.set_exception(RejectedTranscript(f"Backend rejected chunk {payload.get('chunkNumber')}: {error}"))
+            elif error:
+                future.set_exception(RuntimeError(f"Backend failed chunk {payload.get('chunkNumber')}: {error}"))
+            else:
+                future.set_result(True)
+
+    async def close(self):
+        self._flush_now()
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
 async def send_to_backend(chunk_number: int, text: str, time: str) -> bool:
     """
     Send transcription result to main backend service.
+
+    Uses the pooled keep-alive client; in bulk mode the transcript is
+    queued and delivered with others from the same window.
     """
     url = f"{settings.backend_url}{settings.backend_endpoint}"
-    
+
     # Format payload according to backend requirements
     payload = {
         "text": text,
         "timestamp": time,
         "chunkNumber": chunk_number
     }
-    
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        try:
-            response = await client.post(
+
+    if _batcher is not None:
+        with stage_timer("callback"):
+            await _batcher.submit(payload)
+        logger.info(f"Backend callback successful for chunk {chunk_number} (bulk)")
+        return True
+
+    try:
+        with stage_timer("callback"):
+            response = await get_client().post(
                 url,
                 json=payload
             )
             response.raise_for_status()
-            
-            logger.info(f"Backend callback successful for chunk {chunk_number}")
-            return True
-        
-        except httpx.HTTPStatusError as e:
-            logger.error(f"Backend callback failed: {e.response.status_code} - {e.response.text}")
-            raise
-        except Exception as e:
-            logger.error(f"Backend callback error: {str(e)}")
-            raise
+
+        logger.info(f"Backend callback successful for chunk {chunk_number}")
+        return True
+
+    except httpx.HTTPStatusError as e:
+        logger.error(f"Backend callback failed: {e.response.status_code} - {e.response.text}")
+        if is_rejection(e.response.status_code):
+            raise RejectedTranscript(f"{e.response.status_code} - {e.response.text}") from e
+        raise
+    except Exception as e:
+        logger.error(f"Backend callback error: {str(e)}")
+        raise
@@ -0,0 +1,305 @@
+import asyncio
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context, shared_memory
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import numpy as np
+import torch
+from app.config import settings
+from app.services.asr import available_cpus, configure_torch_threads, inference_concurrency, load_backend
+from app.services.metrics import observe_stage, stage_timer
+
+logger = logging.getLogger(__name__)
+
+def timed_inference(queued: float, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run fn where the model is, recording the time since `queued`
+    (perf_counter) as model wait and fn's own run time as inference.
+    """
+    started = time.perf_counter()
+    observe_stage("model_wait", started - queued)
+    with stage_timer("inference"):
+        return fn(*args, **kwargs)
+
+class InferenceEngine(ABC):
+    """
+    Runs Whisper inference on float32 16kHz mono arrays.
+    Selected with settings.inference_engine; the model runtime inside
+    is the TranscriptionBackend from settings.transcription_backend.
+    """
+
+    async def start(self):
+        """Start any resources the engine needs (processes, models)."""
+
+    async def stop(self):
+        """Release engine resources."""
+
+    async def resize(self, processes: int):
+        """
+        Adjust to `processes` per-chunk workers: the process engine runs
+        that many model copies, the thread engine re-sizes torch's pool.
+        """
+
+    @abstractmethod
+    async def transcribe(self, audio: np.ndarray, options: Dict[str, Any]) -> Dict[str, Any]:
+        """Transcribe one array; returns the backend's result dict (at least "text")."""
+
+    @abstractmethod
+    async def transcribe_batch(self, audio_arrays: List[np.ndarray], language: Optional[str]) -> List[str]:
+        """Transcribe several arrays in one batched pass."""
+
+class ThreadEngine(InferenceEngine):
+    """
+    Default engine: one shared in-process model, calls run in the
+    default thread pool.
+    """
+
+    def __init__(self, model_loader: Callable[[], Awaitable[Any]]):
+        self._model_loader = model_loader
+
+    async def start(self):
+        # Load (and warm) the model now rather than on the first chunk
+        if settings.model_warmup:
+            await self._model_loader()
+
+    async def resize(self, processes: int):
+        # Same split as at model load, for the new number of concurrent decodes
+        threads = configure_torch_threads(inference_concurrency(processes))
+        logger.info(f"Torch intra-op threads set to {threads} for {processes} workers")
+
+    async def transcribe(self, audio: np.ndarray, options: Dict[str, Any]) -> Dict[str, Any]:
+        queued = time.perf_counter()
+        backend = await self._model_loader()
+        return await asyncio.to_thread(timed_inference, queued, backend.transcribe, audio, options)
+
+    async def transcribe_batch(self, audio_arrays: List[np.ndarray], language: Optional[str]) -> List[str]:
+        queued = time.perf_counter()
+        backend = await self._model_loader()
+        return await asyncio.to_thread(timed_inference, queued, backend.transcribe_batch, audio_arrays, language)
+
+# Model owned by an inference process (set by _init_inference_process)
+_process_model = None
+
+def _init_inference_process(model_name: str, backend: str, num_threads: int):
+    """Pin the thread budget and load this process's own model."""
+    global _process_model
+
+    torch.set_num_threads(num_threads)
+    torch.set_num_interop_threads(1)
+    # Load time only reaches /metrics when the multiprocess registry is on
+    _process_model = load_backend(model_name, backend, num_threads)
+    logger.info(f"Inference process {os.getpid()} loaded '{model_name}' ({backend}) with {num_threads} threads")
+
+def _read_shared(shm_name: str, shape: Tuple[int, ...]) -> np.ndarray:
+    # Copy out of the segment so no tensor keeps a view into it after we close
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        return np.ndarray(shape, dtype=np.float32, buffer=shm.buf).copy()
+    finally:
+        shm.close()
+
+def _process_transcribe(shm_name: str, shape: Tuple[int, ...], options: Dict[str, Any]) -> Dict[str, Any]:
+    # Inference processes report their own run time; the parent records it
+    # together with the wait for a free process
+    audio = _read_shared(shm_name, shape)
+    start = time.perf_counter()
+    result = _process_model.transcribe(audio, options)
+    return {"text": result["text"], "language": result.get("language"), "inference_seconds": time.perf_counter() - start}
+
+def _process_transcribe_batch(buffers: List[Tuple[str, Tuple[int, ...]]], language: Optional[str]) -> Tuple[List[str], float]:
+    audio_arrays = [_read_shared(name, shape) for name, shape in buffers]
+    start = time.perf_counter()
+    texts = _process_model.transcribe_batch(audio_arrays, language)
+    return texts, time.perf_counter() - start
+
+def _observe_process_call(queued: float, inference: float):
+    observe_stage("model_wait", time.perf_counter() - queued - inference)
+    observe_stage("inference", inference)
+
+def _process_ping() -> int:
+    return os.getpid()
+
+class SharedAudio:
+    """
+    Float32 audio copied once into a shared-memory segment so only the
+    segment name crosses the process boundary. Unlinked on exit.
+    """
+
+    def __init__(self, audio: np.ndarray):
+        self.shape = audio.shape
+        self._shm = shared_memory.SharedMemory(create=True, size=max(audio.nbytes, 1))
+        view = np.ndarray(audio.shape, dtype=np.float32, buffer=self._shm.buf)
+        view[:] = audio
+        del view
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._shm.close()
+        self._shm.unlink()
+
+class ProcessPoolEngine(InferenceEngine):
+    """
+    Runs inference_processes dedicated processes, each owning a model and a
+    pinned torch thread budget, so inference scales across cores instead of
+    contending on the GIL and one model's intra-op pool.
+
+    Each process is its own single-worker executor handed out through an
+    idle queue, so the autoscaler can add or retire one model copy at a
+    time with resize(). Without a fixed threads_per_process the CPUs are
+    split across processes, so a resize replaces every process to give
+    all of them the new share.
+    """
+
+    def __init__(self, model_name: str, backend: str, processes: int, threads_per_process: int):
+        self.model_name = model_name
+        self.backend = backend
+        self.processes = max(1, processes)
+        self.threads_per_process = threads_per_process
+        self._executors: List[ProcessPoolExecutor] = []
+        self._idle: Optional[asyncio.Queue] = None
+        self._retiring = 0  # processes to shut down as they come back idle
+        self._stale: set = set()  # replaced processes, shut down as they come back idle
+
+    def _threads(self) -> int:
+        return self.threads_per_process or max(1, available_cpus() // self.processes)
+
+    async def _spawn(self, count: int) -> List[int]:
+        threads = self._threads()
+        # spawn: never fork a parent that may already hold torch thread pools
+        executors = [
+            ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=get_context("spawn"),
+                initializer=_init_inference_process,
+                initargs=(self.model_name, self.backend, threads)
+            )
+            for _ in range(count)
+        ]
+
+        # Warm every process so the first chunks don't pay for model loading
+        loop = asyncio.get_running_loop()
+        pids = await asyncio.gather(*(loop.run_in_executor(e, _process_ping) for e in executors))
+
+        for executor in executors:
+            self._executors.append(executor)
+            self._idle.put_nowait(executor)
+        return pids
+
+    async def start(self):
+        if self._idle is not None:
+            return
+
+        self._idle = asyncio.Queue()
+        logger.info(
+            f"Starting {self.processes} inference processes "
+            f"({self._threads()} threads each)"
+        )
+        pids = await self._spawn(self.processes)
+        logger.info(f"Inference processes ready: {sorted(set(pids))}")
+
+    async def stop(self):
+        executors, self._executors = self._executors, []
+        self._idle = None
+        self._retiring = 0
+        self._stale = set()
+        # Joining the processes blocks; keep the event loop free meanwhile
+        await asyncio.gather(*(
+            asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+            for executor in executors
+        ))
+
+    async def resize(self, processes: int):
+        await self.start()
+        processes = max(1, processes)
+        current, self.processes = self.processes, processes
+
+        if processes != current and not self.threads_per_process:
+            # Every process needs the new thread share: replace them all.
+            # Idle ones go first to free their memory; busy ones finish their call
+            self._stale.update(self._executors)
+            self._retiring = 0
+            while not self._idle.empty():
+                self._retire(self._idle.get_nowait())
+            pids = await self._spawn(processes)
+            logger.info(
+                f"Replaced inference processes with {sorted(pids)} "
+                f"({processes} total, {self._threads()} threads each)"
+            )
+        elif processes > current:
+            pids = await self._spawn(processes - current)
+            logger.info(f"Added inference processes {sorted(pids)} ({processes} total)")
+        elif processes < current:
+            self._retiring += current - processes
+            # Idle ones go now; busy ones finish their call first
+            while self._retiring and not self._idle.empty():
+                self._retire(self._idle.get_nowait())
+            logger.info(f"Retiring {current - processes} inference processes ({processes} total)")
+
+    def _retire(self, executor: ProcessPoolExecutor):
+        if executor in self._stale:
+            self._stale.discard(executor)
+        else:
+            self._retiring -= 1
+        self._executors.remove(executor)
+        executor.shutdown(wait=False)
+
+    async def _call(self, fn: Callable[..., Any], *args) -> Any:
+        await self.start()
+        executor = await self._idle.get()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+        finally:
+            if executor in self._stale or self._retiring:
+                self._retire(executor)
+            elif self._idle is not None:  # None once stopped
+                self._idle.put_nowait(executor)
+
+    async def transcribe(self, audio: np.ndarray, options: Dict[str, Any]) -> Dict[str, Any]:
+        queued = time.perf_counter()
+        with SharedAudio(audio.astype(np.float32, copy=False)) as shared:
+            result = await self._call(_process_transcribe, shared.name, shared.shape, options)
+        _observe_process_call(queued, result.pop("inference_seconds"))
+        return result
+
+    async def transcribe_batch(self, audio_arrays: List[np.ndarray], language: Optional[str]) -> List[str]:
+        queued = time.perf_counter()
+        shared = []
+        try:
+            # Appended one at a time so the segments made before a failing
+            # allocation are still released
+            for audio in audio_arrays:
+                shared.append(SharedAudio(audio.astype(np.float32, copy=False)))
+            texts, inference = await self._call(
+                _process_transcribe_batch,
+                [(s.name, s.shape) for s in shared],
+                language
+            )
+            _observe_process_call(queued, inference)
+            return texts
+        finally:
+            for s in shared:
+                s.__exit__(None, None, None)
+
+def create_engine(model_loader: Callable[[], Awaitable[Any]]) -> InferenceEngine:
+    """Build the engine selected by settings.inference_engine."""
+    if settings.inference_engine == "process":
+        return ProcessPoolEngine(
+            settings.whisper_model,
+            settings.transcription_backend,
+            settings.inference_processes,
+            settings.threads_per_process
+        )
+
+    if settings.inference_engine != "thread":
+        raise ValueError(f"Unknown inference engine: {settings.inference_engine}")
+
+    return ThreadEngine(model_loader)
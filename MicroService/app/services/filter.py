@@ -1,93 +1,276 @@
 import io
+import subprocess
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Tuple
 import numpy as np
 import soundfile as sf
 import noisereduce as nr
 import webrtcvad
-from scipy import signal
 import logging
 from app.config import settings
+from app.services.resample import resample
+from app.services.metrics import AUDIO_BYTES, AUDIO_SECONDS, stage_timer
 
 logger = logging.getLogger(__name__)
 
 def filter_audio(audio_data: bytes, filename: str = "audio") -> bytes:
     """
-    Apply audio filtering pipeline:
-    1. Noise reduction
-    2. Silence removal (VAD)
-    3. Re-encode to wav, 16khz, mono
+    Apply audio filtering pipeline and return 16kHz mono PCM_16 WAV bytes.
+    Use filter_audio_array when the result is handed straight to Whisper.
+    """
+    data = filter_audio_array(audio_data, filename)
+    return encode_wav(data, settings.sample_rate)
+
+def filter_audio_array(audio_data: bytes, filename: str = "audio", pipeline: Optional[str] = None) -> np.ndarray:
+    """
+    Decode audio, downmix to mono and run the filter stages named in
+    settings.filter_pipeline (or `pipeline`), returning float32 16khz mono.
+    
+    The default order resamples first, drops non-speech with VAD and only
+    then denoises the speech, using the discarded frames as the noise
+    profile, so the expensive spectral gating runs on the fewest samples.
+    
+    The returned array can be passed directly to model.transcribe,
+    skipping the WAV encode, temp file and ffmpeg decode.
+    """
+    try:
+        data, sample_rate = decode_audio(audio_data)
+    except Exception as e:
+        logger.error(f"Audio filtering failed: {str(e)}")
+        raise
+    
+    return apply_filters(data, sample_rate, pipeline)
+
+def read_audio(audio_data: bytes, dtype: str = "float64") -> Tuple[np.ndarray, int]:
+    """
+    Read uploaded audio bytes (WAV, FLAC, Ogg Opus/Vorbis, MP3) with
+    soundfile, at the file's own rate and channel count. Formats this
+    libsndfile can't read (Opus before 1.0.29, MP3 before 1.1) are
+    decoded by ffmpeg instead, to settings.sample_rate mono.
     """
     try:
+        return sf.read(io.BytesIO(audio_data), dtype=dtype)
+    except sf.LibsndfileError as e:
+        logger.info(f"soundfile can't read the upload ({e}), decoding with ffmpeg")
+
+    completed = subprocess.run(
+        ["ffmpeg", "-nostdin", "-i", "pipe:0", "-f", "f32le", "-ac", "1", "-ar", str(settings.sample_rate), "pipe:1"],
+        input=audio_data,
+        capture_output=True,
+        check=True
+    )
+    return np.frombuffer(completed.stdout, dtype=np.float32).astype(dtype), settings.sample_rate
+
+def decode_audio(audio_data: bytes) -> Tuple[np.ndarray, int]:
+    """
+    Decode audio bytes to a mono float signal at its native rate.
+    """
+    with stage_timer("decode"):
         # Load audio
-        audio_io = io.BytesIO(audio_data)
-        data, sample_rate = sf.read(audio_io)
+        data, sample_rate = read_audio(audio_data)
         
         # Convert to mono if stereo
         if len(data.shape) > 1:
             data = np.mean(data, axis=1)
-        
-        logger.info(f"Loaded audio: {len(data)} samples at {sample_rate}Hz")
-        
-        # Noise reduction
-        data = nr.reduce_noise(y=data, sr=sample_rate)
-        logger.info("Applied noise reduction")
-        
-        # Resample to 16kHz if needed
-        if sample_rate != settings.sample_rate:
-            num_samples = int(len(data) * settings.sample_rate / sample_rate)
-            data = signal.resample(data, num_samples)
-            sample_rate = settings.sample_rate
-            logger.info(f"Resampled to {settings.sample_rate}Hz")
-        
-        # Apply VAD for silence removal
-        data = remove_silence(data, sample_rate)
-        logger.info("Applied VAD silence removal")
-        
-        # Normalize audio
-        data = data / np.max(np.abs(data))
-        
-        # Convert to int16
-        data = (data * 32767).astype(np.int16)
-        
-        # Write to WAV format
-        output_io = io.BytesIO()
-        sf.write(output_io, data, sample_rate, format='WAV', subtype='PCM_16')
-        output_io.seek(0)
+    
+    AUDIO_BYTES.inc(len(audio_data))
+    AUDIO_SECONDS.inc(len(data) / sample_rate)
+    logger.info(f"Loaded audio: {len(data)} samples at {sample_rate}Hz")
+    return data, sample_rate
+
+def apply_filters(data: np.ndarray, sample_rate: int, pipeline: Optional[str] = None) -> np.ndarray:
+    """
+    Run the filter stages on an already decoded mono signal,
+    returning float32 16khz mono.
+    """
+    try:
+        context: Dict[str, Any] = {"noise": None}
+        for stage in parse_pipeline(pipeline or settings.filter_pipeline):
+            with stage_timer(stage):
+                data, sample_rate = FILTER_STAGES[stage](data, sample_rate, context)
         
         logger.info("Audio filtering complete")
-        return output_io.read()
+        return data.astype(np.float32)
     
     except Exception as e:
         logger.error(f"Audio filtering failed: {str(e)}")
         raise
 
-def remove_silence(audio: np.ndarray, sample_rate: int, frame_duration: int = 30) -> np.ndarray:
+def _resample_stage(data: np.ndarray, sample_rate: int, context: Dict[str, Any]) -> Tuple[np.ndarray, int]:
+    # Resample to 16kHz if needed
+    if sample_rate != settings.sample_rate:
+        data = resample(data, sample_rate, settings.sample_rate)
+        logger.info(f"Resampled to {settings.sample_rate}Hz")
+    
+    return data, settings.sample_rate
+
+def _vad_stage(data: np.ndarray, sample_rate: int, context: Dict[str, Any]) -> Tuple[np.ndarray, int]:
+    # Apply VAD for silence removal; keep the dropped frames as a noise profile
+    if sample_rate not in VAD_SAMPLE_RATES:
+        raise ValueError(f"VAD needs 8/16/32/48kHz audio, got {sample_rate}Hz; run resample before vad")
+    
+    data, context["noise"] = split_speech(data, sample_rate)
+    logger.info("Applied VAD silence removal")
+    return data, sample_rate
+
+def _denoise_stage(data: np.ndarray, sample_rate: int, context: Dict[str, Any]) -> Tuple[np.ndarray, int]:
+    # Noise reduction, stationary against the VAD noise profile when there is enough of it
+    noise = context.get("noise")
+    if noise is not None and len(noise) >= sample_rate * MIN_NOISE_PROFILE_SECONDS:
+        data = nr.reduce_noise(y=data, sr=sample_rate, stationary=True, y_noise=noise)
+        logger.info(f"Applied noise reduction ({len(noise) / sample_rate:.2f}s noise profile)")
+    else:
+        data = nr.reduce_noise(y=data, sr=sample_rate)
+        logger.info("Applied noise reduction")
+    
+    return data, sample_rate
+
+def _normalize_stage(data: np.ndarray, sample_rate: int, context: Dict[str, Any]) -> Tuple[np.ndarray, int]:
+    # Normalize audio
+    peak = np.max(np.abs(data)) if len(data) else 0.0
+    if peak > 0:
+        data = data / peak
+    
+    return data, sample_rate
+
+VAD_SAMPLE_RATES = (8000, 16000, 32000, 48000)
+MIN_NOISE_PROFILE_SECONDS = 0.25
+
+FILTER_STAGES: Dict[str, Callable[[np.ndarray, int, Dict[str, Any]], Tuple[np.ndarray, int]]] = {
+    "resample": _resample_stage,
+    "vad": _vad_stage,
+    "denoise": _denoise_stage,
+    "normalize": _normalize_stage
+}
+
+@lru_cache(maxsize=16)
+def parse_pipeline(spec: str) -> Tuple[str, ...]:
     """
-    Remove silence using WebRTC VAD.
+    Parse a comma-separated stage list such as "resample,vad,denoise,normalize".
     """
-    vad = webrtcvad.Vad(2)  # Aggressiveness mode 2
+    stages = tuple(stage.strip() for stage in spec.split(",") if stage.strip())
     
-    # Frame size in samples
-    frame_size = int(sample_rate * frame_duration / 1000)
+    unknown = [stage for stage in stages if stage not in FILTER_STAGES]
+    if unknown:
+        raise ValueError(f"Unknown filter stages {unknown}; expected {list(FILTER_STAGES)}")
+    
+    if "resample" not in stages:
+        raise ValueError("Filter pipeline must include resample")
+    
+    return stages
+
+def encode_wav(data: np.ndarray, sample_rate: int) -> bytes:
+    """
+    Encode a float signal in [-1, 1] to PCM_16 WAV bytes.
+    """
+    # Convert to int16
+    data = (data * 32767).astype(np.int16)
+    
+    # Write to WAV format
+    output_io = io.BytesIO()
+    sf.write(output_io, data, sample_rate, format='WAV', subtype='PCM_16')
+    output_io.seek(0)
     
-    # Pad audio to be divisible by frame_size
-    padding = frame_size - (len(audio) % frame_size)
-    if padding != frame_size:
+    return output_io.read()
+
+def frame_audio(audio: np.ndarray, frame_size: int) -> np.ndarray:
+    """
+    Zero-pad audio to a whole number of frames and return a
+    (n_frames, frame_size) view over it.
+    """
+    padding = -len(audio) % frame_size
+    if padding:
         audio = np.pad(audio, (0, padding), mode='constant')
     
-    # Convert to int16 for VAD
-    audio_int16 = (audio * 32767).astype(np.int16)
+    return np.ascontiguousarray(audio).reshape(-1, frame_size)
+
+def silent_frames(
+    frames: np.ndarray,
+    energy_floor: float = 1e-3,
+    relative_floor: float = 0.01,
+    noise_zcr: float = 0.35
+) -> np.ndarray:
+    """
+    Pure-NumPy prefilter marking frames that are clearly silent, so they
+    can skip the WebRTC VAD call.
+    
+    A frame is clearly silent when its RMS is below energy_floor (about
+    -60 dBFS), or when it is below relative_floor of the loudest frame and
+    has a high zero-crossing rate (hiss rather than voiced speech).
+    """
+    rms = np.sqrt(np.einsum('ij,ij->i', frames, frames) / frames.shape[1])
+    silent = rms < energy_floor
+    
+    # Zero-crossing rate is only needed for quiet frames that aren't already silent
+    quiet = np.flatnonzero(~silent & (rms < rms.max(initial=0.0) * relative_floor))
+    if len(quiet):
+        signs = np.signbit(frames[quiet])
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frames.shape[1] - 1)
+        silent[quiet] = zcr > noise_zcr
+    
+    return silent
+
+def speech_mask(
+    frames: np.ndarray,
+    sample_rate: int,
+    aggressiveness: int = 2,
+    prefilter: bool = True,
+    hangover: int = 3
+) -> np.ndarray:
+    """
+    Classify (n_frames, frame_size) float frames with WebRTC VAD.
+    Returns a boolean mask, True for speech frames.
+    
+    With prefilter, clearly silent frames skip the VAD call. Up to
+    `hangover` skipped frames right after speech are kept as speech, which
+    mirrors WebRTC VAD's own hangover so word endings are not clipped.
+    """
+    vad = webrtcvad.Vad(aggressiveness)
+    frame_size = frames.shape[1]
+    frame_bytes = frame_size * 2
+    
+    # One int16 conversion and one contiguous buffer for the whole signal;
+    # memoryview slices hand each frame to the C extension without copying
+    pcm = memoryview(np.clip(frames * 32767, -32768, 32767).astype(np.int16).tobytes())
+    
+    skipped = silent_frames(frames) if prefilter else np.zeros(len(frames), dtype=bool)
+    candidates = np.flatnonzero(~skipped)
+    mask = np.zeros(len(frames), dtype=bool)
+    mask[candidates] = [
+        vad.is_speech(pcm[offset:offset + frame_bytes], sample_rate, frame_size)
+        for offset in (candidates * frame_bytes).tolist()
+    ]
+    
+    if prefilter and hangover:
+        trailing = np.zeros_like(mask)
+        for k in range(1, min(hangover, len(mask) - 1) + 1):
+            trailing[k:] |= mask[:-k]
+        mask |= trailing & skipped
+    
+    return mask
+
+def split_speech(audio: np.ndarray, sample_rate: int, frame_duration: int = 30) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Split audio into (speech, non-speech) using WebRTC VAD.
+    If VAD finds no speech the (padded) audio is returned as speech and
+    the noise part is None.
+    """
+    # Frame size in samples
+    frame_size = int(sample_rate * frame_duration / 1000)
     
-    # Process frames
-    frames = []
-    for i in range(0, len(audio_int16), frame_size):
-        frame = audio_int16[i:i + frame_size]
-        if len(frame) == frame_size:
-            is_speech = vad.is_speech(frame.tobytes(), sample_rate)
-            if is_speech:
-                frames.append(audio[i:i + frame_size])
+    frames = frame_audio(audio, frame_size)
+    mask = speech_mask(frames, sample_rate)
     
-    if not frames:
+    if not mask.any():
         logger.warning("VAD removed all audio, returning original")
-        return audio
+        return frames.reshape(-1), None
     
-    return np.concatenate(frames)
+    noise = frames[~mask].reshape(-1) if not mask.all() else None
+    return frames[mask].reshape(-1), noise
+
+def remove_silence(audio: np.ndarray, sample_rate: int, frame_duration: int = 30) -> np.ndarray:
+    """
+    Remove silence using WebRTC VAD.
+    """
+    speech, _ = split_speech(audio, sample_rate, frame_duration)
+    return speech
@@ -0,0 +1,68 @@
+import logging
+from typing import Any, Dict
+import numpy as np
+from app.config import settings
+from app.services.filter import frame_audio, read_audio, speech_mask
+from app.services.resample import resample
+from app.services.metrics import GATE_CHECKS, stage_timer
+
+logger = logging.getLogger(__name__)
+
+# Rate the gate analyses at: the lowest rate WebRTC VAD accepts
+GATE_SAMPLE_RATE = 8000
+
+def check_silence(audio_data: bytes) -> Dict[str, Any]:
+    """
+    Cheap silence pre-gate that runs on raw upload bytes, before any
+    filtering or model loading.
+
+    Decodes the chunk, downmixes and decimates it to 8kHz, then measures
+    RMS energy and the fraction of 30ms frames WebRTC VAD marks as speech.
+    A chunk is silent when its energy is below settings.silence_gate_rms or
+    its speech-frame ratio is below settings.silence_gate_speech_ratio.
+
+    Returns:
+        Dict with "silent", "rms" and "speech_ratio"
+    """
+    with stage_timer("gate"):
+        data, sample_rate = read_audio(audio_data, dtype='float32')
+
+        # Convert to mono if stereo
+        if len(data.shape) > 1:
+            data = np.mean(data, axis=1)
+
+        data = resample(data, sample_rate, GATE_SAMPLE_RATE)
+
+        rms = float(np.sqrt(np.mean(data ** 2))) if len(data) else 0.0
+        speech_ratio = 0.0
+        if rms >= settings.silence_gate_rms:
+            frames = frame_audio(data, GATE_SAMPLE_RATE * 30 // 1000)
+            speech_ratio = float(speech_mask(frames, GATE_SAMPLE_RATE).mean())
+
+    silent = rms < settings.silence_gate_rms or speech_ratio < settings.silence_gate_speech_ratio
+
+    GATE_CHECKS.labels("skipped" if silent else "passed").inc()
+
+    return {"silent": silent, "rms": rms, "speech_ratio": speech_ratio}
+
+def is_chunk_silent(audio_data: bytes, chunk_number: int) -> bool:
+    """
+    Run the pre-gate if enabled. Decode errors are logged and let the chunk
+    through, so the full pipeline reports them as before.
+    """
+    if not settings.silence_gate_enabled:
+        return False
+
+    try:
+        result = check_silence(audio_data)
+    except Exception as e:
+        logger.warning(f"Silence gate failed for chunk {chunk_number}: {e}")
+        return False
+
+    if result["silent"]:
+        logger.info(
+            f"Chunk {chunk_number} gated as silent "
+            f"(rms {result['rms']:.4f}, speech {result['speech_ratio']:.0%})"
+        )
+
+    return result["silent"]
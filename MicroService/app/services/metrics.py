@@ -0,0 +1,199 @@
+import os
+import time
+from contextlib import contextmanager
+from typing import Tuple
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest
+)
+from prometheus_client import multiprocess
+from app.config import settings
+
+# Set by gunicorn.conf.py (or the environment) before this module is
+# imported; every process then writes its samples to files there and
+# /metrics aggregates them, whichever worker serves the scrape
+MULTIPROCESS_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+WAIT_BUCKETS = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+RTF_BUCKETS = (0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+STAGE_SECONDS = Histogram(
+    "transcription_stage_seconds",
+    "Wall time per chunk of each processing stage",
+    ["stage"],
+    buckets=STAGE_BUCKETS
+)
+QUEUE_WAIT_SECONDS = Histogram(
+    "transcription_queue_wait_seconds",
+    "Time from enqueue until a worker picks the chunk up",
+    buckets=WAIT_BUCKETS
+)
+MODEL_LOAD_SECONDS = Histogram(
+    "transcription_model_load_seconds",
+    "Whisper model load time",
+    buckets=STAGE_BUCKETS
+)
+REAL_TIME_FACTOR = Histogram(
+    "transcription_real_time_factor",
+    "Transcription wall time divided by the duration of the audio passed to Whisper",
+    buckets=RTF_BUCKETS
+)
+AUDIO_BYTES = Counter(
+    "transcription_audio_bytes",
+    "Encoded audio bytes decoded"
+)
+AUDIO_SECONDS = Counter(
+    "transcription_audio_seconds",
+    "Duration of the decoded audio"
+)
+CHUNKS = Counter(
+    "transcription_chunks",
+    "Chunks finished by the queue workers",
+    ["outcome"]
+)
+CHUNK_SECONDS = Histogram(
+    "transcription_chunk_seconds",
+    "Processing time of each chunk the queue workers finished, from pickup to delivery",
+    buckets=WAIT_BUCKETS
+)
+BATCH_SIZE = Histogram(
+    "transcription_batch_size",
+    "Chunks per micro-batch",
+    buckets=BATCH_BUCKETS
+)
+ADMISSION = Counter(
+    "transcription_admission",
+    "Admission decisions on /transcribe-chunk/async",
+    ["decision"]
+)
+# Memory queues are per worker and add up; the SQLite queue is shared,
+# so every worker reports the same depth
+QUEUE_DEPTH = Gauge(
+    "transcription_queue_depth",
+    "Tasks waiting in the queue",
+    multiprocess_mode="livesum" if settings.queue_backend == "memory" else "livemax"
+)
+# Sessions past settings.metrics_max_sessions share the "other" label
+SESSION_QUEUE_DEPTH = Gauge(
+    "transcription_session_queue_depth",
+    "Tasks waiting in the queue per session",
+    ["session"],
+    multiprocess_mode="livesum" if settings.queue_backend == "memory" else "livemax"
+)
+SESSION_CHUNKS = Counter(
+    "transcription_session_chunks",
+    "Chunks per session: enqueued, then processed, failed, rejected or dead_lettered",
+    ["session", "event"]
+)
+SESSION_QUEUE_WAIT_SECONDS = Histogram(
+    "transcription_session_queue_wait_seconds",
+    "Time from enqueue until a worker picks the chunk up, per session",
+    ["session"],
+    buckets=WAIT_BUCKETS
+)
+SESSION_LATENCY_SECONDS = Histogram(
+    "transcription_session_latency_seconds",
+    "Enqueue to completion of each processed chunk, per session",
+    ["session"],
+    buckets=WAIT_BUCKETS
+)
+# Raw audio held by memory queues, summed over workers
+QUEUE_BYTES = Gauge(
+    "transcription_queue_bytes",
+    "Encoded audio bytes waiting in memory queues",
+    multiprocess_mode="livesum"
+)
+
+STAGE_RETRIES = Counter(
+    "transcription_stage_retries",
+    "Retries of a failed chunk stage (filter, transcribe, deliver)",
+    ["stage"]
+)
+OUTBOX = Counter(
+    "transcription_outbox",
+    "Dead-letter outbox events (added, delivered, poisoned, dropped)",
+    ["event"]
+)
+# The outbox is one SQLite table shared by every worker
+OUTBOX_DEPTH = Gauge(
+    "transcription_outbox_depth",
+    "Undelivered transcripts waiting in the dead-letter outbox",
+    multiprocess_mode="livemax"
+)
+GATE_CHECKS = Counter(
+    "transcription_gate_checks",
+    "Silence pre-gate checks by result (passed, skipped)",
+    ["result"]
+)
+OUTBOX_POISONED = Gauge(
+    "transcription_outbox_poisoned",
+    "Poisoned transcripts kept in the dead-letter outbox (never re-sent)",
+    multiprocess_mode="livemax"
+)
+CACHE_LOOKUPS = Counter(
+    "transcription_cache_lookups",
+    "Transcript cache lookups by result",
+    ["result"]
+)
+CACHE_SAVED_SECONDS = Counter(
+    "transcription_cache_saved_seconds",
+    "Filter and transcription time the cache hits did not have to spend"
+)
+AUTOSCALER_WORKERS = Gauge(
+    "transcription_autoscaler_workers",
+    "Queue workers set by the autoscaler",
+    multiprocess_mode="livesum"
+)
+AUTOSCALER_MEMORY_CAP = Gauge(
+    "transcription_autoscaler_memory_cap",
+    "Most workers the available RAM allows",
+    multiprocess_mode="livemin"
+)
+AUTOSCALER_DECISIONS = Counter(
+    "transcription_autoscaler_decisions",
+    "Autoscaler decisions per interval",
+    ["action", "reason"]
+)
+
+# Sessions this process reports under their own label
+_session_labels: set = set()
+
+def session_label(session_id: str) -> str:
+    """
+    Label value for a session: its id for the first
+    settings.metrics_max_sessions sessions this process sees, "other"
+    after that, so a flood of session ids can't blow up the series count.
+    """
+    if session_id in _session_labels:
+        return session_id
+    if len(_session_labels) < settings.metrics_max_sessions:
+        _session_labels.add(session_id)
+        return session_id
+    return "other"
+
+@contextmanager
+def stage_timer(stage: str):
+    """Observe the wall time of the block as one sample of `stage`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(stage).observe(time.perf_counter() - start)
+
+def observe_stage(stage: str, seconds: float):
+    STAGE_SECONDS.labels(stage).observe(max(seconds, 0.0))
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Exposition text and content type, aggregated across processes if configured."""
+    if MULTIPROCESS_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
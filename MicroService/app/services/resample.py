@@ -0,0 +1,112 @@
+import math
+import logging
+from functools import lru_cache
+from typing import Tuple
+import numpy as np
+from scipy import signal
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=32)
+def _design(src_rate: int, dst_rate: int) -> Tuple[int, int, np.ndarray]:
+    """
+    Design the anti-aliasing FIR for a (src_rate, dst_rate) pair once.
+    Returns (up, down, taps); taps match resample_poly's default Kaiser design.
+    """
+    g = math.gcd(src_rate, dst_rate)
+    up, down = dst_rate // g, src_rate // g
+    max_rate = max(up, down)
+    half_len = 10 * max_rate
+    taps = signal.firwin(2 * half_len + 1, 1.0 / max_rate, window=('kaiser', 5.0))
+    taps.setflags(write=False)
+    logger.info(f"Designed {len(taps)}-tap polyphase filter for {src_rate}Hz -> {dst_rate}Hz ({up}/{down})")
+    return up, down, taps
+
+class StreamResampler:
+    """
+    Rational-ratio polyphase resampler that accepts input in pieces.
+
+    Input is processed in blocks that are a multiple of the decimation
+    factor, each with enough neighbouring samples on both sides to cover
+    the filter, so the concatenated output matches resampling the whole
+    signal at once while only one block is ever filtered at a time.
+    """
+
+    def __init__(self, src_rate: int, dst_rate: int, block_size: int = 0):
+        self.up, self.down, self.taps = _design(src_rate, dst_rate)
+        half_len = (len(self.taps) - 1) // 2
+
+        # Context (in input samples) on each side of a block; a multiple of
+        # down keeps every block's first output on the output sample grid
+        self._context = self._round_up(math.ceil(half_len / self.up) + 1)
+        self._block = self._round_up(block_size or src_rate)
+
+        # Leading zeros stand in for the signal before the stream starts
+        self._buffer = np.zeros(self._context)
+        self._start = self._context  # buffer index of the next unprocessed sample
+
+    def _round_up(self, n: int) -> int:
+        return -(-n // self.down) * self.down
+
+    def _filter(self, segment: np.ndarray, n_inputs: int) -> np.ndarray:
+        out = signal.resample_poly(segment, self.up, self.down, window=self.taps)
+        first = self._context * self.up // self.down
+        return out[first:first + -(-n_inputs * self.up // self.down)]
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """Feed input samples; returns every output sample that is now final."""
+        self._buffer = np.concatenate([self._buffer, samples])
+
+        outputs = []
+        while len(self._buffer) - self._start >= self._block + self._context:
+            segment = self._buffer[self._start - self._context:self._start + self._block + self._context]
+            outputs.append(self._filter(segment, self._block))
+            self._start += self._block
+
+        # Drop input that no future block needs as context
+        self._buffer = self._buffer[self._start - self._context:]
+        self._start = self._context
+
+        return np.concatenate(outputs) if outputs else np.zeros(0)
+
+    def flush(self) -> np.ndarray:
+        """Resample whatever input is left, zero-padding the end of the stream."""
+        remaining = len(self._buffer) - self._start
+        if remaining <= 0:
+            return np.zeros(0)
+
+        segment = np.concatenate([self._buffer[self._start - self._context:], np.zeros(self._context)])
+        self._buffer = self._buffer[:self._start]
+        return self._filter(segment, remaining)
+
+def resample(audio: np.ndarray, src_rate: int, dst_rate: int, block_size: int = None) -> np.ndarray:
+    """
+    Resample a whole signal with cached polyphase taps.
+
+    Inputs longer than block_size samples (settings.resample_block_seconds
+    of input by default) are processed block by block to bound peak memory.
+    """
+    if src_rate == dst_rate:
+        return audio
+
+    if block_size is None:
+        block_size = int(settings.resample_block_seconds * src_rate)
+
+    if not block_size or len(audio) <= block_size:
+        up, down, taps = _design(src_rate, dst_rate)
+        return signal.resample_poly(audio, up, down, window=taps)
+
+    resampler = StreamResampler(src_rate, dst_rate, block_size)
+    n_out = -(-len(audio) * resampler.up // resampler.down)
+    out = np.empty(n_out)
+
+    pos = 0
+    for start in range(0, len(audio), block_size):
+        chunk = resampler.process(audio[start:start + block_size])
+        out[pos:pos + len(chunk)] = chunk
+        pos += len(chunk)
+
+    tail = resampler.flush()
+    out[pos:pos + len(tail)] = tail
+    return out
@@ -0,0 +1,138 @@
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.config import settings
+from app.services.filter import frame_audio, speech_mask
+from app.services.resample import resample
+
+logger = logging.getLogger(__name__)
+
+# Rate and frame length the cut-point search runs VAD at
+SEGMENT_ANALYSIS_RATE = 16000
+SEGMENT_FRAME_MS = 30
+
+@dataclass
+class SessionState:
+    """Carry-over between consecutive chunks of one recording session."""
+    tail: Optional[np.ndarray] = None
+    tail_rate: int = 0
+    tail_chunk: int = 0
+    tail_time: str = ""
+    tail_filename: str = "audio"
+    last_chunk: int = 0
+    last_text: str = ""
+    updated: float = 0.0
+
+@dataclass
+class PendingTail:
+    """A held-back tail whose session went quiet; transcribed on its own."""
+    session_id: str
+    audio: np.ndarray
+    sample_rate: int
+    chunk_number: int
+    time: str
+    filename: str
+
+_sessions: Dict[str, SessionState] = {}
+
+def find_cut(audio: np.ndarray, sample_rate: int) -> int:
+    """
+    Index to cut a chunk at so that speech running into its end is held
+    back: the middle of the last pause of at least segmenter_min_gap_ms
+    within the final segmenter_tail_seconds. Returns len(audio) (keep
+    everything) when that window has no pause or the chunk ends in one.
+    """
+    window = int(settings.segmenter_tail_seconds * sample_rate)
+    start = max(0, len(audio) - window)
+
+    analysed = resample(audio[start:], sample_rate, SEGMENT_ANALYSIS_RATE)
+    frame_size = SEGMENT_ANALYSIS_RATE * SEGMENT_FRAME_MS // 1000
+    if len(analysed) < frame_size:
+        return len(audio)
+
+    mask = speech_mask(frame_audio(analysed, frame_size), SEGMENT_ANALYSIS_RATE)
+    if not mask[-1:].any():
+        # Chunk already ends in a pause, nothing straddles the boundary
+        return len(audio)
+
+    min_gap = max(1, settings.segmenter_min_gap_ms // SEGMENT_FRAME_MS)
+    run_end = len(mask)
+    for i in range(len(mask) - 1, -1, -1):
+        if mask[i]:
+            run_end = i
+            continue
+        if i == 0 or mask[i - 1]:
+            # Pause spans frames [i, run_end)
+            if run_end - i >= min_gap:
+                middle = (i + run_end) / 2 * SEGMENT_FRAME_MS / 1000
+                return start + int(middle * sample_rate)
+
+    return len(audio)
+
+def split_chunk(
+    session_id: str,
+    chunk_number: int,
+    audio: np.ndarray,
+    sample_rate: int,
+    time_str: str,
+    filename: str = "audio"
+) -> Tuple[np.ndarray, str]:
+    """
+    Merge the session's held-back tail in front of this chunk and hold
+    back a new tail from its end.
+
+    Returns (audio to transcribe now, previous transcript for Whisper's
+    initial_prompt). Chunks that arrive after a later chunk of the same
+    session are passed through unchanged.
+    """
+    state = _sessions.setdefault(session_id, SessionState())
+    state.updated = time.monotonic()
+
+    if chunk_number <= state.last_chunk:
+        return audio, state.last_text
+
+    if state.tail is not None:
+        tail = state.tail if state.tail_rate == sample_rate else resample(state.tail, state.tail_rate, sample_rate)
+        audio = np.concatenate([tail, audio])
+        logger.info(f"Session {session_id}: merged {len(tail) / sample_rate:.2f}s tail into chunk {chunk_number}")
+        state.tail = None
+
+    cut = find_cut(audio, sample_rate)
+    if cut < len(audio):
+        state.tail = audio[cut:]
+        state.tail_rate = sample_rate
+        state.tail_chunk = chunk_number
+        state.tail_time = time_str
+        state.tail_filename = filename
+
+    state.last_chunk = chunk_number
+    return audio[:cut], state.last_text
+
+def record_transcript(session_id: str, text: str):
+    """Keep the end of the latest transcript as the next chunk's prompt."""
+    state = _sessions.get(session_id)
+    if state is not None and text:
+        state.last_text = text[-settings.segmenter_prompt_chars:]
+
+def take_expired_tails(max_age: float) -> List[PendingTail]:
+    """
+    Remove and return tails whose session has sent nothing for max_age
+    seconds. Sessions idle for much longer are forgotten.
+    """
+    now = time.monotonic()
+    expired = []
+
+    for session_id, state in list(_sessions.items()):
+        idle = now - state.updated
+        if state.tail is not None and idle >= max_age:
+            expired.append(PendingTail(
+                session_id, state.tail, state.tail_rate,
+                state.tail_chunk, state.tail_time, state.tail_filename
+            ))
+            state.tail = None
+        elif state.tail is None and idle >= max_age * 20:
+            del _sessions[session_id]
+
+    return expired
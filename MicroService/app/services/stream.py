@@ -0,0 +1,156 @@
+import logging
+from collections import deque
+from dataclasses import dataclass
+from typing import List, Optional
+import numpy as np
+from app.config import settings
+from app.services.filter import frame_audio, speech_mask
+from app.services.resample import StreamResampler
+
+logger = logging.getLogger(__name__)
+
+# WebRTC VAD frame length used for streaming segmentation
+STREAM_FRAME_MS = 30
+
+@dataclass
+class Utterance:
+    """A run of speech cut from a stream; start/end are seconds from stream start."""
+    index: int
+    start: float
+    end: float
+    audio: np.ndarray
+
+class UtteranceSegmenter:
+    """
+    Incremental VAD segmenter for a live PCM stream.
+
+    Input is resampled to settings.sample_rate and classified in 30ms
+    frames as it arrives. An utterance opens on the first speech frame
+    (with stream_pre_roll_ms of the audio before it) and closes after
+    stream_silence_ms of non-speech, or when it reaches
+    stream_max_utterance_seconds so it stays within Whisper's window.
+    Utterances with less than stream_min_speech_ms of speech are dropped.
+    """
+
+    def __init__(self, input_rate: int):
+        self.sample_rate = settings.sample_rate
+        self.frame_size = self.sample_rate * STREAM_FRAME_MS // 1000
+        self._resampler = StreamResampler(input_rate, self.sample_rate) if input_rate != self.sample_rate else None
+
+        self._silence_frames = max(1, settings.stream_silence_ms // STREAM_FRAME_MS)
+        self._min_speech_frames = max(1, settings.stream_min_speech_ms // STREAM_FRAME_MS)
+        self._max_frames = int(settings.stream_max_utterance_seconds * 1000 // STREAM_FRAME_MS)
+
+        # Frames of context kept before and after each utterance
+        self._pad_frames = max(0, settings.stream_pre_roll_ms // STREAM_FRAME_MS)
+
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._pre_roll = deque(maxlen=self._pad_frames)
+        self._frames: List[np.ndarray] = []  # frames of the open utterance
+        self._speech_frames = 0
+        self._silence_run = 0
+        self._start_frame = 0
+        self._frame_count = 0  # frames classified so far
+        self._count = 0  # utterances emitted
+
+    @property
+    def in_utterance(self) -> bool:
+        return bool(self._frames)
+
+    @property
+    def next_index(self) -> int:
+        """Index the open (or next) utterance will get."""
+        return self._count + 1
+
+    @property
+    def current_start(self) -> float:
+        """Start of the open utterance in seconds from stream start."""
+        return self._start_frame * STREAM_FRAME_MS / 1000
+
+    def current_audio(self) -> Optional[np.ndarray]:
+        """Audio of the open utterance so far (for partial transcripts)."""
+        return np.concatenate(self._frames) if self._frames else None
+
+    def feed(self, samples: np.ndarray) -> List[Utterance]:
+        """Add float samples at the input rate; returns utterances that closed."""
+        if self._resampler is not None:
+            samples = self._resampler.process(samples)
+
+        self._pending = np.concatenate([self._pending, samples.astype(np.float32, copy=False)])
+        n_frames = len(self._pending) // self.frame_size
+        if not n_frames:
+            return []
+
+        frames = frame_audio(self._pending[:n_frames * self.frame_size], self.frame_size)
+        self._pending = self._pending[n_frames * self.frame_size:]
+
+        # Hangover is handled by the silence run below
+        mask = speech_mask(frames, self.sample_rate, settings.stream_vad_aggressiveness, hangover=0)
+
+        closed = []
+        for frame, is_speech in zip(frames, mask.tolist()):
+            utterance = self._step(frame, is_speech)
+            if utterance is not None:
+                closed.append(utterance)
+        return closed
+
+    def _step(self, frame: np.ndarray, is_speech: bool) -> Optional[Utterance]:
+        self._frame_count += 1
+
+        if not self._frames:
+            if not is_speech:
+                self._pre_roll.append(frame)
+                return None
+            self._frames = list(self._pre_roll) + [frame]
+            self._start_frame = self._frame_count - len(self._frames)
+            self._pre_roll.clear()
+            self._speech_frames = 1
+            self._silence_run = 0
+            return None
+
+        self._frames.append(frame)
+        if is_speech:
+            self._speech_frames += 1
+            self._silence_run = 0
+        else:
+            self._silence_run += 1
+
+        if self._silence_run >= self._silence_frames or len(self._frames) >= self._max_frames:
+            return self._close()
+        return None
+
+    def _close(self) -> Optional[Utterance]:
+        # Keep a little trailing silence, drop the rest of the closing run
+        keep = len(self._frames) - max(0, self._silence_run - self._pad_frames)
+        frames, speech_frames = self._frames[:keep], self._speech_frames
+        start_frame = self._start_frame
+
+        self._frames = []
+        self._speech_frames = 0
+        self._silence_run = 0
+
+        if speech_frames < self._min_speech_frames:
+            return None
+
+        self._count += 1
+        frame_seconds = STREAM_FRAME_MS / 1000
+        return Utterance(
+            index=self._count,
+            start=start_frame * frame_seconds,
+            end=(start_frame + len(frames)) * frame_seconds,
+            audio=np.concatenate(frames)
+        )
+
+    def flush(self) -> List[Utterance]:
+        """End of stream: close the open utterance, if any."""
+        closed = []
+        if self._resampler is not None:
+            tail = self._resampler.flush()
+            self._resampler = None
+            closed = self.feed(tail)
+
+        if self._frames:
+            utterance = self._close()
+            if utterance is not None:
+                closed.append(utterance)
+        return closed
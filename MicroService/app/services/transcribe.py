@@ -1,48 +1,113 @@
 
 import logging
 import asyncio
-import io
+import gc
 import tempfile
 import os
-from typing import Dict, Any, Optional
-import whisper
+from typing import Dict, Any, List, Optional, Union
 import numpy as np
-import soundfile as sf
 from app.config import settings
+from app.services.asr import (
+    TranscriptionBackend, configure_torch_threads, inference_concurrency, load_backend, max_inference_concurrency
+)
+from app.services.engine import InferenceEngine, create_engine, timed_inference
+from app.services.filter import read_audio
+from app.services.metrics import REAL_TIME_FACTOR
 
 logger = logging.getLogger(__name__)
 
-# Global model cache to avoid reloading
-_whisper_model = None
+# Global model cache to avoid reloading (a TranscriptionBackend)
+_whisper_model: Optional[TranscriptionBackend] = None
 _model_lock = asyncio.Lock()
+_engine: Optional[InferenceEngine] = None
+# Set when the model was preloaded without its warmup decode
+_warmup_pending = False
 
-async def get_whisper_model():
+async def get_whisper_model() -> TranscriptionBackend:
     """
-    Load and cache Whisper model.
-    Thread-safe singleton pattern for model loading.
+    Load and cache the Whisper model with settings.transcription_backend.
+    Thread-safe singleton pattern for model loading. A preloaded model
+    gets its warmup decode here, in the worker, on the first call.
     """
-    global _whisper_model
+    global _whisper_model, _warmup_pending
     
     async with _model_lock:
         if _whisper_model is None:
-            logger.info(f"Loading Whisper model: {settings.whisper_model}")
-            
-            def _load_model():
-                return whisper.load_model(settings.whisper_model)
-            
-            _whisper_model = await asyncio.to_thread(_load_model)
+            logger.info(f"Loading Whisper model: {settings.whisper_model} ({settings.transcription_backend})")
+            threads = configure_torch_threads(inference_concurrency())
+            _whisper_model = await asyncio.to_thread(
+                load_backend, settings.whisper_model, None, threads, concurrency=max_inference_concurrency()
+            )
             logger.info(f"Whisper model '{settings.whisper_model}' loaded successfully")
+        elif _warmup_pending:
+            _warmup_pending = False
+            logger.info(f"Warmup decode took {await asyncio.to_thread(_whisper_model.warmup):.2f}s")
+    
+    return _whisper_model
+
+def preload_whisper_model():
+    """
+    Load the Whisper model synchronously at import time.
+    
+    With gunicorn's preload_app the app is imported in the master, so the
+    weights are loaded once and forked workers share the pages copy-on-write
+    instead of each loading its own copy on the first request.
+    
+    No warmup decode runs here: it would start torch's (or CTranslate2's)
+    thread pools in a process that is about to fork. With model_warmup,
+    each worker warms up on its first get_whisper_model() instead, which
+    ThreadEngine.start() calls at startup.
+    """
+    global _whisper_model, _warmup_pending
+    
+    if _whisper_model is not None:
+        return _whisper_model
+    
+    logger.info(f"Preloading Whisper model: {settings.whisper_model} ({settings.transcription_backend})")
+    threads = configure_torch_threads(inference_concurrency())
+    _whisper_model = load_backend(
+        settings.whisper_model, None, threads, warmup=False, concurrency=max_inference_concurrency()
+    )
+    _warmup_pending = settings.model_warmup
     
+    # Move everything allocated so far out of the GC's reach so collections
+    # in the workers don't write to (and un-share) the preloaded objects
+    gc.freeze()
+    
+    logger.info(f"Whisper model '{settings.whisper_model}' preloaded")
     return _whisper_model
 
-def is_audio_silent(audio_data: bytes, threshold: float = 0.01) -> bool:
+def get_engine() -> InferenceEngine:
+    """
+    Return the inference engine selected by settings.inference_engine.
+    """
+    global _engine
+    
+    if _engine is None:
+        _engine = create_engine(get_whisper_model)
+    
+    return _engine
+
+async def start_engine():
+    """Start the inference engine (spawns inference processes if configured)."""
+    await get_engine().start()
+
+async def stop_engine():
+    """Stop the inference engine."""
+    if _engine is not None:
+        await _engine.stop()
+
+def is_audio_silent(audio_data: Union[bytes, np.ndarray], threshold: float = 0.01) -> bool:
     """
     Check if audio is silent or unusable.
     Returns True if audio energy is below threshold.
+    Accepts encoded audio bytes or an already decoded sample array.
     """
     try:
-        audio_io = io.BytesIO(audio_data)
-        data, _ = sf.read(audio_io)
+        if isinstance(audio_data, np.ndarray):
+            data = audio_data
+        else:
+            data, _ = read_audio(audio_data)
         
         # Convert to mono if stereo
         if len(data.shape) > 1:
@@ -57,19 +122,24 @@ def is_audio_silent(audio_data: bytes, threshold: float = 0.01) -> bool:
         return False
 
 async def transcribe_audio_chunk(
-    audio_data: bytes,
+    audio_data: Union[bytes, np.ndarray],
     chunk_number: int,
     timestamp: str,
-    skip_if_silent: bool = True
+    skip_if_silent: bool = True,
+    initial_prompt: Optional[str] = None
 ) -> Dict[str, Any]:
     """
-    Transcribe audio chunk using local Whisper model.
+    Transcribe audio chunk using the local Whisper model
+    (settings.transcription_backend).
     
     Args:
-        audio_data: Raw audio bytes (WAV format expected)
+        audio_data: Raw audio bytes (WAV format expected) or a float32
+            16kHz mono array from filter_audio_array
         chunk_number: Chunk sequence number
         timestamp: ISO or Unix timestamp
         skip_if_silent: If True, skip silent audio
+        initial_prompt: Text conditioning the decode, e.g. the previous
+            chunk's transcript
     
     Returns:
         Dict with transcription result or skip status
@@ -85,11 +155,16 @@ async def transcribe_audio_chunk(
                 "status": "skipped"
             }
         
-        # Load model
-        model = await get_whisper_model()
+        decode_options = {
+            "language": settings.whisper_language if settings.whisper_language != "auto" else None,
+            "fp16": False,  # Use FP32 for CPU compatibility
+            "verbose": False
+        }
+        if initial_prompt:
+            decode_options["initial_prompt"] = initial_prompt
         
         # Transcribe in thread pool (Whisper is CPU-intensive)
-        def _transcribe():
+        def _transcribe(backend):
             # Write audio to temporary file (Whisper expects file path)
             with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_file:
                 tmp_file.write(audio_data)
@@ -97,12 +172,7 @@ async def transcribe_audio_chunk(
             
             try:
                 # Transcribe with Whisper
-                result = model.transcribe(
-                    tmp_path,
-                    language=settings.whisper_language if settings.whisper_language != "auto" else None,
-                    fp16=False,  # Use FP32 for CPU compatibility
-                    verbose=False
-                )
+                result = backend.transcribe(tmp_path, decode_options)
                 
                 return result
             finally:
@@ -112,9 +182,18 @@ async def transcribe_audio_chunk(
         
         import time
         start_time = time.time()
-        result = await asyncio.to_thread(_transcribe)
+        if isinstance(audio_data, np.ndarray):
+            # In-memory path: no temp file, no ffmpeg decode
+            result = await get_engine().transcribe(audio_data, decode_options)
+        else:
+            queued = time.perf_counter()
+            model = await get_whisper_model()
+            result = await asyncio.to_thread(timed_inference, queued, _transcribe, model)
         duration = time.time() - start_time
         
+        if isinstance(audio_data, np.ndarray) and len(audio_data):
+            REAL_TIME_FACTOR.observe(duration / (len(audio_data) / settings.sample_rate))
+        
         # Extract clean text
         text = result["text"].strip()
         
@@ -131,7 +210,29 @@ async def transcribe_audio_chunk(
         logger.error(f"Transcription failed for chunk {chunk_number}: {str(e)}")
         raise
 
-async def transcribe_audio(audio_data: bytes) -> str:
+async def transcribe_batch(audio_arrays: List[np.ndarray]) -> List[Dict[str, Any]]:
+    """
+    Transcribe several in-memory chunks with a single batched Whisper pass.
+    
+    Each float32 16kHz array is padded to Whisper's 30s window, the log-mel
+    spectrograms are stacked and the encoder/decoder run once over the batch.
+    Arrays longer than one window fall back to model.transcribe.
+    
+    Returns:
+        One dict per input with "text" and "duration" (batch wall time)
+    """
+    language = settings.whisper_language if settings.whisper_language != "auto" else None
+    
+    import time
+    start_time = time.time()
+    texts = await get_engine().transcribe_batch(audio_arrays, language)
+    duration = time.time() - start_time
+    
+    logger.info(f"Batch of {len(audio_arrays)} chunks transcribed in {duration:.2f}s")
+    
+    return [{"text": text.strip(), "duration": duration} for text in texts]
+
+async def transcribe_audio(audio_data: Union[bytes, np.ndarray]) -> str:
     """
     Legacy interface for backward compatibility.
     Returns only the transcribed text.
@@ -0,0 +1,140 @@
+"""
+Overload /transcribe-chunk/async and check that admission control holds.
+
+Posts the sample chunks at --rate requests/s for --duration seconds from
+--devices simulated pendants (one session_id each), well beyond what the
+service can transcribe. It reports response codes and response latency.
+For 429s it also reports the Retry-After values. With --pid (the service
+or gunicorn master pid, Linux only) it samples the resident memory of that
+process and its children every second.
+
+Without admission control, requests block on the full queue and latency
+and RSS climb until the gunicorn timeout. With it, every response should
+come back in milliseconds and RSS should level off. Start the service
+first (uvicorn app.main:app).
+
+Usage:
+    python -m benchmarks.bench_admission [--url http://localhost:8000] [--rate 50] [--duration 60] [--pid PID]
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import statistics
+import time
+from collections import Counter
+from pathlib import Path
+from typing import List, Optional
+
+import httpx
+
+from benchmarks.common import load_samples, print_table
+
+def tree_rss_mb(pid: int) -> float:
+    """Resident memory of pid and its direct children, in MB."""
+    pids = [pid]
+    children = Path(f"/proc/{pid}/task/{pid}/children")
+    if children.exists():
+        pids += [int(p) for p in children.read_text().split()]
+
+    total_kb = 0
+    for p in pids:
+        try:
+            for line in Path(f"/proc/{p}/status").read_text().splitlines():
+                if line.startswith("VmRSS:"):
+                    total_kb += int(line.split()[1])
+        except FileNotFoundError:
+            continue
+    return total_kb / 1024
+
+def percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+async def run(url: str, rate: float, duration: float, devices: int, pid: Optional[int]):
+    samples = load_samples()
+    statuses: Counter = Counter()
+    latencies = {"accepted": [], "rejected": []}
+    retry_afters: List[int] = []
+    rss: List[float] = []
+
+    async def post(client: httpx.AsyncClient, n: int, name: str, data: bytes):
+        started = time.perf_counter()
+        try:
+            response = await client.post(
+                f"{url}/transcribe-chunk/async",
+                files={"audio_file": (name, data, "audio/mpeg")},
+                data={
+                    "chunk_number": str(n // devices + 1),
+                    "time": "2026-01-13T10:30:00Z",
+                    "session_id": f"device-{n % devices}"
+                }
+            )
+        except httpx.HTTPError as e:
+            statuses[type(e).__name__] += 1
+            return
+
+        elapsed = (time.perf_counter() - started) * 1000
+        statuses[response.status_code] += 1
+        if response.status_code == 429:
+            latencies["rejected"].append(elapsed)
+            retry_afters.append(int(response.headers.get("Retry-After", 0)))
+        else:
+            latencies["accepted"].append(elapsed)
+
+    async def sample_memory():
+        while True:
+            rss.append(tree_rss_mb(pid))
+            await asyncio.sleep(1.0)
+
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=100)
+    async with httpx.AsyncClient(timeout=150.0, limits=limits) as client:
+        monitor = asyncio.create_task(sample_memory()) if pid else None
+        started = time.perf_counter()
+        requests = []
+
+        for n, (name, data) in enumerate(itertools.cycle(samples)):
+            due = started + n / rate
+            if due - started >= duration:
+                break
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+            requests.append(asyncio.create_task(post(client, n, name, data)))
+
+        await asyncio.gather(*requests)
+        if monitor:
+            monitor.cancel()
+
+    rows = []
+    for status, count in sorted(statuses.items(), key=lambda item: str(item[0])):
+        key = "rejected" if status == 429 else "accepted"
+        timings = latencies[key] if isinstance(status, int) else []
+        rows.append([
+            status, count,
+            f"{statistics.median(timings):.0f}" if timings else "-",
+            f"{percentile(timings, 0.95):.0f}" if timings else "-",
+            f"{max(timings):.0f}" if timings else "-"
+        ])
+    print_table(["status", "count", "p50 ms", "p95 ms", "max ms"], rows)
+
+    if retry_afters:
+        print(f"\nRetry-After: min {min(retry_afters)}s, median {statistics.median(retry_afters):.0f}s, max {max(retry_afters)}s")
+    if rss:
+        print(f"Service RSS: start {rss[0]:.0f} MB, peak {max(rss):.0f} MB, end {rss[-1]:.0f} MB")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--rate", type=float, default=50.0, help="requests per second")
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds")
+    parser.add_argument("--devices", type=int, default=10)
+    parser.add_argument("--pid", type=int, default=None, help="service pid to sample RSS from")
+    args = parser.parse_args()
+
+    if args.pid and not os.path.exists(f"/proc/{args.pid}"):
+        raise SystemExit(f"No process {args.pid} (RSS sampling needs Linux /proc)")
+
+    print(f"Posting {args.rate:g} req/s for {args.duration:g}s from {args.devices} devices\n")
+    asyncio.run(run(args.url.rstrip("/"), args.rate, args.duration, args.devices, args.pid))
+
+if __name__ == "__main__":
+    main()
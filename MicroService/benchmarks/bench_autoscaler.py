@@ -0,0 +1,209 @@
+"""
+Drive the autoscaler's ScalingPolicy with a synthetic load and compare it
+against fixed worker counts and the old CPU-threshold rule.
+
+The service is simulated in 0.1s steps, with no model and no server:
+
+- Chunks of --chunk-seconds arrive following a load profile: quiet,
+  overload, moderate, idle (--profile "seconds:chunks_per_s,...").
+- One chunk alone takes chunk_seconds * --rtf to transcribe. Busy
+  workers share --cores, so with k busy workers each runs at
+  min(1, cores / k) speed and throughput saturates at the core count.
+- Each worker is one model copy of --model-mb (process engine). A new
+  worker only starts taking chunks after --load-seconds of model load.
+- The old rule (scale_workers.sh) adds a worker every 30s while CPU is
+  above 80% and removes one below 20%. Torch's intra-op threads keep CPU
+  near 100% whenever any chunk is running, so it scales to the maximum
+  under any load.
+
+The table reports queue wait, the deepest backlog, worker counts and
+peak model memory for each strategy; --timeline prints the autoscaler's
+decisions as they happen.
+
+Usage:
+    python -m benchmarks.bench_autoscaler [--cores 4] [--max-workers 8] [--timeline]
+"""
+import argparse
+import math
+import statistics
+from collections import deque
+from typing import Callable, List, Optional, Tuple
+
+from app.queue.autoscaler import Observation, ScalingPolicy
+from benchmarks.common import print_table
+
+DT = 0.1
+
+def parse_profile(spec: str) -> List[Tuple[float, float]]:
+    return [tuple(float(x) for x in phase.split(":")) for phase in spec.split(",")]
+
+class SimulatedService:
+    def __init__(self, args, workers: int):
+        self.args = args
+        self.work = args.chunk_seconds * args.rtf  # seconds of one chunk on all cores
+        self.queue: deque = deque()  # arrival times
+        self.slots: List[dict] = []
+        self.waits: List[float] = []
+        self.depths: List[int] = []
+        self.completed = 0
+        self.interval = {"wait_sum": 0.0, "dequeued": 0, "completed": 0, "rtf_sum": 0.0, "rtf_count": 0}
+        self.resize(workers, 0.0)
+
+    @property
+    def workers(self) -> int:
+        return sum(1 for slot in self.slots if not slot["retiring"])
+
+    def resize(self, count: int, now: float):
+        active = [slot for slot in self.slots if not slot["retiring"]]
+        for _ in range(count - len(active)):
+            self.slots.append({"ready_at": now + self.args.load_seconds, "task": None, "retiring": False})
+        # Retire idle workers first; busy ones finish their chunk
+        for slot in sorted(active, key=lambda s: s["task"] is not None)[:max(0, len(active) - count)]:
+            slot["retiring"] = True
+
+    def step(self, now: float, arrivals: float):
+        for _ in range(arrivals):
+            self.queue.append(now)
+
+        for slot in self.slots:
+            if slot["task"] is None and not slot["retiring"] and now >= slot["ready_at"] and self.queue:
+                arrived = self.queue.popleft()
+                self.waits.append(now - arrived)
+                self.interval["wait_sum"] += now - arrived
+                self.interval["dequeued"] += 1
+                slot["task"] = {"left": self.work, "started": now}
+
+        busy = [slot for slot in self.slots if slot["task"] is not None]
+        speed = min(1.0, self.args.cores / len(busy)) if busy else 0.0
+        for slot in busy:
+            slot["task"]["left"] -= DT * speed
+            if slot["task"]["left"] <= 0:
+                elapsed = now + DT - slot["task"]["started"]
+                self.interval["rtf_sum"] += elapsed / self.args.chunk_seconds
+                self.interval["rtf_count"] += 1
+                self.interval["completed"] += 1
+                self.completed += 1
+                slot["task"] = None
+
+        self.slots = [slot for slot in self.slots if not (slot["retiring"] and slot["task"] is None)]
+        self.depths.append(len(self.queue))
+
+    def observe(self, interval: float) -> Observation:
+        stats, self.interval = self.interval, {k: 0 for k in self.interval}
+        used = len(self.slots) * self.args.model_mb
+        return Observation(
+            workers=self.workers,
+            queue_depth=len(self.queue),
+            queue_wait=stats["wait_sum"] / stats["dequeued"] if stats["dequeued"] else 0.0,
+            completed=stats["completed"],
+            interval=interval,
+            rtf=stats["rtf_sum"] / stats["rtf_count"] if stats["rtf_count"] else None,
+            available_mb=self.args.ram_mb - used
+        )
+
+def cpu_rule(args) -> Callable[[SimulatedService, Observation, float], Optional[int]]:
+    """scale_workers.sh: +1 above 80% CPU, -1 below 20%, every 30s."""
+    last = [-math.inf]
+
+    def decide(service: SimulatedService, obs: Observation, now: float) -> Optional[int]:
+        if now - last[0] < 30:
+            return None
+        last[0] = now
+        cpu = 100.0 if any(slot["task"] for slot in service.slots) else 0.0
+        if cpu > 80 and obs.workers < args.max_workers:
+            return obs.workers + 1
+        if cpu < 20 and obs.workers > args.min_workers:
+            return obs.workers - 1
+        return None
+    return decide
+
+def policy_rule(args, timeline: bool) -> Callable[[SimulatedService, Observation, float], Optional[int]]:
+    policy = ScalingPolicy(
+        min_workers=args.min_workers,
+        max_workers=args.max_workers,
+        target_wait=args.target_wait,
+        cooldown=args.cooldown,
+        model_memory_mb=args.model_mb,
+        reserve_mb=args.reserve_mb
+    )
+
+    def decide(service: SimulatedService, obs: Observation, now: float) -> Optional[int]:
+        decision = policy.decide(obs, now)
+        if timeline and decision.action != "hold":
+            rtf = f"{obs.rtf:.2f}" if obs.rtf is not None else "-"
+            print(f"[{now:6.0f}s] {obs.workers} -> {decision.workers} workers ({decision.reason}; "
+                  f"depth {obs.queue_depth}, wait {obs.queue_wait:.1f}s, rtf {rtf})")
+        return decision.workers
+    return decide
+
+def simulate(args, initial: int, rule=None) -> List[object]:
+    service = SimulatedService(args, initial)
+    profile = parse_profile(args.profile)
+    now, credit = 0.0, 0.0
+    worker_samples, peak_copies = [], 0
+
+    for duration, rate in profile:
+        end = now + duration
+        while now < end:
+            credit += rate * DT
+            arrivals = int(credit)
+            credit -= arrivals
+            service.step(now, arrivals)
+            now += DT
+
+            worker_samples.append(service.workers)
+            peak_copies = max(peak_copies, len(service.slots))
+            if rule and round(now / DT) % round(args.interval / DT) == 0:
+                target = rule(service, service.observe(args.interval), now)
+                if target is not None and target != service.workers:
+                    service.resize(target, now)
+
+    waits = sorted(service.waits) or [0.0]
+    return [
+        f"{statistics.mean(waits):.1f}",
+        f"{waits[int(0.95 * (len(waits) - 1))]:.1f}",
+        max(service.depths),
+        f"{statistics.mean(worker_samples):.1f}",
+        max(worker_samples),
+        f"{peak_copies * args.model_mb / 1024:.1f}",
+        f"{service.completed}/{service.completed + len(service.queue) + sum(1 for s in service.slots if s['task'])}"
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", default="120:0.1,300:1.2,180:0.4,300:0.02",
+                        help="phases as seconds:chunks_per_second")
+    parser.add_argument("--cores", type=int, default=4)
+    parser.add_argument("--chunk-seconds", type=float, default=10.0)
+    parser.add_argument("--rtf", type=float, default=0.25, help="real-time factor of one chunk on an idle machine")
+    parser.add_argument("--load-seconds", type=float, default=5.0, help="model load time of a new worker")
+    parser.add_argument("--model-mb", type=float, default=600.0)
+    parser.add_argument("--ram-mb", type=float, default=6144.0)
+    parser.add_argument("--reserve-mb", type=float, default=512.0)
+    parser.add_argument("--min-workers", type=int, default=1)
+    parser.add_argument("--max-workers", type=int, default=8)
+    parser.add_argument("--interval", type=float, default=10.0)
+    parser.add_argument("--target-wait", type=float, default=30.0)
+    parser.add_argument("--cooldown", type=float, default=30.0)
+    parser.add_argument("--timeline", action="store_true")
+    args = parser.parse_args()
+
+    rows = [
+        [f"fixed {args.min_workers}", *simulate(args, args.min_workers)],
+        [f"fixed {args.cores}", *simulate(args, args.cores)],
+        [f"fixed {args.max_workers}", *simulate(args, args.max_workers)],
+        ["cpu threshold", *simulate(args, args.min_workers, cpu_rule(args))]
+    ]
+    if args.timeline:
+        print("Autoscaler decisions:")
+    rows.append(["autoscaler", *simulate(args, args.min_workers, policy_rule(args, args.timeline))])
+    if args.timeline:
+        print()
+
+    print_table(
+        ["strategy", "mean wait s", "p95 wait s", "max depth", "mean workers", "peak workers", "peak model GB", "done"],
+        rows
+    )
+
+if __name__ == "__main__":
+    main()
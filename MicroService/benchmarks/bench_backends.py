@@ -0,0 +1,127 @@
+"""
+Real-time factor, memory and WER of each transcription backend and model size.
+
+Every --backends x --models combination runs in a fresh subprocess, so
+memory figures belong to that model alone. The child loads the model
+with load_backend, runs filter_audio_array over the samples up front,
+then transcribes each filtered chunk and reports:
+
+- load: model load time
+- RTF: total transcription time / total duration of the filtered audio
+- RSS: resident memory after the model is loaded, and the peak over the run
+- WER against --references, a JSON file mapping sample filename to its
+  reference transcript. Without references, the transcripts of the first
+  combination serve as the reference, so WER reads as drift from it.
+
+Usage:
+    python -m benchmarks.bench_backends [--backends whisper faster-whisper]
+        [--models tiny base small] [--references refs.json] [--limit 10]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+from benchmarks.common import load_references, load_samples, print_table, word_error_rate
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+def run_child(backend_name: str, model_name: str, limit: int):
+    """Measure one combination and print the results as JSON on the last line."""
+    from app.config import settings
+    from app.services.asr import load_backend
+    from app.services.filter import filter_audio_array
+
+    samples = load_samples()[:limit or None]
+    filtered = [(name, filter_audio_array(data, name)) for name, data in samples]
+
+    start = time.perf_counter()
+    backend = load_backend(model_name, backend_name)
+    load_seconds = time.perf_counter() - start
+    loaded_rss = rss_mb()
+
+    language = settings.whisper_language if settings.whisper_language != "auto" else None
+    transcripts = {}
+    busy = 0.0
+    audio_seconds = 0.0
+    for name, audio in filtered:
+        start = time.perf_counter()
+        transcripts[name] = backend.transcribe(audio, {"language": language, "fp16": False, "verbose": False})["text"].strip()
+        busy += time.perf_counter() - start
+        audio_seconds += len(audio) / settings.sample_rate
+
+    print(json.dumps({
+        "load_seconds": load_seconds,
+        "rtf": busy / audio_seconds if audio_seconds else 0.0,
+        "loaded_rss_mb": loaded_rss,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "transcripts": transcripts
+    }))
+
+def measure(backend_name: str, model_name: str, limit: int) -> dict:
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_backends", "--child", backend_name, model_name, "--limit", str(limit)],
+        capture_output=True,
+        text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"{backend_name}/{model_name} failed:\n{completed.stderr[-2000:]}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["whisper", "faster-whisper"])
+    parser.add_argument("--models", nargs="+", default=["tiny", "base", "small"])
+    parser.add_argument("--references")
+    parser.add_argument("--limit", type=int, default=0, help="use only the first N samples (0 = all)")
+    parser.add_argument("--child", nargs=2, metavar=("BACKEND", "MODEL"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child, args.limit)
+        return
+
+    references = load_references(args.references)
+    results = {}
+    for model_name in args.models:
+        for backend_name in args.backends:
+            print(f"Measuring {backend_name} / {model_name}...", flush=True)
+            try:
+                results[(backend_name, model_name)] = measure(backend_name, model_name, args.limit)
+            except RuntimeError as e:
+                print(e)
+
+    if not results:
+        raise SystemExit("No combination could be measured")
+
+    if not references:
+        first = next(iter(results))
+        references = results[first]["transcripts"]
+        print(f"\nNo references given, WER is measured against {first[0]} / {first[1]}")
+
+    rows = []
+    for (backend_name, model_name), result in results.items():
+        wers = [
+            word_error_rate(references[name], text)
+            for name, text in result["transcripts"].items() if name in references
+        ]
+        rows.append([
+            backend_name,
+            model_name,
+            f"{result['load_seconds']:.1f}",
+            f"{result['rtf']:.3f}",
+            f"{result['loaded_rss_mb']:.0f}",
+            f"{result['peak_rss_mb']:.0f}",
+            f"{sum(wers) / len(wers) * 100:.1f}" if wers else "-"
+        ])
+
+    print()
+    print_table(["backend", "model", "load s", "RTF", "RSS MB", "peak RSS MB", "WER %"], rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Throughput of one-at-a-time Whisper decoding vs. batched decoding.
+
+Filters the sample chunks once, then transcribes a workload of --chunks
+chunks either sequentially (one model.transcribe per chunk, like the
+per-task workers) or with transcribe_batch at each --batch-sizes value.
+
+Usage:
+    python -m benchmarks.bench_batching [--chunks 16] [--batch-sizes 2 4 8]
+"""
+import argparse
+import asyncio
+import time
+
+from app.config import settings
+from app.services.filter import filter_audio_array
+from app.services.transcribe import get_whisper_model, transcribe_audio, transcribe_batch
+from benchmarks.common import load_samples, print_table
+
+async def run(chunks: int, batch_sizes):
+    samples = [filter_audio_array(data, name) for name, data in load_samples()]
+    workload = [samples[i % len(samples)] for i in range(chunks)]
+    audio_seconds = sum(len(a) for a in workload) / settings.sample_rate
+
+    # Load the model up front so it is not part of the timings
+    await get_whisper_model()
+
+    rows = []
+    start = time.perf_counter()
+    for audio in workload:
+        await transcribe_audio(audio)
+    elapsed = time.perf_counter() - start
+    rows.append(["sequential", f"{elapsed:.2f}", f"{chunks / elapsed:.2f}", f"{elapsed / audio_seconds:.3f}"])
+
+    for size in batch_sizes:
+        start = time.perf_counter()
+        for i in range(0, chunks, size):
+            await transcribe_batch(workload[i:i + size])
+        elapsed = time.perf_counter() - start
+        rows.append([f"batch={size}", f"{elapsed:.2f}", f"{chunks / elapsed:.2f}", f"{elapsed / audio_seconds:.3f}"])
+
+    print_table(["mode", "wall s", "chunks/s", "RTF"], rows)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=16)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[2, 4, 8])
+    args = parser.parse_args()
+    asyncio.run(run(args.chunks, args.batch_sizes))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Per-chunk latency of a transcript cache miss vs. a hit.
+
+A miss runs the key hash, filter_audio_array and Whisper on each sample
+chunk, then stores the transcript. Hits look the same bytes up again,
+from the in-memory LRU and from a fresh disk-only cache in a temporary
+directory (as another worker on the host would see them).
+
+Usage:
+    python -m benchmarks.bench_cache [--repeat 5]
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+
+from app.services.cache import CachedTranscript, TranscriptCache, cache_key
+from app.services.filter import filter_audio_array
+from app.services.transcribe import transcribe_audio
+from benchmarks.common import load_samples, print_table, time_call
+
+async def run(args):
+    samples = load_samples()
+    # Load the model up front so the first miss doesn't include it
+    await transcribe_audio(filter_audio_array(samples[0][1], samples[0][0]))
+
+    with tempfile.TemporaryDirectory() as disk_path:
+        cache = TranscriptCache(len(samples), disk_path, 64 * 1024 * 1024)
+        rows = []
+        for name, data in samples:
+            start = time.perf_counter()
+            key = cache_key(data)
+            text = await transcribe_audio(filter_audio_array(data, name))
+            miss_ms = (time.perf_counter() - start) * 1000
+            cache.put(key, CachedTranscript(text=text, status="completed", compute_seconds=miss_ms / 1000))
+
+            memory_ms = time_call(lambda: cache.get(cache_key(data)), args.repeat)
+
+            def disk_hit():
+                # A new instance has an empty memory tier, so every get reads the file
+                TranscriptCache(1, disk_path, 64 * 1024 * 1024).get(cache_key(data))
+            disk_ms = time_call(disk_hit, args.repeat)
+
+            rows.append([name, f"{len(data) / 1024:.0f}", f"{miss_ms:.0f}", f"{memory_ms:.3f}", f"{disk_ms:.3f}"])
+
+    print_table(["chunk", "KB", "miss ms", "memory hit ms", "disk hit ms"], rows)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
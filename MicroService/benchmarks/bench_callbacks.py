@@ -0,0 +1,113 @@
+"""
+Backend callback throughput: client per request vs. pooled client vs. bulk.
+
+Starts a stub backend (FastAPI on a local port) that accepts the single
+and batch ingest endpoints, optionally sleeping --latency ms per request,
+then fires --count callbacks with --concurrency in flight using:
+
+  per-request  a new httpx.AsyncClient for every callback (previous behaviour)
+  pooled       the shared keep-alive client from app.services.callback
+  bulk         the pooled client with CALLBACK_BULK_ENABLED coalescing
+
+Usage:
+    python -m benchmarks.bench_callbacks [--count 2000] [--concurrency 32] [--latency 0]
+"""
+import argparse
+import asyncio
+import threading
+import time
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+
+from app.config import settings
+from app.services import callback
+from benchmarks.common import print_table
+
+def stub_backend(latency: float) -> FastAPI:
+    app = FastAPI()
+    received = {"requests": 0, "transcripts": 0}
+    app.state.received = received
+
+    @app.post(settings.backend_endpoint)
+    async def ingest(request: Request):
+        await request.json()
+        await asyncio.sleep(latency)
+        received["requests"] += 1
+        received["transcripts"] += 1
+        return {"success": True}
+
+    @app.post(settings.backend_batch_endpoint)
+    async def ingest_batch(request: Request):
+        body = await request.json()
+        await asyncio.sleep(latency)
+        received["requests"] += 1
+        received["transcripts"] += len(body["transcripts"])
+        return {"success": True, "data": {"results": [{"chunkNumber": t["chunkNumber"]} for t in body["transcripts"]]}}
+
+    return app
+
+def start_server(app: FastAPI, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+async def send_per_request(chunk_number: int):
+    # The pre-pool callback: one client (and connection) per transcript
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        response = await client.post(
+            f"{settings.backend_url}{settings.backend_endpoint}",
+            json={"text": "hello", "timestamp": "2026-01-13T10:30:00Z", "chunkNumber": chunk_number}
+        )
+        response.raise_for_status()
+
+async def send_pooled(chunk_number: int):
+    await callback.send_to_backend(chunk_number, "hello", "2026-01-13T10:30:00Z")
+
+async def run_mode(mode: str, count: int, concurrency: int) -> float:
+    settings.callback_bulk_enabled = mode == "bulk"
+    await callback.start_callback_client()
+    send = send_per_request if mode == "per-request" else send_pooled
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            await send(i + 1)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(count)))
+    elapsed = time.perf_counter() - start
+
+    await callback.stop_callback_client()
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.0, help="stub backend latency per request (ms)")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    # Silence per-callback info logs so they do not dominate the timing
+    callback.logger.setLevel("WARNING")
+
+    app = stub_backend(args.latency / 1000)
+    server = start_server(app, args.port)
+    settings.backend_url = f"http://127.0.0.1:{args.port}"
+
+    rows = []
+    for mode in ("per-request", "pooled", "bulk"):
+        before = dict(app.state.received)
+        elapsed = asyncio.run(run_mode(mode, args.count, args.concurrency))
+        requests = app.state.received["requests"] - before["requests"]
+        rows.append([mode, f"{elapsed:.2f}", f"{args.count / elapsed:.0f}", requests])
+
+    server.should_exit = True
+    print_table(["mode", "seconds", "callbacks/s", "backend requests"], rows)
+
+if __name__ == "__main__":
+    main()
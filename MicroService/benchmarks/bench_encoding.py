@@ -0,0 +1,111 @@
+"""
+Per-chunk cost of the Pi recorder's encode step and what it puts on the wire.
+
+Each sample chunk is decoded to 16kHz int16 mono (the recorder's buffer),
+then encoded:
+
+- wav+ffmpeg mp3: the old path, WAV written to disk, an ffmpeg process makes
+  a 128k MP3, the WAV is deleted and the MP3 read back (skipped without ffmpeg)
+- opus / flac / wav: raspberrypi/encode.py, in memory from the array
+
+and reports, as medians over the samples: wall time, CPU time (including
+child processes), bytes per chunk and the upload bitrate, plus how long
+the service's decode_audio takes on the result. Run it on the Pi itself
+for representative encode numbers.
+
+Usage:
+    python -m benchmarks.bench_encoding [--repeat 3] [--tmp /path/on/sd-card]
+"""
+import argparse
+import os
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from scipy.io.wavfile import write
+
+from app.config import settings
+from app.services.filter import decode_audio
+from app.services.resample import resample
+from benchmarks.common import load_samples, print_table, time_call
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent / "raspberrypi"))
+import encode  # noqa: E402  (raspberrypi/encode.py)
+
+def cpu_seconds() -> float:
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return time.process_time() + children.ru_utime + children.ru_stime
+
+def ffmpeg_mp3(recording: np.ndarray, tmp_dir: str) -> bytes:
+    wav_path = os.path.join(tmp_dir, "chunk.wav")
+    mp3_path = os.path.join(tmp_dir, "chunk.mp3")
+    write(wav_path, settings.sample_rate, recording)
+    subprocess.run(
+        ["ffmpeg", "-i", wav_path, "-codec:a", "mp3", "-b:a", "128k", "-y", mp3_path],
+        capture_output=True,
+        check=True
+    )
+    os.remove(wav_path)
+    with open(mp3_path, "rb") as f:
+        return f.read()
+
+def measure(encoder, recordings, repeat):
+    wall, cpu, sizes, decode_ms, rates = [], [], [], [], []
+    for recording in recordings:
+        for _ in range(repeat):
+            start_cpu = cpu_seconds()
+            start = time.perf_counter()
+            audio_bytes = encoder(recording)
+            wall.append((time.perf_counter() - start) * 1000)
+            cpu.append((cpu_seconds() - start_cpu) * 1000)
+
+        seconds = len(recording) / settings.sample_rate
+        sizes.append(len(audio_bytes))
+        rates.append(len(audio_bytes) * 8 / seconds / 1000)
+        decode_ms.append(time_call(lambda: decode_audio(audio_bytes), repeat))
+
+    return [
+        f"{statistics.median(wall):.1f}",
+        f"{statistics.median(cpu):.1f}",
+        f"{statistics.median(sizes) / 1024:.1f}",
+        f"{statistics.median(rates):.0f}",
+        f"{statistics.median(decode_ms):.1f}"
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--tmp", help="directory for the old path's files (default: system temp)")
+    args = parser.parse_args()
+
+    recordings = []
+    for _, data in load_samples():
+        audio, sample_rate = decode_audio(data)
+        audio = resample(audio, sample_rate, settings.sample_rate)
+        recordings.append((np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16).reshape(-1, 1))
+
+    rows = []
+    if shutil.which("ffmpeg"):
+        with tempfile.TemporaryDirectory(dir=args.tmp) as tmp_dir:
+            rows.append(["wav+ffmpeg mp3", *measure(lambda r: ffmpeg_mp3(r, tmp_dir), recordings, args.repeat)])
+    else:
+        print("ffmpeg not found, skipping the old wav+ffmpeg path")
+
+    for fmt in encode.FORMATS:
+        if not encode.is_supported(fmt, settings.sample_rate):
+            print(f"{fmt} not supported by this libsndfile, skipping")
+            continue
+        rows.append([fmt, *measure(lambda r: encode.encode(r, settings.sample_rate, fmt), recordings, args.repeat)])
+
+    seconds = statistics.median(len(r) for r in recordings) / settings.sample_rate
+    print(f"\n{len(recordings)} chunks of ~{seconds:.0f}s at {settings.sample_rate}Hz")
+    print_table(["format", "encode ms", "encode CPU ms", "KB/chunk", "kbit/s", "service decode ms"], rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Throughput scaling of the inference engines.
+
+Runs --chunks filtered sample chunks through the shared-model thread engine
+(with --concurrency concurrent calls, like the async workers) and through the
+process-pool engine for each value of --processes, splitting the machine's
+cores evenly between processes.
+
+Usage:
+    python -m benchmarks.bench_engine_scaling [--chunks 16] [--processes 1 2 4]
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from app.config import settings
+from app.services.engine import ProcessPoolEngine, ThreadEngine
+from app.services.filter import filter_audio_array
+from app.services.transcribe import get_whisper_model
+from benchmarks.common import load_samples, print_table
+
+DECODE_OPTIONS = {"language": None, "fp16": False, "verbose": False}
+
+async def run_engine(engine, workload, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _one(audio):
+        async with semaphore:
+            await engine.transcribe(audio, DECODE_OPTIONS)
+
+    await engine.start()
+    # One warmup call per slot so model loading is not timed
+    await asyncio.gather(*(_one(workload[0]) for _ in range(concurrency)))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(_one(audio) for audio in workload))
+    elapsed = time.perf_counter() - start
+
+    await engine.stop()
+    return elapsed
+
+async def run(chunks: int, processes, concurrency: int):
+    samples = [filter_audio_array(data, name) for name, data in load_samples()]
+    workload = [samples[i % len(samples)] for i in range(chunks)]
+    audio_seconds = sum(len(a) for a in workload) / settings.sample_rate
+    cores = os.cpu_count() or 1
+
+    results = []
+    elapsed = await run_engine(ThreadEngine(get_whisper_model), workload, concurrency)
+    results.append((f"thread x{concurrency}", "-", elapsed))
+
+    for k in processes:
+        threads = max(1, cores // k)
+        engine = ProcessPoolEngine(settings.whisper_model, settings.transcription_backend, k, threads)
+        elapsed = await run_engine(engine, workload, k)
+        results.append((f"process x{k}", threads, elapsed))
+
+    baseline = results[0][2]
+    rows = [
+        [name, threads, f"{elapsed:.2f}", f"{chunks / elapsed:.2f}", f"{elapsed / audio_seconds:.3f}", f"{baseline / elapsed:.2f}x"]
+        for name, threads, elapsed in results
+    ]
+    print(f"Model: {settings.whisper_model}, cores: {cores}, chunks: {chunks}\n")
+    print_table(["engine", "threads/proc", "wall s", "chunks/s", "RTF", "vs thread"], rows)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=16)
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--concurrency", type=int, default=settings.worker_count)
+    args = parser.parse_args()
+    asyncio.run(run(args.chunks, args.processes, args.concurrency))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Cost of the silence pre-gate vs. the full filter pipeline.
+
+Runs check_silence and filter_audio_array on the sample chunks and on
+synthetic silent chunks (room tone at several levels, 44.1kHz WAV like
+the Pi recorder sends), reporting the gate decision and both timings.
+
+Usage:
+    python -m benchmarks.bench_gate [--repeat 5]
+"""
+import argparse
+import io
+
+import numpy as np
+import soundfile as sf
+
+from app.services.filter import filter_audio_array
+from app.services.gate import check_silence
+from benchmarks.common import load_samples, print_table, time_call
+
+def room_tone(level: float, seconds: float = 10.0, rate: int = 44100) -> bytes:
+    rng = np.random.default_rng(0)
+    buffer = io.BytesIO()
+    sf.write(buffer, (rng.standard_normal(int(seconds * rate)) * level).astype(np.float32), rate, format='WAV')
+    return buffer.getvalue()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    workloads = load_samples() + [(f"room tone {level:g}", room_tone(level)) for level in (1e-4, 1e-3, 5e-3)]
+
+    rows = []
+    for name, data in workloads:
+        result = check_silence(data)
+        gate_ms = time_call(lambda: check_silence(data), args.repeat)
+        filter_ms = time_call(lambda: filter_audio_array(data, name), args.repeat)
+        rows.append([
+            name, "silent" if result["silent"] else "speech", f"{result['rms']:.4f}",
+            f"{result['speech_ratio']:.2f}", f"{gate_ms:.1f}", f"{filter_ms:.1f}"
+        ])
+
+    print_table(["chunk", "gate", "rms", "speech ratio", "gate ms", "filter ms"], rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Per-chunk latency of the hand-off between filter_audio and Whisper.
+
+Compares the legacy WAV path (encode PCM_16 WAV, decode it again for the
+silence check, write a temp file, let Whisper decode it with ffmpeg) with
+the in-memory path (filter_audio_array hands a float32 array straight to
+model.transcribe). Model inference is identical in both paths and is not
+timed here.
+
+Usage:
+    python -m benchmarks.bench_inmemory_path [--repeat 5]
+"""
+import argparse
+import os
+import tempfile
+
+import numpy as np
+from whisper.audio import load_audio
+
+from app.config import settings
+from app.services.filter import encode_wav, filter_audio_array
+from app.services.transcribe import is_audio_silent
+from benchmarks.common import load_samples, print_table, time_call
+
+def legacy_handoff(filtered: np.ndarray) -> np.ndarray:
+    wav_bytes = encode_wav(filtered, settings.sample_rate)
+    is_audio_silent(wav_bytes)
+    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_file:
+        tmp_file.write(wav_bytes)
+        tmp_path = tmp_file.name
+    try:
+        return load_audio(tmp_path)
+    finally:
+        os.unlink(tmp_path)
+
+def inmemory_handoff(filtered: np.ndarray) -> np.ndarray:
+    is_audio_silent(filtered)
+    return filtered.astype(np.float32, copy=False)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = []
+    saved = []
+    for name, audio_data in load_samples():
+        filtered = filter_audio_array(audio_data, name)
+        legacy_ms = time_call(lambda: legacy_handoff(filtered), args.repeat)
+        inmemory_ms = time_call(lambda: inmemory_handoff(filtered), args.repeat)
+        saved.append(legacy_ms - inmemory_ms)
+        rows.append([name, f"{legacy_ms:.2f}", f"{inmemory_ms:.2f}", f"{legacy_ms - inmemory_ms:.2f}"])
+
+    print_table(["chunk", "wav+ffmpeg ms", "in-memory ms", "saved ms"], rows)
+    print(f"\nMean saved per chunk: {np.mean(saved):.2f} ms")
+
+if __name__ == "__main__":
+    main()
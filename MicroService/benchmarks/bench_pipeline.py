@@ -0,0 +1,67 @@
+"""
+Wall time and WER of filter stage orderings on the sample corpus.
+
+Each --pipelines entry is a FILTER_PIPELINE value. For every ordering the
+script times filter_audio_array over the samples and transcribes the
+result. WER is computed against --references, a JSON file mapping sample
+filename to its reference transcript. Without references, the transcripts
+of the first ordering (the previous default) serve as the reference, so
+WER reads as drift from the old pipeline.
+
+Usage:
+    python -m benchmarks.bench_pipeline [--references refs.json] [--repeat 3]
+"""
+import argparse
+import asyncio
+
+import numpy as np
+
+from app.services.filter import filter_audio_array
+from app.services.transcribe import transcribe_audio
+from benchmarks.common import load_references, load_samples, print_table, time_call, word_error_rate
+
+DEFAULT_PIPELINES = [
+    "denoise,resample,vad,normalize",
+    "resample,denoise,vad,normalize",
+    "resample,vad,denoise,normalize",
+    "resample,vad,normalize"
+]
+
+async def run(pipelines, references, repeat: int):
+    samples = load_samples()
+    transcripts = {}
+    timings = {}
+
+    for pipeline in pipelines:
+        timings[pipeline] = []
+        transcripts[pipeline] = {}
+        for name, data in samples:
+            timings[pipeline].append(time_call(lambda: filter_audio_array(data, name, pipeline), repeat))
+            transcripts[pipeline][name] = await transcribe_audio(filter_audio_array(data, name, pipeline))
+
+    if not references:
+        references = transcripts[pipelines[0]]
+        print(f"No references given, WER is measured against '{pipelines[0]}'\n")
+
+    rows = []
+    for pipeline in pipelines:
+        wers = [word_error_rate(references[name], transcripts[pipeline][name]) for name, _ in samples if name in references]
+        rows.append([
+            pipeline,
+            f"{np.mean(timings[pipeline]):.1f}",
+            f"{np.sum(timings[pipeline]):.1f}",
+            f"{np.mean(wers) * 100:.1f}" if wers else "-"
+        ])
+
+    print_table(["pipeline", "mean ms/chunk", "total ms", "WER %"], rows)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pipelines", nargs="+", default=DEFAULT_PIPELINES)
+    parser.add_argument("--references")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(run(args.pipelines, load_references(args.references), args.repeat))
+
+if __name__ == "__main__":
+    main()
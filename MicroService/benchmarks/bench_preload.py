@@ -0,0 +1,140 @@
+"""
+Per-worker memory and first-request latency with and without PRELOAD_MODEL.
+
+For each mode the script starts gunicorn with --workers workers, times the
+first /transcribe-chunk request (the cold path), then sends enough
+concurrent requests that every worker has loaded a model, times one more
+request on the now warm service, and reads RSS and PSS for each worker from
+/proc/<pid>/smaps_rollup. First minus warm request time is the cold-start
+cost, whatever the decode itself takes. PSS splits shared pages
+between the processes mapping them, so it shows what copy-on-write sharing
+actually saves; RSS counts shared pages in full for every worker.
+
+Linux only (needs /proc). Usage:
+    python -m benchmarks.bench_preload [--workers 4] [--model small]
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.common import load_samples, print_table
+
+SERVICE_DIR = Path(__file__).resolve().parent.parent
+
+def worker_pids(master_pid: int) -> List[int]:
+    children = Path(f"/proc/{master_pid}/task/{master_pid}/children").read_text().split()
+    return [int(pid) for pid in children]
+
+def memory_kb(pid: int) -> Dict[str, int]:
+    values = {}
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines()[1:]:
+        key, value = line.split(":", 1)
+        values[key] = int(value.split()[0])
+    return {"rss": values["Rss"], "pss": values["Pss"]}
+
+def wait_for_health(base_url: str, timeout: float = 300.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health", timeout=2.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError("Service did not become healthy")
+
+def post_chunk(client: httpx.Client, base_url: str, sample, chunk_number: int) -> float:
+    name, data = sample
+    start = time.perf_counter()
+    response = client.post(
+        f"{base_url}/transcribe-chunk",
+        files={"audio_file": (name, data, "audio/mpeg")},
+        data={"chunk_number": chunk_number, "time": "2026-01-01T00:00:00Z"},
+        timeout=600.0
+    )
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+def measure(preload: bool, workers: int, model: str, port: int, sample):
+    base_url = f"http://127.0.0.1:{port}"
+    env = dict(
+        os.environ,
+        PRELOAD_MODEL="true" if preload else "false",
+        WORKER_COUNT=str(workers),
+        WHISPER_MODEL=model,
+        INFERENCE_ENGINE="thread",
+        CACHE_ENABLED="false",  # Every request sends the same sample: decode it each time
+        BACKEND_URL="http://127.0.0.1:9"  # Callbacks fail fast, they are not measured
+    )
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "app.main:app", "-c", "gunicorn.conf.py", "-b", f"127.0.0.1:{port}"],
+        cwd=SERVICE_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_for_health(base_url)
+        ready_s = time.perf_counter() - started
+
+        with httpx.Client() as client:
+            first_request_s = post_chunk(client, base_url, sample, 1)
+
+        # Enough parallel requests that every worker serves (and loads) at least once
+        with httpx.Client(limits=httpx.Limits(max_connections=workers * 4)) as client:
+            with ThreadPoolExecutor(max_workers=workers * 4) as pool:
+                list(pool.map(lambda i: post_chunk(client, base_url, sample, i), range(workers * 4)))
+
+        with httpx.Client() as client:
+            warm_request_s = post_chunk(client, base_url, sample, workers * 4)
+
+        mem = [memory_kb(pid) for pid in worker_pids(server.pid)]
+        master = memory_kb(server.pid)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+    return {
+        "ready_s": ready_s,
+        "first_request_s": first_request_s,
+        "warm_request_s": warm_request_s,
+        "worker_rss_mb": sum(m["rss"] for m in mem) / len(mem) / 1024,
+        "worker_pss_mb": sum(m["pss"] for m in mem) / len(mem) / 1024,
+        "total_pss_mb": (sum(m["pss"] for m in mem) + master["pss"]) / 1024
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--model", default="small")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    sample = load_samples()[0]
+    rows = []
+    for preload in (False, True):
+        r = measure(preload, args.workers, args.model, args.port, sample)
+        rows.append([
+            "preload" if preload else "lazy",
+            f"{r['ready_s']:.1f}",
+            f"{r['first_request_s']:.2f}",
+            f"{r['warm_request_s']:.2f}",
+            f"{r['worker_rss_mb']:.0f}",
+            f"{r['worker_pss_mb']:.0f}",
+            f"{r['total_pss_mb']:.0f}"
+        ])
+
+    print(f"Model: {args.model}, workers: {args.workers}\n")
+    print_table(["mode", "ready s", "first request s", "warm request s", "RSS/worker MB", "PSS/worker MB", "total PSS MB"], rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Cold-start and steady-state real-time factor of the openai-whisper model
+with FP32 vs. dynamic INT8 Linear layers, default vs. tuned torch threads,
+and with or without a warmup decode.
+
+Each variant runs in a fresh subprocess (thread settings and allocator
+state are per process), on the filtered sample chunks:
+
+- load / warmup: model load time (including quantization) and warmup decode
+- first RTF: the first real chunk's transcription time / its duration
+- steady RTF: median per-chunk RTF while --concurrency workers submit at
+  once (like the queue workers; decodes take turns on the model, so it
+  includes the wait), over --rounds passes of the samples
+- throughput: seconds of audio transcribed per wall-clock second
+- RSS after loading, and WER against the first variant (FP32 default)
+
+Usage:
+    python -m benchmarks.bench_quantization [--model base] [--concurrency 4] [--rounds 2] [--limit 8]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import load_samples, print_table, word_error_rate
+
+# name, WHISPER_QUANTIZE, tuned threads, MODEL_WARMUP
+VARIANTS = [
+    ("fp32, torch default threads", False, False, False),
+    ("fp32, tuned threads", False, True, False),
+    ("int8, tuned threads", True, True, False),
+    ("int8, tuned threads, warmup", True, True, True)
+]
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+def run_child(variant: int, model_name: str, concurrency: int, rounds: int, limit: int):
+    """Measure one variant and print the results as JSON on the last line."""
+    from app.config import settings
+    from app.services.asr import configure_torch_threads, load_backend
+    from app.services.filter import filter_audio_array
+
+    _, quantize, tuned, warmup = VARIANTS[variant]
+    settings.whisper_quantize = quantize
+    # WhisperBackend runs one decode at a time, so the service sizes for one
+    threads = configure_torch_threads(1) if tuned else None
+
+    samples = load_samples()[:limit or None]
+    filtered = [(name, filter_audio_array(data, name)) for name, data in samples]
+    options = {"language": settings.whisper_language if settings.whisper_language != "auto" else None,
+               "fp16": False, "verbose": None}
+
+    start = time.perf_counter()
+    backend = load_backend(model_name, "whisper", warmup=False)
+    load_seconds = time.perf_counter() - start
+    loaded_rss = rss_mb()
+    warmup_seconds = backend.warmup() if warmup else 0.0
+
+    def transcribe(item):
+        name, audio = item
+        start = time.perf_counter()
+        text = backend.transcribe(audio, options)["text"].strip()
+        return name, text, (time.perf_counter() - start) / (len(audio) / settings.sample_rate)
+
+    _, _, first_rtf = transcribe(filtered[0])
+
+    rtfs = []
+    transcripts = {}
+    audio_seconds = sum(len(audio) for _, audio in filtered) / settings.sample_rate * rounds
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for name, text, rtf in pool.map(transcribe, filtered * rounds):
+            transcripts[name] = text
+            rtfs.append(rtf)
+    wall = time.perf_counter() - start
+
+    import torch
+    print(json.dumps({
+        "threads": threads or torch.get_num_threads(),
+        "load_seconds": load_seconds,
+        "warmup_seconds": warmup_seconds,
+        "first_rtf": first_rtf,
+        "steady_rtf": statistics.median(rtfs),
+        "throughput": audio_seconds / wall,
+        "rss_mb": loaded_rss,
+        "transcripts": transcripts
+    }))
+
+def measure(variant: int, args) -> dict:
+    completed = subprocess.run(
+        [
+            sys.executable, "-m", "benchmarks.bench_quantization", "--child", str(variant),
+            "--model", args.model, "--concurrency", str(args.concurrency),
+            "--rounds", str(args.rounds), "--limit", str(args.limit)
+        ],
+        capture_output=True,
+        text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"{VARIANTS[variant][0]} failed:\n{completed.stderr[-2000:]}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--concurrency", type=int, default=4, help="workers submitting at once (WORKER_COUNT)")
+    parser.add_argument("--rounds", type=int, default=2)
+    parser.add_argument("--limit", type=int, default=8, help="use only the first N samples (0 = all)")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        run_child(args.child, args.model, args.concurrency, args.rounds, args.limit)
+        return
+
+    results = []
+    for i, (name, *_) in enumerate(VARIANTS):
+        print(f"Measuring {name}...", flush=True)
+        results.append((name, measure(i, args)))
+
+    reference = results[0][1]["transcripts"]
+    rows = []
+    for name, result in results:
+        wers = [word_error_rate(reference[chunk], text) for chunk, text in result["transcripts"].items()]
+        rows.append([
+            name,
+            result["threads"],
+            f"{result['load_seconds']:.1f}",
+            f"{result['warmup_seconds']:.1f}",
+            f"{result['first_rtf']:.3f}",
+            f"{result['steady_rtf']:.3f}",
+            f"{result['throughput']:.1f}x",
+            f"{result['rss_mb']:.0f}",
+            f"{statistics.mean(wers) * 100:.1f}" if wers else "-"
+        ])
+
+    print(f"\nModel {args.model}, {args.concurrency} workers, {os.cpu_count()} CPUs")
+    print_table(
+        ["variant", "threads", "load s", "warmup s", "first RTF", "steady RTF", "throughput", "RSS MB", "WER %"],
+        rows
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Enqueue and dequeue throughput of the memory vs. SQLite queue backends.
+
+Puts --count tasks carrying --kb of audio each (the size of a typical
+compressed chunk), then drains them with --consumers concurrent getters
+that ack every task, like the worker loop. The SQLite queue runs in a
+temporary directory, so spool and database writes hit the local disk.
+
+A second table shows scheduling fairness: a long-running device (at
+chunk 500) has 10 chunks queued when a newly connected device floods
+--count chunks numbered from 1. It reports where the long-running
+device's chunks are served, with the old chunk_number priority and with
+per-session fair queuing.
+
+Usage:
+    python -m benchmarks.bench_queue [--count 2000] [--kb 160] [--consumers 4]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from app.queue.backends import MemoryQueue, SQLiteQueue
+from benchmarks.common import print_table
+
+async def measure(queue, count: int, audio: bytes, consumers: int):
+    await queue.start()
+
+    start = time.perf_counter()
+    for i in range(count):
+        await queue.put({"audio_data": audio, "chunk_number": i, "time": "2026-01-13T10:30:00Z"})
+    put_s = time.perf_counter() - start
+
+    async def consume():
+        while True:
+            task = await queue.get(timeout=0.1)
+            if task is None:
+                return
+            await queue.ack(task)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(consume() for _ in range(consumers)))
+    # Each consumer waits out one empty get() at the end
+    get_s = time.perf_counter() - start - 0.1
+
+    await queue.stop()
+    return put_s, get_s
+
+async def fairness(count: int):
+    """Dequeue positions of the long-running device's chunks."""
+    tasks = [{"session_id": "long-running", "chunk_number": 500 + i} for i in range(10)]
+    tasks += [{"session_id": "new-device", "chunk_number": 1 + i} for i in range(count)]
+
+    # Previous behaviour: one PriorityQueue keyed on chunk_number
+    by_chunk = sorted(range(len(tasks)), key=lambda i: tasks[i]["chunk_number"])
+    old = [pos for pos, i in enumerate(by_chunk) if tasks[i]["session_id"] == "long-running"]
+
+    queue = MemoryQueue(len(tasks))
+    for task in tasks:
+        await queue.put(dict(task, audio_data=b""))
+    fair = []
+    for pos in range(len(tasks)):
+        task = await queue.get(timeout=1.0)
+        if task.session_id == "long-running":
+            fair.append(pos)
+
+    return [
+        ["chunk_number priority", old[0], old[-1]],
+        ["fair queuing", fair[0], fair[-1]]
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--kb", type=int, default=160)
+    parser.add_argument("--consumers", type=int, default=4)
+    args = parser.parse_args()
+
+    audio = os.urandom(args.kb * 1024)
+
+    with tempfile.TemporaryDirectory() as path:
+        backends = [
+            ("memory", MemoryQueue(args.count)),
+            ("sqlite", SQLiteQueue(path, args.count, visibility_timeout=300, max_deliveries=5, poll_interval=0.05))
+        ]
+
+        rows = []
+        for name, queue in backends:
+            put_s, get_s = asyncio.run(measure(queue, args.count, audio, args.consumers))
+            rows.append([name, f"{args.count / put_s:.0f}", f"{args.count / get_s:.0f}"])
+
+    print_table(["backend", "puts/s", "get+ack/s"], rows)
+    print()
+    print_table(
+        ["scheduler", "first long-running chunk served at", "last served at"],
+        asyncio.run(fairness(args.count))
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Latency and peak memory of FFT resampling vs. cached polyphase resampling.
+
+Resamples the 44.1kHz sample chunks plus synthetic 48kHz signals of
+--seconds length to 16kHz with scipy.signal.resample (full-length FFT,
+what filter_audio used before) and with app.services.resample.resample
+(polyphase, cached taps, block-wise). Peak memory is the largest traced
+allocation high-water mark during the call.
+
+Usage:
+    python -m benchmarks.bench_resample [--seconds 10 60] [--repeat 5]
+"""
+import argparse
+import io
+import tracemalloc
+
+import numpy as np
+import soundfile as sf
+from scipy import signal
+
+from app.config import settings
+from app.services.resample import resample
+from benchmarks.common import load_samples, print_table, time_call
+
+def fft_resample(audio: np.ndarray, src_rate: int) -> np.ndarray:
+    num_samples = int(len(audio) * settings.sample_rate / src_rate)
+    return signal.resample(audio, num_samples)
+
+def polyphase_resample(audio: np.ndarray, src_rate: int) -> np.ndarray:
+    return resample(audio, src_rate, settings.sample_rate)
+
+def peak_mb(fn) -> float:
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024 / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, nargs="+", default=[10, 60])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    workloads = []
+    for name, audio_data in load_samples():
+        data, sample_rate = sf.read(io.BytesIO(audio_data))
+        if sample_rate != settings.sample_rate:
+            workloads.append((name, data if data.ndim == 1 else data.mean(axis=1), sample_rate))
+
+    rng = np.random.default_rng(0)
+    for rate in (44100, 48000):
+        for seconds in args.seconds:
+            workloads.append((f"synthetic {rate}Hz {seconds:g}s", rng.standard_normal(int(rate * seconds)) * 0.1, rate))
+
+    # Warm the tap cache so the one-off filter design is not timed
+    for _, audio, rate in workloads:
+        polyphase_resample(audio[:rate], rate)
+
+    rows = []
+    for name, audio, rate in workloads:
+        fft_ms = time_call(lambda: fft_resample(audio, rate), args.repeat)
+        poly_ms = time_call(lambda: polyphase_resample(audio, rate), args.repeat)
+        fft_mb = peak_mb(lambda: fft_resample(audio, rate))
+        poly_mb = peak_mb(lambda: polyphase_resample(audio, rate))
+        rows.append([
+            name, rate, f"{fft_ms:.1f}", f"{poly_ms:.1f}", f"{fft_ms / poly_ms:.1f}x",
+            f"{fft_mb:.1f}", f"{poly_mb:.1f}"
+        ])
+
+    print_table(["input", "Hz", "fft ms", "polyphase ms", "speedup", "fft peak MB", "polyphase peak MB"], rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Replay the sample chunks over the /transcribe-stream WebSocket at real time.
+
+The samples are decoded, joined into one continuous stream and sent as
+--frame-ms int16 PCM frames paced like a live microphone (--speed 2 sends
+twice as fast). Every partial and final transcript is printed as it
+arrives; for finals the script reports latency from the end of the
+utterance in the audio to the transcript's arrival. Start the service
+first (uvicorn app.main:app).
+
+Usage:
+    python -m benchmarks.bench_stream [--url ws://localhost:8000/transcribe-stream] [--speed 1]
+"""
+import argparse
+import asyncio
+import io
+import json
+import statistics
+import time
+
+import numpy as np
+import soundfile as sf
+import websockets
+
+from app.services.resample import resample
+from benchmarks.common import load_samples, print_table
+
+def load_stream(rate: int) -> np.ndarray:
+    pieces = []
+    for _, data in load_samples():
+        audio, sample_rate = sf.read(io.BytesIO(data), dtype='float32')
+        if audio.ndim > 1:
+            audio = audio.mean(axis=1)
+        pieces.append(resample(audio, sample_rate, rate))
+    return np.concatenate(pieces)
+
+async def replay(url: str, audio: np.ndarray, rate: int, frame_ms: int, speed: float):
+    pcm = (np.clip(audio, -1, 1) * 32767).astype("<i2").tobytes()
+    frame_bytes = rate * frame_ms // 1000 * 2
+    finals = []
+
+    async with websockets.connect(f"{url}?sample_rate={rate}", max_size=None) as ws:
+        started = time.perf_counter()
+
+        async def sender():
+            for i, offset in enumerate(range(0, len(pcm), frame_bytes)):
+                # Pace frames against the wall clock, not per-frame sleeps
+                due = started + i * frame_ms / 1000 / speed
+                await asyncio.sleep(max(0.0, due - time.perf_counter()))
+                await ws.send(pcm[offset:offset + frame_bytes])
+            await ws.send("end")
+
+        send_task = asyncio.create_task(sender())
+
+        async for raw in ws:
+            message = json.loads(raw)
+            now = time.perf_counter() - started
+            if message["type"] == "done":
+                break
+            if message["type"] == "error":
+                raise SystemExit(message["detail"])
+
+            latency = now - message["end"] / speed
+            print(f"[{now:7.2f}s] {message['type']:7} #{message['utterance']} "
+                  f"({message['start']:.2f}-{message['end']:.2f}s) {message['text']}")
+            if message["type"] == "final":
+                finals.append([message["utterance"], f"{message['start']:.2f}", f"{message['end']:.2f}", f"{latency:.2f}"])
+
+        await send_task
+
+    return finals
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="ws://localhost:8000/transcribe-stream")
+    parser.add_argument("--rate", type=int, default=16000)
+    parser.add_argument("--frame-ms", type=int, default=20)
+    parser.add_argument("--speed", type=float, default=1.0)
+    args = parser.parse_args()
+
+    audio = load_stream(args.rate)
+    print(f"Streaming {len(audio) / args.rate:.1f}s of audio at {args.speed:g}x\n")
+    finals = asyncio.run(replay(args.url, audio, args.rate, args.frame_ms, args.speed))
+
+    print()
+    if not finals:
+        print("No utterances detected")
+        return
+    print_table(["utterance", "start s", "end s", "latency s"], finals)
+    print(f"\nmedian latency after utterance end: {statistics.median(float(f[3]) for f in finals):.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Microbenchmark of the VAD silence-removal stage.
+
+Each sample is run as recorded and as a synthetic mostly-silent chunk
+(1s of speech, then room tone), which is what a pendant sends most of the
+day. Compares the previous per-frame Python loop (tobytes + is_speech + slice
+append + concatenate, with a second int16 rescale) against remove_silence,
+which frames the signal once, skips clearly silent frames with a NumPy
+energy/zero-crossing prefilter and applies the speech mask with one index.
+
+Usage:
+    python -m benchmarks.bench_vad [--repeat 10]
+"""
+import argparse
+import io
+
+import numpy as np
+import soundfile as sf
+import webrtcvad
+from scipy import signal
+
+from app.config import settings
+from app.services.filter import frame_audio, remove_silence, silent_frames, speech_mask
+from benchmarks.common import load_samples, print_table, time_call
+
+def legacy_remove_silence(audio: np.ndarray, sample_rate: int, frame_duration: int = 30) -> np.ndarray:
+    vad = webrtcvad.Vad(2)
+    frame_size = int(sample_rate * frame_duration / 1000)
+    padding = frame_size - (len(audio) % frame_size)
+    if padding != frame_size:
+        audio = np.pad(audio, (0, padding), mode='constant')
+    audio_int16 = (audio * 32767).astype(np.int16)
+    frames = []
+    for i in range(0, len(audio_int16), frame_size):
+        frame = audio_int16[i:i + frame_size]
+        if len(frame) == frame_size:
+            if vad.is_speech(frame.tobytes(), sample_rate):
+                frames.append(audio[i:i + frame_size])
+    if not frames:
+        return audio
+    return np.concatenate(frames)
+
+def load_16k(audio_data: bytes) -> np.ndarray:
+    data, sample_rate = sf.read(io.BytesIO(audio_data))
+    if data.ndim > 1:
+        data = data.mean(axis=1)
+    if sample_rate != settings.sample_rate:
+        data = signal.resample_poly(data, settings.sample_rate, sample_rate)
+    return data / max(np.max(np.abs(data)), 1e-9)
+
+def mostly_silent(audio: np.ndarray, speech_seconds: float = 1.0) -> np.ndarray:
+    """A pendant-like chunk: a short burst of speech followed by room tone."""
+    sr = settings.sample_rate
+    rng = np.random.default_rng(0)
+    room_tone = rng.normal(0.0, 3e-4, len(audio) - int(speech_seconds * sr))
+    return np.concatenate([audio[:int(speech_seconds * sr)], room_tone])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    sr = settings.sample_rate
+    frame_size = int(sr * 30 / 1000)
+    rows = []
+    speedups = []
+    workloads = []
+    for name, audio_data in load_samples():
+        audio = load_16k(audio_data)
+        workloads.append((name, audio))
+        workloads.append((f"{name} (90% silent)", mostly_silent(audio)))
+
+    for name, audio in workloads:
+        legacy_ms = time_call(lambda: legacy_remove_silence(audio, sr), args.repeat)
+        vectorized_ms = time_call(lambda: remove_silence(audio, sr), args.repeat)
+
+        frames = frame_audio(audio, frame_size)
+        skipped = silent_frames(frames).mean() * 100
+        agreement = (speech_mask(frames, sr) == speech_mask(frames, sr, prefilter=False)).mean() * 100
+
+        speedups.append(legacy_ms / vectorized_ms)
+        rows.append([
+            name, f"{legacy_ms:.2f}", f"{vectorized_ms:.2f}", f"{legacy_ms / vectorized_ms:.2f}x",
+            f"{skipped:.1f}", f"{agreement:.1f}"
+        ])
+
+    print_table(["chunk", "loop ms", "vectorized ms", "speedup", "prefiltered %", "mask agree %"], rows)
+    print(f"\nMean speedup: {np.mean(speedups):.2f}x")
+
+if __name__ == "__main__":
+    main()
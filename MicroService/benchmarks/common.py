@@ -0,0 +1,62 @@
+"""
+Shared helpers for the benchmark scripts.
+Run benchmarks from the MicroService directory, e.g.:
+    python -m benchmarks.bench_inmemory_path
+"""
+import json
+import statistics
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+AUDIO_DIR = Path(__file__).resolve().parent.parent / "recorded_audio"
+
+def load_samples(audio_dir: Path = AUDIO_DIR) -> List[Tuple[str, bytes]]:
+    """Load every sample chunk as (filename, raw bytes)."""
+    files = sorted(p for p in audio_dir.iterdir() if p.suffix in {".mp3", ".wav", ".flac", ".ogg"})
+    if not files:
+        raise SystemExit(f"No audio samples found in {audio_dir}")
+    return [(p.name, p.read_bytes()) for p in files]
+
+def time_call(fn: Callable[[], object], repeat: int = 5) -> float:
+    """Return the median wall time of fn() in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def print_table(headers: List[str], rows: List[List[object]]):
+    """Print a small fixed-width results table."""
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) for i, h in enumerate(headers)]
+    line = "  ".join(str(h).ljust(w) for h, w in zip(headers, widths))
+    print(line)
+    print("-" * len(line))
+    for row in rows:
+        print("  ".join(str(c).ljust(w) for c, w in zip(row, widths)))
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """Word-level Levenshtein distance divided by the reference length."""
+    ref = reference.lower().split()
+    hyp = hypothesis.lower().split()
+    if not ref:
+        return 0.0 if not hyp else 1.0
+
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word)
+            ))
+        previous = current
+    return previous[-1] / len(ref)
+
+def load_references(path: Optional[str]) -> Dict[str, str]:
+    """Load {filename: reference transcript} from a JSON file, or {} if no path."""
+    if not path:
+        return {}
+    return json.loads(Path(path).read_text())
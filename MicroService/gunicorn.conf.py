@@ -1,14 +1,15 @@
-import multiprocessing
 import os
+import shutil
 
 # Server socket
 bind = "0.0.0.0:8000"
 backlog = 2048
 
-# Worker processes - Start with fewer workers, scale based on load
-# Use environment variable or default to 2-4 workers
+# Worker processes - fixed count; inference concurrency inside each process
+# is sized by the autoscaler (AUTOSCALE_ENABLED), not by adding processes
 workers = int(os.getenv("WORKER_COUNT", "2"))
-max_workers = multiprocessing.cpu_count() * 2 + 1
+# Lets each worker size its torch thread pool to its share of the CPUs
+os.environ.setdefault("SERVICE_PROCESSES", str(workers))
 
 # Worker class
 worker_class = "uvicorn.workers.UvicornWorker"
@@ -24,7 +25,16 @@ max_requests = 1000
 max_requests_jitter = 50
 
 # Preload app for faster worker spawning
-preload_app = False
+# PRELOAD_MODEL=true imports the app (and loads the Whisper model) in the
+# master, so forked workers share the weights copy-on-write and never pay
+# for a cold model load on their first request
+preload_app = os.getenv("PRELOAD_MODEL", "false").lower() in ("1", "true", "yes")
+
+# Metrics: every worker writes its samples under PROMETHEUS_MULTIPROC_DIR and
+# /metrics aggregates them, so a scrape sees all workers whichever one answers.
+# Set before the app is imported (here, in the master) so workers inherit it
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/transcription-metrics")
+metrics_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"]
 
 # Logging
 accesslog = "-"
@@ -43,10 +53,24 @@ user = None
 group = None
 tmp_upload_dir = None
 
-# Worker lifecycle hooks for dynamic scaling
+# Worker lifecycle hooks
 def on_starting(server):
     """Called just before the master process is initialized."""
-    server.log.info(f"Starting with {workers} workers (max: {max_workers})")
+    server.log.info(f"Starting with {workers} workers")
+    # Samples from a previous run would otherwise be added to this one
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+def post_fork(server, worker):
+    """Called just after a worker has been forked."""
+    if preload_app:
+        server.log.info(f"Worker {worker.pid} forked with preloaded model")
+
+def child_exit(server, worker):
+    """Called in the master after a worker exits."""
+    # Drop the dead worker's live gauges (queue depth)
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
 
 def when_ready(server):
     """Called just after the server is started."""
@@ -0,0 +1,118 @@
+import pytest
+from app.queue.autoscaler import Observation, ScalingPolicy, model_memory_mb
+
+
+def _policy(**overrides):
+    options = dict(min_workers=1, max_workers=8, target_wait=30.0, cooldown=60.0)
+    options.update(overrides)
+    return ScalingPolicy(**options)
+
+
+def _busy(workers, **overrides):
+    values = dict(workers=workers, queue_depth=40, queue_wait=45.0, completed=10, interval=10.0)
+    values.update(overrides)
+    return Observation(**values)
+
+
+def _idle(workers, **overrides):
+    values = dict(workers=workers, queue_depth=0, queue_wait=0.0, completed=0, interval=10.0)
+    values.update(overrides)
+    return Observation(**values)
+
+
+@pytest.mark.parametrize("policy, obs, expected", [
+    # Below the floor
+    (_policy(min_workers=2), _idle(1), (2, "up", "minimum")),
+    # Backlog of 40 at 1 chunk/s/worker: 2 workers would drain it in 30s,
+    # 8 would be needed at 0.125/s/worker but a step at most doubles
+    (_policy(), _busy(1, completed=10), (2, "up", "queue_wait")),
+    (_policy(), _busy(2, completed=2), (4, "up", "queue_wait")),
+    # Already drains in time at 4 chunks/s, but the wait was too long
+    (_policy(), _busy(4, completed=40), (5, "up", "queue_wait")),
+    # Backlog alone (drain time) is pressure too
+    (_policy(), _busy(2, queue_wait=1.0, completed=2), (4, "up", "queue_wait")),
+    # Nothing completed yet: one more worker
+    (_policy(), _busy(3, completed=0), (4, "up", "queue_wait")),
+    (_policy(max_workers=4), _busy(4), (4, "hold", "max_workers")),
+    (_policy(max_workers=6), _busy(4, completed=2), (6, "up", "queue_wait")),
+    # Each copy takes 1000MB and 512MB stays free: room for one more
+    (_policy(model_memory_mb=1000), _busy(2, completed=2, available_mb=1600), (3, "up", "queue_wait")),
+    (_policy(model_memory_mb=1000), _busy(2, available_mb=1400), (2, "hold", "memory")),
+    # Memory shrank below what the current copies need
+    (_policy(model_memory_mb=1000), _idle(4, available_mb=-1400), (2, "down", "memory")),
+    (_policy(model_memory_mb=1000, min_workers=2), _idle(4, available_mb=-5000), (2, "down", "memory")),
+    (_policy(), _idle(2), (2, "hold", "steady")),
+])
+def test_single_decision(policy, obs, expected):
+    decision = policy.decide(obs, now=0.0)
+    assert (decision.workers, decision.action, decision.reason) == expected
+
+
+@pytest.mark.parametrize("model_name, configured, quantized, expected", [
+    ("tiny", 0, False, 400),
+    ("small.en", 0, False, 1400),
+    ("large-v3", 0, False, 7000),
+    ("unknown", 0, False, 7000),
+    ("base", 0, True, 600 * 0.35),
+    ("base", 900, True, 900),
+])
+def test_model_memory(model_name, configured, quantized, expected):
+    assert model_memory_mb(model_name, configured, quantized) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("available_mb, expected", [
+    (None, 8),
+    (512, 2),
+    (2600, 4),
+    (-10000, 1),
+])
+def test_memory_cap(available_mb, expected):
+    policy = _policy(model_memory_mb=1000)
+    assert policy.memory_cap(_idle(2, available_mb=available_mb)) == expected
+
+
+def test_cooldown_holds_after_a_change():
+    policy = _policy()
+    assert policy.decide(_busy(1), now=0.0).action == "up"
+    assert (policy.decide(_busy(2), now=30.0).reason, policy.decide(_busy(2), now=59.0).reason) == (
+        "cooldown", "cooldown"
+    )
+    assert policy.decide(_busy(2, completed=2), now=60.0).action == "up"
+
+
+@pytest.mark.parametrize("down_intervals", [1, 3])
+def test_scales_down_after_idle_intervals(down_intervals):
+    policy = _policy(down_intervals=down_intervals)
+    actions = [policy.decide(_idle(3), now=100.0 * (i + 1)).action for i in range(down_intervals)]
+    assert actions == ["hold"] * (down_intervals - 1) + ["down"]
+    # A busy interval resets the idle run
+    policy = _policy(down_intervals=2)
+    policy.decide(_idle(3), now=100.0)
+    policy.decide(_idle(3, queue_depth=1, queue_wait=1.0, completed=10), now=200.0)
+    assert policy.decide(_idle(3), now=300.0).action == "hold"
+
+
+def test_idle_never_goes_below_the_minimum():
+    policy = _policy(min_workers=2, down_intervals=1)
+    assert policy.decide(_idle(2), now=100.0).reason == "steady"
+
+
+@pytest.mark.parametrize("rtf_after, expected", [
+    # Twice the workers at the same RTF doubles throughput: keep going
+    (0.5, (3, "up", "queue_wait")),
+    # Twice the workers, each twice as slow: no gain, take the step back
+    (1.0, (1, "down", "saturated")),
+])
+def test_step_up_is_kept_only_if_it_pays(rtf_after, expected):
+    policy = _policy()
+    assert policy.decide(_busy(1, rtf=0.5), now=0.0).workers == 2
+    # First interval after the cooldown measures the new worker count
+    decision = policy.decide(_busy(2, rtf=rtf_after), now=100.0)
+    assert (decision.workers, decision.action, decision.reason) == expected
+
+
+def test_known_saturation_is_not_retried():
+    policy = _policy()
+    policy.rtf_by_workers.update({2: 0.5, 3: 1.0, 4: 1.0})
+    decision = policy.decide(_busy(2, rtf=0.5, completed=2), now=0.0)
+    assert (decision.workers, decision.action, decision.reason) == (2, "hold", "saturated")
@@ -0,0 +1,66 @@
+import asyncio
+import json
+import httpx
+import pytest
+from app.services import callback
+from app.services.callback import CallbackBatcher, RejectedTranscript
+
+
+def _use_backend(monkeypatch, handler):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(callback, "_client", client)
+    return client
+
+
+def test_per_item_results(monkeypatch):
+    posted = []
+
+    def handler(request):
+        transcripts = json.loads(request.content)["transcripts"]
+        posted.append([t["chunkNumber"] for t in transcripts])
+        results = []
+        for t in transcripts:
+            if t["chunkNumber"] == 2:
+                results.append({"chunkNumber": 2, "error": "timestamp is invalid timestamp format", "status": 400})
+            elif t["chunkNumber"] == 3:
+                results.append({"chunkNumber": 3, "error": "write conflict"})
+            else:
+                results.append({"chunkNumber": t["chunkNumber"], "result": {}})
+        return httpx.Response(201, json={"success": True, "data": {"results": results}})
+
+    async def scenario():
+        client = _use_backend(monkeypatch, handler)
+        batcher = CallbackBatcher(window=0.01, max_items=10)
+        outcomes = await asyncio.gather(
+            *(
+                batcher.submit({"text": text, "timestamp": "2024-01-01T00:00:00Z", "chunkNumber": n})
+                for n, text in ((1, "hello"), (2, "bad time"), (3, "retry me"), (4, "  "))
+            ),
+            return_exceptions=True
+        )
+        await batcher.close()
+        await client.aclose()
+        return outcomes
+
+    ok, rejected, failed, empty = asyncio.run(scenario())
+    # The empty item never reaches the backend
+    assert posted == [[1, 2, 3]]
+    assert ok is True and empty is True
+    assert isinstance(rejected, RejectedTranscript)
+    assert isinstance(failed, RuntimeError) and not isinstance(failed, RejectedTranscript)
+
+
+@pytest.mark.parametrize("status, expected", [(400, RejectedTranscript), (503, httpx.HTTPStatusError)])
+def test_whole_batch_failure(monkeypatch, status, expected):
+    async def scenario():
+        client = _use_backend(monkeypatch, lambda request: httpx.Response(status, json={"success": False}))
+        batcher = CallbackBatcher(window=0.01, max_items=10)
+        outcome = await asyncio.gather(
+            batcher.submit({"text": "hello", "timestamp": "2024-01-01T00:00:00Z", "chunkNumber": 1}),
+            return_exceptions=True
+        )
+        await batcher.close()
+        await client.aclose()
+        return outcome[0]
+
+    assert type(asyncio.run(scenario())) is expected
@@ -0,0 +1,138 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+import pytest
+from app.config import settings
+from app.services import engine
+
+
+class FakeExecutor:
+    """Stands in for a one-process ProcessPoolExecutor: runs calls on a thread."""
+
+    def __init__(self, max_workers, mp_context, initializer, initargs):
+        self.threads = initargs[2]
+        self.shutdown_calls = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def submit(self, fn, *args):
+        future = Future()
+
+        def run():
+            self.release.wait(5)
+            future.set_result(fn(*args))
+
+        threading.Thread(target=run).start()
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shutdown_calls.append(threading.current_thread() is threading.main_thread())
+
+
+@pytest.fixture
+def fake_processes(monkeypatch):
+    monkeypatch.setattr(engine, "ProcessPoolExecutor", FakeExecutor)
+    monkeypatch.setattr(engine, "available_cpus", lambda: 8)
+
+
+def test_resize_gives_every_process_the_same_threads(fake_processes):
+    async def scenario():
+        pool = engine.ProcessPoolEngine("tiny", "whisper", 2, 0)
+        await pool.start()
+        first = list(pool._executors)
+        assert [e.threads for e in first] == [4, 4]
+
+        await pool.resize(4)
+        assert [e.threads for e in pool._executors] == [2, 2, 2, 2]
+        assert all(e.shutdown_calls for e in first)
+
+        await pool.resize(1)
+        assert [e.threads for e in pool._executors] == [8]
+        await pool.stop()
+
+    asyncio.run(scenario())
+
+
+def test_resize_replaces_busy_processes_after_their_call(fake_processes):
+    async def scenario():
+        pool = engine.ProcessPoolEngine("tiny", "whisper", 1, 0)
+        await pool.start()
+        busy = pool._executors[0]
+        busy.release.clear()
+        call = asyncio.create_task(pool._call(engine._process_ping))
+        await asyncio.sleep(0.05)
+
+        await pool.resize(2)
+        assert not busy.shutdown_calls and busy in pool._executors
+        busy.release.set()
+        await call
+        # Retired on its way back; only the new processes remain
+        assert busy.shutdown_calls and busy not in pool._executors
+        assert [e.threads for e in pool._executors] == [4, 4]
+        assert pool._idle.qsize() == 2
+        await pool.stop()
+
+    asyncio.run(scenario())
+
+
+def test_fixed_threads_resize_one_process_at_a_time(fake_processes):
+    async def scenario():
+        pool = engine.ProcessPoolEngine("tiny", "whisper", 2, 3)
+        await pool.start()
+        first = list(pool._executors)
+        await pool.resize(3)
+        assert pool._executors[:2] == first and [e.threads for e in pool._executors] == [3, 3, 3]
+        await pool.resize(1)
+        assert len(pool._executors) == 1
+        await pool.stop()
+
+    asyncio.run(scenario())
+
+
+def test_stop_joins_processes_off_the_event_loop(fake_processes):
+    async def scenario():
+        pool = engine.ProcessPoolEngine("tiny", "whisper", 2, 1)
+        await pool.start()
+        executors = list(pool._executors)
+        await pool.stop()
+        return executors
+
+    assert [e.shutdown_calls for e in asyncio.run(scenario())] == [[False], [False]]
+
+
+def test_thread_engine_resize_resizes_torch_threads(monkeypatch):
+    calls = []
+    monkeypatch.setattr(engine, "configure_torch_threads", lambda concurrency: calls.append(concurrency) or 1)
+    monkeypatch.setattr(settings, "transcription_backend", "faster-whisper")
+    monkeypatch.setattr(settings, "batch_max_size", 1)
+    monkeypatch.setattr(settings, "segmenter_enabled", False)
+
+    thread_engine = engine.ThreadEngine(None)
+    asyncio.run(thread_engine.resize(3))
+    monkeypatch.setattr(settings, "transcription_backend", "whisper")
+    asyncio.run(thread_engine.resize(3))
+    # openai-whisper decodes one at a time, so it keeps every thread
+    assert calls == [3, 1]
+
+
+def test_batch_releases_shared_audio_when_an_allocation_fails(monkeypatch):
+    released = []
+
+    class FailingSharedAudio:
+        made = 0
+
+        def __init__(self, audio):
+            FailingSharedAudio.made += 1
+            if FailingSharedAudio.made == 3:
+                raise OSError("No space left on device")
+            self.number = FailingSharedAudio.made
+
+        def __exit__(self, *exc):
+            released.append(self.number)
+
+    monkeypatch.setattr(engine, "SharedAudio", FailingSharedAudio)
+    pool = engine.ProcessPoolEngine("tiny", "whisper", 1, 1)
+    audio = [engine.np.zeros(16000, dtype=engine.np.float32)] * 4
+    with pytest.raises(OSError):
+        asyncio.run(pool.transcribe_batch(audio, None))
+    assert released == [1, 2]
@@ -0,0 +1,81 @@
+import io
+import numpy as np
+import pytest
+import soundfile as sf
+from prometheus_client import REGISTRY
+from app.config import settings
+from app.services.gate import check_silence, is_chunk_silent
+
+RATE = 16000
+T = np.arange(RATE * 3) / RATE
+
+
+def wav(samples):
+    buffer = io.BytesIO()
+    sf.write(buffer, samples.astype(np.float32), RATE, format="WAV", subtype="PCM_16")
+    return buffer.getvalue()
+
+
+def silence():
+    return wav(np.zeros_like(T))
+
+
+def noise():
+    # Mains hum and hiss: loud enough to pass the energy check, not speech to the VAD
+    rng = np.random.default_rng(0)
+    return wav(0.01 * np.sin(2 * np.pi * 60 * T) + 0.002 * rng.standard_normal(len(T)))
+
+
+def speech():
+    # Voiced harmonics with a gliding pitch, in syllable-rate bursts
+    pitch = 140 + 30 * np.sin(2 * np.pi * 0.7 * T)
+    phase = 2 * np.pi * np.cumsum(pitch) / RATE
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 20))
+    return wav(0.2 * voiced * np.clip(np.sin(2 * np.pi * 3 * T), 0, None))
+
+
+def checks(result):
+    return REGISTRY.get_sample_value("transcription_gate_checks_total", {"result": result}) or 0.0
+
+
+@pytest.fixture(autouse=True)
+def gate_enabled(monkeypatch):
+    monkeypatch.setattr(settings, "silence_gate_enabled", True)
+    monkeypatch.setattr(settings, "silence_gate_rms", 0.003)
+    monkeypatch.setattr(settings, "silence_gate_speech_ratio", 0.05)
+
+
+def test_silence_fails_the_energy_check():
+    result = check_silence(silence())
+    assert result == {"silent": True, "rms": 0.0, "speech_ratio": 0.0}
+
+
+def test_noise_fails_the_vad_check():
+    result = check_silence(noise())
+    assert result["silent"]
+    assert result["rms"] >= settings.silence_gate_rms
+    assert result["speech_ratio"] < settings.silence_gate_speech_ratio
+
+
+def test_speech_passes():
+    result = check_silence(speech())
+    assert not result["silent"]
+    assert result["speech_ratio"] > 0.5
+
+
+@pytest.mark.parametrize("audio, silent", [(silence, True), (noise, True), (speech, False)])
+def test_is_chunk_silent_counts_each_check(audio, silent):
+    skipped, passed = checks("skipped"), checks("passed")
+    assert is_chunk_silent(audio(), 1) is silent
+    assert (checks("skipped") - skipped, checks("passed") - passed) == ((1, 0) if silent else (0, 1))
+
+
+def test_disabled_gate_lets_everything_through(monkeypatch):
+    monkeypatch.setattr(settings, "silence_gate_enabled", False)
+    total = checks("skipped") + checks("passed")
+    assert is_chunk_silent(silence(), 1) is False
+    assert checks("skipped") + checks("passed") == total
+
+
+def test_undecodable_chunk_is_let_through():
+    assert is_chunk_silent(b"not audio", 1) is False
@@ -0,0 +1,152 @@
+import asyncio
+import httpx
+from app.queue.outbox import Outbox
+from app.services.callback import RejectedTranscript
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def _outbox(tmp_path, **kwargs):
+    outbox = Outbox(str(tmp_path), max_entries=100, retry_interval=30.0, **kwargs)
+    await outbox.start()
+    return outbox
+
+
+def _server_error():
+    request = httpx.Request("POST", "http://backend/ingest")
+    return httpx.HTTPStatusError("500", request=request, response=httpx.Response(500, request=request))
+
+
+def test_rejected_entry_is_poisoned_and_skipped(tmp_path):
+    async def scenario():
+        outbox = await _outbox(tmp_path)
+        for chunk in (1, 2, 3):
+            await outbox.add(chunk, f"text {chunk}", "2024-01-01T00:00:00Z", "s", 5, "down")
+
+        sent = []
+
+        async def send(entry):
+            if entry.chunk_number == 1:
+                raise RejectedTranscript("400 - timestamp must be ISO 8601")
+            sent.append(entry.chunk_number)
+
+        result = await outbox.drain(send)
+        assert (result.delivered, result.poisoned) == (2, 1)
+        assert sent == [2, 3]
+        assert await outbox.size() == 0
+        assert await outbox.poisoned() == 1
+        assert not outbox.backlogged
+
+        # Never offered again
+        result = await outbox.drain(send)
+        assert result.delivered == 0 and sent == [2, 3]
+        await outbox.stop()
+
+    run(scenario())
+
+
+def test_failing_entry_backs_off_without_blocking_the_rest(tmp_path):
+    async def scenario():
+        outbox = await _outbox(tmp_path)
+        for chunk in (1, 2):
+            await outbox.add(chunk, f"text {chunk}", "2024-01-01T00:00:00Z", "s", 5, "down")
+
+        async def send(entry):
+            if entry.chunk_number == 1:
+                raise _server_error()
+
+        result = await outbox.drain(send)
+        assert (result.delivered, result.poisoned) == (1, 0)
+        assert outbox.backlogged
+        # Chunk 1 waits out its back-off
+        assert (await outbox.drain(send)).delivered == 0
+        assert await outbox.size() == 1
+        await outbox.stop()
+
+    run(scenario())
+
+
+def test_unreachable_backend_stops_the_drain(tmp_path):
+    async def scenario():
+        outbox = await _outbox(tmp_path)
+        for chunk in (1, 2, 3):
+            await outbox.add(chunk, f"text {chunk}", "2024-01-01T00:00:00Z", "s", 5, "down")
+
+        calls = []
+
+        async def send(entry):
+            calls.append(entry.chunk_number)
+            raise httpx.ConnectError("connection refused")
+
+        result = await outbox.drain(send)
+        assert calls == [1] and result.delivered == 0
+        assert outbox.backlogged
+
+        # Only the entry that was tried backs off; the rest are due at once
+        async def ok(entry):
+            calls.append(entry.chunk_number)
+
+        assert (await outbox.drain(ok)).delivered == 2
+        assert calls == [1, 2, 3]
+        await outbox.stop()
+
+    run(scenario())
+
+
+def test_entry_is_poisoned_after_max_retries(tmp_path):
+    async def scenario():
+        outbox = await _outbox(tmp_path, max_retries=2)
+        await outbox.add(1, "text", "2024-01-01T00:00:00Z", "s", 5, "down")
+
+        async def send(entry):
+            raise _server_error()
+
+        assert (await outbox.drain(send)).poisoned == 0
+        # Make it due again instead of waiting out the back-off
+        outbox._execute("UPDATE outbox SET next_attempt_at = 0")
+        assert (await outbox.drain(send)).poisoned == 1
+        assert await outbox.size() == 0 and await outbox.poisoned() == 1
+        await outbox.stop()
+
+    run(scenario())
+
+
+def test_poisoned_add_does_not_mark_backlog(tmp_path):
+    async def scenario():
+        outbox = await _outbox(tmp_path)
+        await outbox.add(1, "", "not a date", "s", 1, "400", poisoned=True)
+        assert not outbox.backlogged
+        assert await outbox.size() == 0 and await outbox.poisoned() == 1
+        await outbox.stop()
+
+    run(scenario())
+
+
+def test_tables_from_older_versions_are_migrated(tmp_path):
+    import sqlite3
+    conn = sqlite3.connect(tmp_path / "outbox.db")
+    conn.execute("""
+        CREATE TABLE outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, chunk_number INTEGER NOT NULL, text TEXT NOT NULL,
+            time TEXT NOT NULL, session_id TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT, created_at REAL NOT NULL, leased_until REAL NOT NULL DEFAULT 0
+        )
+    """)
+    conn.execute("INSERT INTO outbox (chunk_number, text, time, session_id, created_at) VALUES (1, 'hi', 't', 's', 0)")
+    conn.commit()
+    conn.close()
+
+    async def scenario():
+        outbox = await _outbox(tmp_path)
+        assert outbox.backlogged
+        sent = []
+
+        async def send(entry):
+            sent.append(entry.text)
+
+        assert (await outbox.drain(send)).delivered == 1 and sent == ["hi"]
+        await outbox.stop()
+
+    run(scenario())
@@ -0,0 +1,53 @@
+import asyncio
+import pytest
+from app.config import settings
+from app.services import transcribe
+
+
+class FakeBackend:
+    def __init__(self):
+        self.warmups = 0
+
+    def warmup(self):
+        self.warmups += 1
+        return 0.0
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    calls = []
+    backend = FakeBackend()
+
+    def load_backend(model_name, backend_name=None, threads=0, warmup=None, concurrency=1):
+        calls.append(warmup)
+        return backend
+
+    monkeypatch.setattr(transcribe, "load_backend", load_backend)
+    monkeypatch.setattr(transcribe, "configure_torch_threads", lambda concurrency: 1)
+    monkeypatch.setattr(transcribe, "_whisper_model", None)
+    monkeypatch.setattr(transcribe, "_warmup_pending", False)
+    return calls, backend
+
+
+def test_preload_defers_the_warmup_to_the_worker(monkeypatch, loads):
+    calls, backend = loads
+    monkeypatch.setattr(settings, "model_warmup", True)
+
+    transcribe.preload_whisper_model()
+    # Never in the (forking) master
+    assert calls == [False] and backend.warmups == 0
+
+    async def worker_start():
+        await transcribe.get_whisper_model()
+        await transcribe.get_whisper_model()
+
+    asyncio.run(worker_start())
+    assert backend.warmups == 1 and calls == [False]
+
+
+def test_preload_without_warmup(monkeypatch, loads):
+    calls, backend = loads
+    monkeypatch.setattr(settings, "model_warmup", False)
+    transcribe.preload_whisper_model()
+    asyncio.run(transcribe.get_whisper_model())
+    assert backend.warmups == 0
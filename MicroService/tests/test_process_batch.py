@@ -0,0 +1,38 @@
+import asyncio
+import numpy as np
+from app.config import settings
+from app.queue import worker
+
+
+def test_batch_gates_each_chunk(monkeypatch):
+    monkeypatch.setattr(settings, "cache_enabled", False)
+    gated, transcribed, sent = [], [], []
+
+    def is_chunk_silent(audio_data, chunk_number):
+        gated.append(chunk_number)
+        return audio_data == b"silence"
+
+    async def transcribe_batch(audio):
+        transcribed.extend(len(a) for a in audio)
+        return [{"text": "hello"} for _ in audio]
+
+    async def send_to_backend(chunk_number, text, time):
+        sent.append(chunk_number)
+
+    monkeypatch.setattr(worker, "is_chunk_silent", is_chunk_silent)
+    monkeypatch.setattr(worker, "filter_audio_array", lambda data, filename: np.ones(16000, dtype=np.float32))
+    monkeypatch.setattr(worker, "is_audio_silent", lambda audio: False)
+    monkeypatch.setattr(worker, "transcribe_batch", transcribe_batch)
+    monkeypatch.setattr(worker, "send_to_backend", send_to_backend)
+
+    batch = [
+        {"audio_data": b"silence", "chunk_number": 1, "time": "t", "session_id": "s"},
+        # Already gated at ingestion: not checked again
+        {"audio_data": b"silence", "chunk_number": 2, "time": "t", "session_id": "s", "gated": True},
+        {"audio_data": b"speech", "chunk_number": 3, "time": "t", "session_id": "s"},
+    ]
+    asyncio.run(worker.process_batch(batch, 0))
+
+    assert gated == [1, 3]
+    assert len(transcribed) == 2
+    assert sorted(sent) == [2, 3]
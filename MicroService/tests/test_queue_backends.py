@@ -0,0 +1,184 @@
+import asyncio
+import os
+import pytest
+from app.config import settings
+from app.queue.backends import MemoryQueue, SQLiteQueue, parse_session_weights
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def task(session_id, chunk_number):
+    return {"session_id": session_id, "chunk_number": chunk_number, "audio_data": b"audio", "time": "t"}
+
+
+def sqlite_queue(tmp_path, **kwargs):
+    options = {"maxsize": 100, "visibility_timeout": 60.0, "max_deliveries": 3, "poll_interval": 0.01, **kwargs}
+    return SQLiteQueue(str(tmp_path), **options)
+
+
+async def drain(queue):
+    order = []
+    while (item := await queue.get(timeout=0.05)) is not None:
+        order.append(item.session_id)
+        await queue.ack(item)
+    return "".join(order)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_queue(request, tmp_path):
+    def make():
+        return MemoryQueue(100) if request.param == "memory" else sqlite_queue(tmp_path)
+    return make
+
+
+def test_weighted_sessions_interleave(make_queue, monkeypatch):
+    monkeypatch.setattr(settings, "session_weights", "a=2")
+
+    async def scenario():
+        queue = make_queue()
+        await queue.start()
+        for i in range(6):
+            await queue.put(task("a", i))
+        for i in range(3):
+            await queue.put(task("b", i))
+        order = await drain(queue)
+        await queue.stop()
+        return order
+
+    assert run(scenario()) == "aabaabaab"
+
+
+def test_flooding_session_does_not_starve_others(make_queue, monkeypatch):
+    monkeypatch.setattr(settings, "session_weights", "")
+
+    async def scenario():
+        queue = make_queue()
+        await queue.start()
+        for i in range(5):
+            await queue.put(task("flood", i))
+        await queue.put(task("quiet", 0))
+        order = []
+        while (item := await queue.get(timeout=0.05)) is not None:
+            order.append((item.session_id, item.data["chunk_number"]))
+            await queue.ack(item)
+        await queue.stop()
+        return order
+
+    order = run(scenario())
+    assert order[:2] == [("flood", 0), ("quiet", 0)]
+    # Each session stays in arrival order
+    assert [n for s, n in order if s == "flood"] == [0, 1, 2, 3, 4]
+
+
+def test_sqlite_lease_expires_and_task_is_redelivered(tmp_path):
+    async def scenario():
+        queue = sqlite_queue(tmp_path, visibility_timeout=0.2)
+        await queue.start()
+        await queue.put(task("a", 7))
+
+        first = await queue.get(timeout=0.05)
+        # Leased: invisible until the lease runs out
+        assert await queue.get(timeout=0.05) is None
+        await asyncio.sleep(0.25)
+        second = await queue.get(timeout=0.05)
+        assert second.data["chunk_number"] == 7 and second.data["audio_data"] == b"audio"
+
+        # The expired lease can no longer ack it away
+        await queue.ack(first)
+        assert (await asyncio.to_thread(queue._execute, "SELECT COUNT(*) FROM tasks"))[0][0] == 1
+        await queue.ack(second)
+        assert (await asyncio.to_thread(queue._execute, "SELECT COUNT(*) FROM tasks"))[0][0] == 0
+        await queue.stop()
+
+    run(scenario())
+
+
+def test_sqlite_maxsize_holds_across_processes(tmp_path):
+    async def scenario():
+        mine, other = sqlite_queue(tmp_path, maxsize=1), sqlite_queue(tmp_path, maxsize=1)
+        await mine.start()
+        await other.start()
+        pending = mine._pending
+
+        def race():
+            # Another process takes the last slot right after our early check
+            count = pending()
+            mine._pending = pending
+            assert other._put(task("b", 1))
+            return count
+
+        mine._pending = race
+        assert not await asyncio.to_thread(mine._put, task("a", 1))
+        assert (await asyncio.to_thread(mine._execute, "SELECT session_id FROM tasks")) == [("b",)]
+        spooled = [name for name in os.listdir(mine._spool) if name.endswith(".bin")]
+        await mine.stop()
+        await other.stop()
+        return spooled
+
+    # The refused task's audio is not left behind
+    assert len(run(scenario())) == 1
+
+
+def test_sqlite_drops_a_task_after_max_deliveries(tmp_path):
+    async def scenario():
+        queue = sqlite_queue(tmp_path, visibility_timeout=0.05, max_deliveries=2)
+        await queue.start()
+        await queue.put(task("a", 1))
+        assert await queue.get(timeout=0.05) is not None
+        await asyncio.sleep(0.06)
+        assert await queue.get(timeout=0.05) is not None
+        await asyncio.sleep(0.06)
+        # Third delivery: dropped as poison
+        assert await queue.get(timeout=0.05) is None
+        assert (await asyncio.to_thread(queue._execute, "SELECT COUNT(*) FROM tasks"))[0][0] == 0
+        await queue.stop()
+
+    run(scenario())
+
+
+def test_release_redelivers_at_once(make_queue):
+    async def scenario():
+        queue = make_queue()
+        await queue.start()
+        await queue.put(task("a", 1))
+        await queue.put(task("a", 2))
+        item = await queue.get(timeout=0.05)
+        await queue.release(item)
+        again = await queue.get(timeout=0.05)
+        await queue.stop()
+        return item.data["chunk_number"], again.data["chunk_number"]
+
+    assert run(scenario()) == (1, 1)
+
+
+def test_memory_release_into_a_full_queue():
+    async def scenario():
+        queue = MemoryQueue(1)
+        await queue.put(task("a", 1))
+        item = await queue.get(timeout=0.05)
+        await queue.put(task("a", 2))
+        # Full again: a put waits...
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(queue.put(task("a", 3)), timeout=0.05)
+        # ...but the task taken out can always go back
+        await queue.release(item)
+        assert await queue.qsize() == 2
+        assert (await queue.get(timeout=0.05)).data["chunk_number"] == 1
+
+    run(scenario())
+
+
+@pytest.mark.parametrize("spec, expected", [
+    ("", {}),
+    ("pendant-a=2, pendant-b=0.5", {"pendant-a": 2.0, "pendant-b": 0.5}),
+    ("pendant-a=2,,", {"pendant-a": 2.0}),
+    ("pendant-a", {}),
+    ("pendant-a=", {}),
+    ("pendant-a=fast,pendant-b=3", {"pendant-b": 3.0}),
+    ("=2", {}),
+    ("pendant-a=0,pendant-b=-1,pendant-c=inf,pendant-d=nan", {}),
+])
+def test_parse_session_weights(spec, expected):
+    assert parse_session_weights(spec) == expected
@@ -0,0 +1,79 @@
+import asyncio
+import pytest
+from prometheus_client import REGISTRY
+from app.config import settings
+from app.queue import worker
+from app.queue.backends import MemoryQueue
+from app.services import metrics
+
+
+def depth(session):
+    return REGISTRY.get_sample_value("transcription_session_queue_depth", {"session": session})
+
+
+def latencies(session):
+    return REGISTRY.get_sample_value("transcription_session_latency_seconds_count", {"session": session}) or 0.0
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    monkeypatch.setattr(settings, "queue_backend", "memory")
+    monkeypatch.setattr(settings, "session_weights", "")
+    monkeypatch.setattr(settings, "metrics_max_sessions", 2)
+    monkeypatch.setattr(metrics, "_session_labels", set())
+    monkeypatch.setattr(worker, "_depth_labels", set())
+    monkeypatch.setattr(worker, "task_queue", MemoryQueue(100))
+
+
+def chunk(session_id, number):
+    return {"session_id": session_id, "chunk_number": number, "audio_data": b"audio", "time": "t"}
+
+
+def test_session_depth_and_latency(queue):
+    async def scenario():
+        for session_id, number in [("sm-a", 1), ("sm-a", 2), ("sm-b", 1)]:
+            await worker.enqueue_task(chunk(session_id, number))
+        assert (depth("sm-a"), depth("sm-b")) == (2, 1)
+
+        before = latencies("sm-a") + latencies("sm-b")
+        task = await worker.task_queue.get(timeout=0.05)
+        await worker._record_dequeued(task)
+        worker._record_done(task.data)
+        task = await worker.task_queue.get(timeout=0.05)
+        await worker._record_dequeued(task)
+        # Emptied sessions drop back to 0
+        assert depth("sm-a") + depth("sm-b") == 1
+        return before
+
+    before = asyncio.run(scenario())
+    assert latencies("sm-a") + latencies("sm-b") - before == 1
+
+
+def test_sessions_past_the_cap_share_a_label(queue):
+    async def scenario():
+        for session_id in ("cap-a", "cap-b", "cap-c", "cap-d"):
+            await worker.enqueue_task(chunk(session_id, 1))
+
+    asyncio.run(scenario())
+    assert (depth("cap-a"), depth("cap-b"), depth("other")) == (1, 1, 2)
+    assert depth("cap-c") is None
+
+
+def test_everything_is_served_from_metrics(queue):
+    async def scenario():
+        await worker.enqueue_task(chunk("served", 1))
+        task = await worker.task_queue.get(timeout=0.05)
+        await worker._record_dequeued(task)
+        worker._record_done(task.data)
+
+    asyncio.run(scenario())
+    body = metrics.render_metrics()[0].decode()
+    for line in (
+        'transcription_session_chunks_total{event="enqueued",session="served"} 1.0',
+        'transcription_session_chunks_total{event="processed",session="served"} 1.0',
+        'transcription_session_queue_wait_seconds_count{session="served"} 1.0',
+        'transcription_session_latency_seconds_count{session="served"} 1.0',
+        '\ntranscription_queue_bytes ',
+    ):
+        assert line in body
+    assert not hasattr(worker, "get_metrics")
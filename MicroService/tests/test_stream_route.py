@@ -0,0 +1,27 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+from app.routes import stream
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(stream.router)
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("rate", [0, -16000, 192001])
+def test_invalid_sample_rate_is_refused(client, rate):
+    with client.websocket_connect(f"/transcribe-stream?sample_rate={rate}") as ws:
+        assert ws.receive_json() == {"type": "error", "detail": f"Invalid sample_rate: {rate}"}
+        with pytest.raises(WebSocketDisconnect) as closed:
+            ws.receive_json()
+    assert closed.value.code == 1008
+
+
+def test_valid_sample_rate_opens_the_stream(client):
+    with client.websocket_connect("/transcribe-stream?sample_rate=8000") as ws:
+        ws.send_text("end")
+        assert ws.receive_json() == {"type": "done"}
@@ -0,0 +1,112 @@
+import asyncio
+import pytest
+from app.config import settings
+from app.queue import worker
+from app.queue.backends import SQLiteQueue
+
+
+def _start_and_stop(monkeypatch, **overrides):
+    monkeypatch.setattr(settings, "outbox_enabled", False)
+    monkeypatch.setattr(settings, "queue_backend", "memory")
+    for name, value in overrides.items():
+        monkeypatch.setattr(settings, name, value)
+    monkeypatch.setattr(worker, "worker_tasks", {})
+    monkeypatch.setattr(worker, "workers", [])
+
+    async def scenario():
+        await worker.start_worker()
+        started = {
+            "workers": len(worker.worker_tasks),
+            "loops": sorted(task.get_coro().__name__ for task in worker.workers)
+        }
+        await worker.stop_worker()
+        return started
+
+    return asyncio.run(scenario())
+
+
+def test_segmenter_runs_a_single_worker(monkeypatch):
+    started = _start_and_stop(
+        monkeypatch, segmenter_enabled=True, worker_count=4, autoscale_enabled=True, batch_max_size=1
+    )
+    assert started == {"workers": 1, "loops": ["segment_flush_loop"]}
+
+
+def test_batching_starts_the_flush_loop(monkeypatch):
+    started = _start_and_stop(monkeypatch, segmenter_enabled=True, autoscale_enabled=False, batch_max_size=8)
+    assert started == {"workers": 0, "loops": ["batch_worker_loop", "segment_flush_loop"]}
+
+
+def test_batching_with_autoscaler_is_refused(monkeypatch):
+    with pytest.raises(ValueError, match="AUTOSCALE_ENABLED"):
+        _start_and_stop(monkeypatch, segmenter_enabled=False, autoscale_enabled=True, batch_max_size=8)
+
+
+def test_batching_worker_survives_queue_errors(monkeypatch):
+    class FlakyQueue:
+        def __init__(self):
+            self.calls = 0
+
+        async def get(self, timeout):
+            self.calls += 1
+            if self.calls == 1:
+                raise OSError("database is locked")
+            worker.running = False
+            return None
+
+    queue = FlakyQueue()
+    monkeypatch.setattr(worker, "task_queue", queue)
+    monkeypatch.setattr(worker, "running", True)
+    asyncio.run(worker.batch_worker_loop(0))
+    assert queue.calls == 2
+
+
+def test_failed_batch_is_not_acked(monkeypatch, tmp_path):
+    async def failing_batch(batch, worker_id):
+        worker.running = False
+        raise RuntimeError("decode exploded")
+
+    async def scenario():
+        queue = SQLiteQueue(str(tmp_path), 100, 0.2, 5, 0.01)
+        await queue.start()
+        monkeypatch.setattr(worker, "task_queue", queue)
+        for number in (1, 2):
+            await worker.enqueue_task({"session_id": "a", "chunk_number": number, "audio_data": b"audio", "time": "t"})
+        await worker.batch_worker_loop(0)
+
+        # Both chunks are redelivered once the lease runs out
+        await asyncio.sleep(0.25)
+        redelivered = [await queue.get(timeout=0.05) for _ in range(2)]
+        await queue.stop()
+        return sorted(task.data["chunk_number"] for task in redelivered)
+
+    monkeypatch.setattr(settings, "batch_max_size", 4)
+    monkeypatch.setattr(settings, "batch_max_wait_ms", 50)
+    monkeypatch.setattr(settings, "queue_backend", "sqlite")
+    monkeypatch.setattr(worker, "running", True)
+    monkeypatch.setattr(worker, "process_batch", failing_batch)
+    assert asyncio.run(scenario()) == [1, 2]
+
+
+@pytest.mark.parametrize("engine, backend, refused", [
+    ("thread", "whisper", True),
+    ("thread", "faster-whisper", False),
+    ("process", "whisper", False),
+])
+def test_autoscaler_needs_parallel_inference(monkeypatch, engine, backend, refused):
+    overrides = dict(
+        segmenter_enabled=False, autoscale_enabled=True, batch_max_size=1, worker_count=1,
+        inference_engine=engine, transcription_backend=backend
+    )
+    if refused:
+        with pytest.raises(ValueError, match="INFERENCE_ENGINE=process"):
+            _start_and_stop(monkeypatch, **overrides)
+    else:
+        assert "autoscale_loop" in _start_and_stop(monkeypatch, **overrides)["loops"]
+
+
+@pytest.mark.parametrize("processes, backend", [(2, "memory"), (1, "sqlite")])
+def test_segmenter_needs_one_process_and_memory_queue(monkeypatch, processes, backend):
+    monkeypatch.setattr(settings, "service_processes", processes)
+    with pytest.raises(ValueError, match="SEGMENTER_ENABLED"):
+        _start_and_stop(monkeypatch, segmenter_enabled=True, autoscale_enabled=False, queue_backend=backend)
@@ -5,6 +5,7 @@ import { BadRequestError } from '../utils/ApiError';
 import * as transcriptService from '../services/transcript.service';
 import * as contextService from '../services/context.service';
 import * as summaryService from '../services/summary.service';
+import { ingestTranscriptSchema } from '../schemas/transcript.schema';
 
 // Default userId for single-user system
 const DEFAULT_USER_ID = '000000000000000000000000';
@@ -29,6 +30,57 @@ export const ingestTranscript = asyncHandler(
   }
 );
 
+/**
+ * Ingest a batch of transcript chunks
+ * POST /api/transcripts/ingest/batch
+ */
+export const ingestTranscriptBatch = asyncHandler(
+  async (req: Request, res: Response): Promise<void> => {
+    const { transcripts } = req.body as { transcripts: unknown[] };
+
+    // Invalid items get a 400 result of their own; the rest are ingested
+    const results: {
+      chunkNumber?: number;
+      result?: unknown;
+      error?: string;
+      status?: number;
+    }[] = new Array(transcripts.length);
+    const valid: { index: number; text: string; timestamp: Date; chunkNumber?: number }[] = [];
+
+    transcripts.forEach((item, index) => {
+      const parsed = ingestTranscriptSchema.shape.body.safeParse(item);
+      if (parsed.success) {
+        const { text, timestamp, chunkNumber } = parsed.data;
+        valid.push({ index, text, timestamp: new Date(timestamp), chunkNumber });
+        return;
+      }
+      const chunkNumber = (item as { chunkNumber?: unknown } | null)?.chunkNumber;
+      results[index] = {
+        chunkNumber: typeof chunkNumber === 'number' ? chunkNumber : undefined,
+        error: parsed.error.issues
+          .map((issue) => `${issue.path.join('.')} is ${issue.message.toLowerCase()}`)
+          .join('; '),
+        status: 400,
+      };
+    });
+
+    const ingested = await transcriptService.ingestTranscriptBatch(
+      valid.map(({ text, timestamp, chunkNumber }) => ({ text, timestamp, chunkNumber }))
+    );
+    ingested.forEach((result, i) => {
+      results[valid[i].index] = result;
+    });
+
+    const failed = results.filter((r) => r.error).length;
+
+    sendSuccessResponse(res, 201, 'Transcript batch ingested', {
+      ingested: results.length - failed,
+      failed,
+      results,
+    });
+  }
+);
+
 /**
  * Get daily context
  * GET /api/transcripts/context/daily?dayNumber=1
@@ -15,6 +15,16 @@ router.post(
   transcriptController.ingestTranscript
 );
 
+/**
+ * POST /api/transcripts/ingest/batch
+ * Ingest several transcript chunks in one request
+ */
+router.post(
+  '/ingest/batch',
+  validate(transcriptSchema.ingestTranscriptBatchSchema),
+  transcriptController.ingestTranscriptBatch
+);
+
 /**
  * GET /api/transcripts/context/daily
  * Get daily structured context
@@ -11,6 +11,20 @@ export const ingestTranscriptSchema = z.object({
   }),
 });
 
+/**
+ * Schema for ingesting a batch of transcript chunks.
+ * Items are validated one by one in the controller, so one bad item
+ * is reported in its own result instead of failing the whole batch.
+ */
+export const ingestTranscriptBatchSchema = z.object({
+  body: z.object({
+    transcripts: z
+      .array(z.unknown())
+      .min(1, 'transcripts is required')
+      .max(200, 'too many transcripts'),
+  }),
+});
+
 /**
  * Schema for daily context query
  */
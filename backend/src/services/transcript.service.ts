@@ -129,6 +129,34 @@ export async function ingestTranscript(input: IngestInput): Promise<IngestResult
   }
 }
 
+interface BatchIngestResult {
+  chunkNumber?: number;
+  result?: IngestResult;
+  error?: string;
+}
+
+/**
+ * Ingest several transcript chunks from one request, in order.
+ * A failing chunk is reported in its own result and does not stop the rest.
+ */
+export async function ingestTranscriptBatch(inputs: IngestInput[]): Promise<BatchIngestResult[]> {
+  const results: BatchIngestResult[] = [];
+
+  for (const input of inputs) {
+    try {
+      const result = await ingestTranscript(input);
+      results.push({ chunkNumber: input.chunkNumber, result });
+    } catch (error) {
+      results.push({
+        chunkNumber: input.chunkNumber,
+        error: error instanceof Error ? error.message : String(error),
+      });
+    }
+  }
+
+  return results;
+}
+
 /**
  * Update segment statistics after adding a chunk
  */
@@ -0,0 +1,48 @@
+import request from 'supertest';
+import app from '../../src/app';
+
+describe('Transcript Controller Integration', () => {
+  let server: any;
+
+  beforeAll(async () => {
+    // @ts-ignore
+    server = global.server || app.listen(0);
+  });
+
+  afterAll(async () => {
+    if (server && server.close) server.close();
+  });
+
+  describe('POST /api/transcripts/ingest/batch', () => {
+    it('should report invalid items per item instead of failing the batch', async () => {
+      const res = await request(server)
+        .post('/api/transcripts/ingest/batch')
+        .send({
+          transcripts: [
+            { text: '', timestamp: '2026-01-12T08:15:00.000Z', chunkNumber: 1 },
+            { text: 'Then I had breakfast.', timestamp: 'yesterday', chunkNumber: 2 },
+            'not an object',
+          ],
+        })
+        .expect(201);
+      expect(res.body.success).toBe(true);
+      expect(res.body.data.ingested).toBe(0);
+      expect(res.body.data.failed).toBe(3);
+      expect(res.body.data.results).toHaveLength(3);
+      expect(res.body.data.results[0]).toMatchObject({ chunkNumber: 1, status: 400 });
+      expect(res.body.data.results[0].error).toContain('text');
+      expect(res.body.data.results[1]).toMatchObject({ chunkNumber: 2, status: 400 });
+      expect(res.body.data.results[1].error).toContain('timestamp');
+      expect(res.body.data.results[2].status).toBe(400);
+    });
+
+    it('should return 400 if transcripts is missing or empty', async () => {
+      await request(server).post('/api/transcripts/ingest/batch').send({}).expect(400);
+      const res = await request(server)
+        .post('/api/transcripts/ingest/batch')
+        .send({ transcripts: [] })
+        .expect(400);
+      expect(res.body.success).toBe(false);
+    });
+  });
+});
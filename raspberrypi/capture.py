@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Continuous audio capture into a ring buffer
+
+The audio source calls back with every block it captures; the callback
+only copies the block into a fixed-size NumPy ring buffer. Chunking,
+encoding and uploading read from the ring on other threads, so a slow
+ffmpeg run or a network stall never stops the microphone. If readers
+fall so far behind that the ring is full, new frames are dropped and
+counted instead of blocking the audio thread.
+
+Sources:
+- SoundDeviceSource: the microphone, via a callback-driven sd.InputStream
+- SyntheticSource: a tone or a WAV file played at real time (or faster)
+  through the same callback, for testing without a microphone
+"""
+import threading
+import time
+from collections import deque
+import numpy as np
+from scipy.io import wavfile
+
+
+class RingBuffer:
+    """
+    Fixed-size ring of int16 frames with one writer (the audio callback)
+    and one reader. Positions are absolute frame counts, so the reader
+    knows exactly where in the stream each chunk starts.
+    """
+
+    def __init__(self, capacity_frames, channels=1):
+        self.capacity = capacity_frames
+        self.channels = channels
+        self._buffer = np.zeros((capacity_frames, channels), dtype=np.int16)
+        self._written = 0   # frames stored since start
+        self._read = 0      # frames consumed since start
+        self._cond = threading.Condition()
+        self._closed = False
+        # Where frames were dropped, to keep stream positions true: (position, frames)
+        self._gaps = deque()
+        self._skipped = 0   # dropped frames before the read position
+
+        # Counters
+        self.dropped_frames = 0
+        self.peak_frames = 0
+
+    def write(self, frames):
+        """Store a block; frames that don't fit are dropped. Never blocks on readers."""
+        frames = np.asarray(frames, dtype=np.int16).reshape(-1, self.channels)
+        with self._cond:
+            free = self.capacity - (self._written - self._read)
+            if len(frames) > free:
+                self.dropped_frames += len(frames) - free
+                self._gaps.append((self._written + free, len(frames) - free))
+                frames = frames[:free]
+
+            start = self._written % self.capacity
+            first = min(len(frames), self.capacity - start)
+            self._buffer[start:start + first] = frames[:first]
+            self._buffer[:len(frames) - first] = frames[first:]
+
+            self._written += len(frames)
+            self.peak_frames = max(self.peak_frames, self._written - self._read)
+            self._cond.notify_all()
+
+    def read(self, count, timeout=None):
+        """
+        Wait for `count` frames and return (position, frames), where position
+        is the stream frame index of the first one. Once the buffer is closed,
+        returns whatever is left (possibly fewer frames), then None. Also
+        returns None on timeout.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._written - self._read >= count or self._closed, timeout):
+                return None
+            count = min(count, self._written - self._read)
+            if count == 0:
+                return None
+
+            while self._gaps and self._gaps[0][0] <= self._read:
+                self._skipped += self._gaps.popleft()[1]
+
+            position = self._read + self._skipped
+            start = self._read % self.capacity
+            indices = (start + np.arange(count)) % self.capacity
+            frames = self._buffer[indices]
+            self._read += count
+            return position, frames
+
+    def close(self):
+        """Wake blocked readers; the buffer can still be drained."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            used = self._written - self._read
+            return {
+                "occupancy": used / self.capacity,
+                "peak_occupancy": self.peak_frames / self.capacity,
+                "buffered_frames": used,
+                "dropped_frames": self.dropped_frames,
+                "total_frames": self._written
+            }
+
+
+class SoundDeviceSource:
+    """Microphone input through a callback-driven sounddevice InputStream"""
+
+    def __init__(self, sample_rate, channels, blocksize=0, device=None):
+        # Imported here so synthetic sources work without PortAudio
+        import sounddevice as sd
+
+        self._stream = sd.InputStream(
+            samplerate=sample_rate,
+            channels=channels,
+            dtype='int16',
+            blocksize=blocksize,
+            device=device,
+            callback=self._on_audio
+        )
+        self.callback = None
+        self.overflows = 0
+
+    def _on_audio(self, indata, frames, time_info, status):
+        if status.input_overflow:
+            # PortAudio itself lost input (the callback ran late)
+            self.overflows += 1
+        self.callback(indata)
+
+    def start(self, callback):
+        self.callback = callback
+        self._stream.start()
+
+    def stop(self):
+        self._stream.stop()
+        self._stream.close()
+
+
+class SyntheticSource:
+    """
+    Feeds a test signal through the same callback as the microphone:
+    a 440Hz tone, or the samples of `wav_path` on a loop. With
+    realtime=False blocks are delivered as fast as the callback returns.
+    """
+
+    def __init__(self, sample_rate, channels, blocksize=1024, wav_path=None, realtime=True):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.blocksize = blocksize or 1024
+        self.realtime = realtime
+        self.overflows = 0
+
+        if wav_path:
+            rate, data = wavfile.read(wav_path)
+            if rate != sample_rate:
+                raise ValueError(f"{wav_path} is {rate}Hz, expected {sample_rate}Hz")
+            if data.dtype != np.int16:
+                data = (np.clip(data.astype(np.float32), -1.0, 1.0) * 32767).astype(np.int16)
+        else:
+            t = np.arange(sample_rate) / sample_rate
+            data = (np.sin(2 * np.pi * 440 * t) * 0.3 * 32767).astype(np.int16)
+
+        data = data.reshape(len(data), -1)
+        self._signal = np.repeat(data[:, :1], channels, axis=1) if data.shape[1] != channels else data
+
+        self._thread = None
+        self._stop = threading.Event()
+
+    def _run(self, callback):
+        position = 0
+        started = time.monotonic()
+        while not self._stop.is_set():
+            indices = (position + np.arange(self.blocksize)) % len(self._signal)
+            callback(self._signal[indices])
+            position += self.blocksize
+
+            if self.realtime:
+                delay = started + position / self.sample_rate - time.monotonic()
+                if delay > 0:
+                    self._stop.wait(delay)
+
+    def start(self, callback):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(callback,), name="synthetic-source", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+class AudioCapture:
+    """
+    Runs a source into a RingBuffer holding `buffer_seconds` of audio, and
+    hands out fixed-length chunks with the wall-clock time they started.
+    """
+
+    def __init__(self, source, sample_rate, channels=1, buffer_seconds=60):
+        self.source = source
+        self.sample_rate = sample_rate
+        self.ring = RingBuffer(int(buffer_seconds * sample_rate), channels)
+        self.started_at_us = None
+
+    def start(self):
+        self.started_at_us = int(time.time() * 1_000_000)
+        self.source.start(self.ring.write)
+
+    def stop(self):
+        self.source.stop()
+        self.ring.close()
+
+    def read_chunk(self, seconds, timeout=None):
+        """
+        Block until `seconds` of audio are buffered; returns (timestamp_us, frames),
+        None on timeout, and after stop() the remaining audio, then None.
+        Chunks are back to back, so timestamps follow the capture clock
+        rather than when the chunk was read.
+        """
+        chunk = self.ring.read(int(seconds * self.sample_rate), timeout)
+        if chunk is None:
+            return None
+        position, frames = chunk
+        return self.started_at_us + position * 1_000_000 // self.sample_rate, frames
+
+    def stats(self):
+        stats = self.ring.stats()
+        stats["overflows"] = self.source.overflows
+        return stats
@@ -1,8 +1,10 @@
 # consumer.py
 import redis
-import time
 import os
+import socket
+from redis.exceptions import ResponseError
 from dotenv import load_dotenv
+import chunk_protocol
 
 # Load environment variables
 load_dotenv()
@@ -11,30 +13,39 @@ load_dotenv()
 REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
 REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
 REDIS_DB = int(os.getenv("REDIS_DB", "0"))
-QUEUE_NAME = os.getenv("QUEUE_NAME", "audio_queue:PASTE_SESSION_NAME_HERE")
+STREAM_NAME = os.getenv("STREAM_NAME", "audio_stream:PASTE_SESSION_NAME_HERE")
+# Use a group of your own so consumer_api.py still gets every chunk
+CONSUMER_GROUP = os.getenv("CONSUMER_GROUP", "custom")
+CONSUMER_NAME = os.getenv("CONSUMER_NAME", f"{socket.gethostname()}-{os.getpid()}")
 # =========================================
 
 r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB)
 
+try:
+    r.xgroup_create(STREAM_NAME, CONSUMER_GROUP, id="0", mkstream=True)
+except ResponseError as e:
+    if "BUSYGROUP" not in str(e):
+        raise
+
 print("👂 Consumer started")
-print(f"🧵 Listening on queue: {QUEUE_NAME}\n")
+print(f"🧵 Listening on stream: {STREAM_NAME} (group {CONSUMER_GROUP})\n")
 
 while True:
-    item = r.blpop(QUEUE_NAME, timeout=5)
+    # Blocks until a chunk arrives (up to 5s)
+    response = r.xreadgroup(CONSUMER_GROUP, CONSUMER_NAME, {STREAM_NAME: ">"}, count=1, block=5000)
 
-    if item:
-        _, chunk_path = item
-        chunk_path = chunk_path.decode()
+    for entry_id, fields in (response[0][1] if response else []):
+        chunk = chunk_protocol.unpack(fields[chunk_protocol.FIELD.encode()])
 
-        print(f"🎧 Processing chunk: {chunk_path}")
+        print(f"🎧 Processing chunk: {chunk.chunk_number} ({len(chunk.pcm) / chunk.sample_rate:.1f}s)")
 
         # ---- PLACE YOUR LOGIC HERE ----
+        # chunk.pcm is the int16 (frames, channels) NumPy array
         # Speech-to-text
         # Upload to server
         # AI inference
         # Noise filtering
         # --------------------------------
 
-    else:
-        time.sleep(1)
-        # print("⏳ Waiting for new chunks...")
+        # Done with it; unacknowledged chunks stay pending in the group
+        r.xack(STREAM_NAME, CONSUMER_GROUP, entry_id)
@@ -1,10 +1,11 @@
-# consumer.py
-import redis
-import time
-import pickle
-import requests
+# consumer_api.py
+import asyncio
 import os
+import socket
+import httpx
+import redis.asyncio as redis
 from dotenv import load_dotenv
+from stream_consumer import StreamConsumer
 
 # Load environment variables
 load_dotenv()
@@ -13,67 +14,58 @@ load_dotenv()
 REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
 REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
 REDIS_DB = int(os.getenv("REDIS_DB", "0"))
-QUEUE_NAME = os.getenv("QUEUE_NAME", "audio_queue:PASTE_SESSION_NAME_HERE")
+STREAM_NAME = os.getenv("STREAM_NAME", "audio_stream:PASTE_SESSION_NAME_HERE")
+# Consumers in one group share the stream's chunks; each needs its own name
+CONSUMER_GROUP = os.getenv("CONSUMER_GROUP", "transcribers")
+CONSUMER_NAME = os.getenv("CONSUMER_NAME", f"{socket.gethostname()}-{os.getpid()}")
 BACKEND_BASE_URL = os.getenv("BACKEND_BASE_URL", "http://localhost:8000")
 API_ENDPOINT_PATH = os.getenv("API_ENDPOINT", "/transcribe-chunk")
 API_ENDPOINT = f"{BACKEND_BASE_URL}{API_ENDPOINT_PATH}"
+# Upload format: "opus" (Ogg Opus, smallest), "flac" (lossless) or "wav"
+AUDIO_FORMAT = os.getenv("AUDIO_FORMAT", "opus")
+UPLOAD_CONCURRENCY = int(os.getenv("UPLOAD_CONCURRENCY", "4"))  # chunks encoded/uploaded at once
+UPLOAD_TIMEOUT = int(os.getenv("UPLOAD_TIMEOUT", "30"))  # seconds
+# Chunks another consumer read but didn't acknowledge for this long are taken over
+CLAIM_IDLE_SECONDS = int(os.getenv("CLAIM_IDLE_SECONDS", "60"))
+# Wait used when a 429/503 carries no Retry-After header, or on network errors
+DEFAULT_RETRY_AFTER = int(os.getenv("DEFAULT_RETRY_AFTER", "10"))
+# Server errors (5xx other than 503) before a chunk is given up on and acknowledged
+UPLOAD_MAX_ATTEMPTS = int(os.getenv("UPLOAD_MAX_ATTEMPTS", "5"))
+DEVICE_ID = os.getenv("DEVICE_ID", socket.gethostname())
 # =========================================
 
-r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB)
-
-print("👂 Consumer started")
-print(f"🧵 Listening on queue: {QUEUE_NAME}")
-print(f"🌐 API Endpoint: {API_ENDPOINT}\n")
-
-
-def send_to_api(payload):
-    """Send audio chunk to transcription API using multipart form"""
-    try:
-        audio_info = payload["audio_file"]
-        
-        # Get current timestamp in microseconds (Unix epoch)
-        timestamp_us = int(time.time() * 1_000_000)
-        
-        files = {
-            "audio_file": (audio_info["filename"], audio_info["bytes"], "audio/mpeg")
-        }
-        
-        data = {
-            "chunk_number": payload["chunk_number"],
-            "time": payload.get("time", timestamp_us),  # Use existing time or current timestamp
-            "timestamp_us": timestamp_us  # Microsecond precision timestamp
-        }
-        
-        response = requests.post(API_ENDPOINT, files=files, data=data, timeout=30)
-        
-        if response.status_code == 200:
-            print(f"✅ Chunk {payload['chunk_number']} sent successfully")
-            print(f"   Timestamp: {timestamp_us} ({time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp_us / 1_000_000))})")
-            print(f"   Response: {response.json()}")
-        else:
-            print(f"❌ Failed to send chunk {payload['chunk_number']}: {response.status_code}")
-            print(f"   Error: {response.text}")
-            
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Network error sending chunk: {e}")
-    except Exception as e:
-        print(f"❌ Error processing chunk: {e}")
-
+async def main():
+    r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB)
+    limits = httpx.Limits(max_connections=UPLOAD_CONCURRENCY, max_keepalive_connections=UPLOAD_CONCURRENCY)
+    async with httpx.AsyncClient(timeout=UPLOAD_TIMEOUT, limits=limits) as http:
+        consumer = StreamConsumer(
+            r,
+            http,
+            STREAM_NAME,
+            CONSUMER_GROUP,
+            CONSUMER_NAME,
+            API_ENDPOINT,
+            DEVICE_ID,
+            AUDIO_FORMAT,
+            UPLOAD_CONCURRENCY,
+            CLAIM_IDLE_SECONDS * 1000,
+            DEFAULT_RETRY_AFTER,
+            max_attempts=UPLOAD_MAX_ATTEMPTS
+        )
+        try:
+            await consumer.run()
+        finally:
+            print(f"\n📊 {consumer.counts}")
+            await r.aclose()
 
-while True:
-    item = r.blpop(QUEUE_NAME, timeout=5)
 
-    if item:
-        _, payload_bytes = item
-        
-        try:
-            payload = pickle.loads(payload_bytes)
-            print(f"🎧 Processing chunk: {payload['chunk_number']}")
-            
-            send_to_api(payload)
-            
-        except Exception as e:
-            print(f"❌ Error deserializing payload: {e}")
+print("👂 Consumer started")
+print(f"🧵 Listening on stream: {STREAM_NAME} (group {CONSUMER_GROUP}, consumer {CONSUMER_NAME})")
+print(f"🌐 API Endpoint: {API_ENDPOINT}")
+print(f"📦 {UPLOAD_CONCURRENCY} uploads in flight, format: {AUDIO_FORMAT}\n")
 
-    else:
-        time.sleep(1)
+try:
+    asyncio.run(main())
+except KeyboardInterrupt:
+    # Unacknowledged chunks stay pending and are picked up on the next start
+    print("🛑 Consumer stopped")
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+In-memory encoding of recorded chunks
+
+Encodes the int16 NumPy buffer straight to compressed bytes with
+soundfile (libsndfile), with no WAV on disk and no ffmpeg process:
+- opus: Ogg Opus, a speech codec; a 10s chunk is ~30KB
+- flac: lossless, ~5x larger than Opus but nearly free to encode
+- wav: uncompressed PCM, for debugging
+"""
+import io
+import soundfile as sf
+
+# AUDIO_FORMAT -> (libsndfile container, subtype, file extension)
+FORMATS = {
+    "opus": ("OGG", "OPUS", ".ogg"),
+    "flac": ("FLAC", "PCM_16", ".flac"),
+    "wav": ("WAV", "PCM_16", ".wav")
+}
+
+MIME_TYPES = {
+    ".ogg": "audio/ogg",
+    ".flac": "audio/flac",
+    ".wav": "audio/wav",
+    ".mp3": "audio/mpeg"
+}
+
+# Opus only runs at these rates
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+
+
+def is_supported(fmt, sample_rate):
+    """Whether this libsndfile can write `fmt` at `sample_rate` (Opus needs libsndfile >= 1.0.29)"""
+    if fmt not in FORMATS:
+        return False
+    container, subtype, _ = FORMATS[fmt]
+    if subtype == "OPUS" and sample_rate not in OPUS_SAMPLE_RATES:
+        return False
+    return subtype in sf.available_subtypes(container)
+
+
+def encode(recording, sample_rate, fmt):
+    """Encode an int16 (frames, channels) array; returns the file bytes"""
+    container, subtype, _ = FORMATS[fmt]
+    buffer = io.BytesIO()
+    sf.write(buffer, recording, sample_rate, format=container, subtype=subtype)
+    return buffer.getvalue()
+
+
+def extension(fmt):
+    return FORMATS[fmt][2]
+
+
+def mime_type(filename):
+    return MIME_TYPES.get(filename[filename.rfind("."):].lower(), "application/octet-stream")
@@ -25,25 +25,6 @@ fi
 echo "✅ Python dependencies installed"
 echo ""
 
-# Check for ffmpeg (needed for MP3 conversion)
-if ! command -v ffmpeg &> /dev/null; then
-    echo "⚠️  ffmpeg not found (needed for MP3 conversion)"
-    echo ""
-    
-    # Detect OS
-    if [[ "$OSTYPE" == "darwin"* ]]; then
-        echo "📱 macOS detected"
-        echo "Install ffmpeg with: brew install ffmpeg"
-    elif [[ "$OSTYPE" == "linux-gnu"* ]]; then
-        echo "🐧 Linux detected"
-        echo "Install ffmpeg with: sudo apt-get install ffmpeg"
-    fi
-    echo ""
-else
-    echo "✅ ffmpeg found: $(ffmpeg -version | head -n 1)"
-    echo ""
-fi
-
 # Create .env file if it doesn't exist
 if [ ! -f .env ]; then
     echo "📝 Creating .env file..."
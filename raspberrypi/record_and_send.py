@@ -194,18 +194,26 @@
 #!/usr/bin/env python3
 """
 Audio Recording and Sending Script
-Records audio in 10-second MP3 chunks, saves locally, then sends to backend API
+Records audio in 10-second chunks, drops the ones without speech, encodes
+the rest in memory (Opus by default), spools and sends them to backend API
+
+Capture runs continuously from a callback into a ring buffer (capture.py);
+encoding, archiving and sending run on their own threads, so neither
+encoding nor a slow network leaves gaps in the recording.
 """
-import sounddevice as sd
-import numpy as np
-import requests
 import time
 import os
-import subprocess
+import queue
+import socket
+import threading
 from datetime import datetime
 from pathlib import Path
-from scipy.io.wavfile import write
 from dotenv import load_dotenv
+from capture import AudioCapture, SoundDeviceSource, SyntheticSource
+from speech_gate import SpeechGate
+from spool import Spool
+from uploader import Uploader
+import encode
 
 # Load environment variables
 load_dotenv()
@@ -215,171 +223,274 @@ load_dotenv()
 BACKEND_BASE_URL = os.getenv("BACKEND_BASE_URL", "http://localhost:8000")
 API_ENDPOINT_PATH = os.getenv("API_ENDPOINT", "/transcribe-chunk")
 API_ENDPOINT = f"{BACKEND_BASE_URL}{API_ENDPOINT_PATH}"
+# Multi-chunk upload used to catch up on a backlog ("" to always send singly)
+BATCH_ENDPOINT_PATH = os.getenv("BATCH_ENDPOINT", "/transcribe-chunk/batch")
+BATCH_ENDPOINT = f"{BACKEND_BASE_URL}{BATCH_ENDPOINT_PATH}" if BATCH_ENDPOINT_PATH else ""
+# Identifies this pendant to the transcription service (fair scheduling, metrics)
+DEVICE_ID = os.getenv("DEVICE_ID", socket.gethostname())
 
 # Audio settings
 SAMPLE_RATE = int(os.getenv("SAMPLE_RATE", "16000"))  # 16kHz for speech
 CHUNK_DURATION = int(os.getenv("CHUNK_DURATION", "10"))  # 10 seconds per chunk
 CHANNELS = int(os.getenv("CHANNELS", "1"))  # Mono
+# "mic", "tone" (synthetic 440Hz) or the path of a WAV file to replay in a loop
+AUDIO_SOURCE = os.getenv("AUDIO_SOURCE", "mic")
+# Audio the ring buffer holds while encoding/sending falls behind
+CAPTURE_BUFFER_SECONDS = int(os.getenv("CAPTURE_BUFFER_SECONDS", "120"))
+
+# On-device speech gate: only chunks with speech are sent (see speech_gate.py)
+EDGE_VAD = os.getenv("EDGE_VAD", "true").lower() == "true"
+EDGE_VAD_AGGRESSIVENESS = int(os.getenv("EDGE_VAD_AGGRESSIVENESS", "2"))  # 0-3, higher drops more
+EDGE_VAD_MIN_SPEECH_MS = int(os.getenv("EDGE_VAD_MIN_SPEECH_MS", "300"))
+# Keep sending for this long after the last speech so trailing words survive
+EDGE_VAD_HANGOVER_MS = int(os.getenv("EDGE_VAD_HANGOVER_MS", "1500"))
+# Send a chunk at least this often even in silence, as a sign of life
+HEARTBEAT_SECONDS = int(os.getenv("HEARTBEAT_SECONDS", "300"))
+
+# Upload format: "opus" (Ogg Opus, smallest), "flac" (lossless) or "wav"
+AUDIO_FORMAT = os.getenv("AUDIO_FORMAT", "opus")
 
 # Storage settings
 AUDIO_FOLDER = os.getenv("AUDIO_FOLDER", "recorded_audio")
+# Keep a copy of every chunk in AUDIO_FOLDER (written in the background)
+ARCHIVE_AUDIO = os.getenv("ARCHIVE_AUDIO", "true").lower() == "true"
+# Every chunk and its upload state (SQLite); unsent chunks survive outages and restarts
+SPOOL_PATH = os.getenv("SPOOL_PATH", os.path.join(AUDIO_FOLDER, "spool.db"))
+# Unsent audio kept at most; beyond it the oldest unsent chunks are dropped
+SPOOL_MAX_MB = int(os.getenv("SPOOL_MAX_MB", "500"))
+# Server errors (5xx) a chunk may get before it is given up on
+SPOOL_MAX_ATTEMPTS = int(os.getenv("SPOOL_MAX_ATTEMPTS", "5"))
+# Where older versions spooled chunks as files; imported on startup
+SPOOL_FOLDER = os.path.join(AUDIO_FOLDER, "spool")
+
+# Upload settings
+UPLOAD_BATCH_SIZE = int(os.getenv("UPLOAD_BATCH_SIZE", "8"))  # chunks per batch request
+UPLOAD_TIMEOUT = int(os.getenv("UPLOAD_TIMEOUT", "30"))  # seconds
+# Wait used when a 429/503 carries no Retry-After header, or on network errors
+DEFAULT_RETRY_AFTER = int(os.getenv("DEFAULT_RETRY_AFTER", "10"))
 # =========================================
 
 # Create audio storage folder
 Path(AUDIO_FOLDER).mkdir(exist_ok=True)
 
+spool = Spool(SPOOL_PATH, SPOOL_MAX_MB * 1024 * 1024)
+if os.path.isdir(SPOOL_FOLDER):
+    imported = spool.import_legacy(SPOOL_FOLDER)
+    if imported:
+        print(f"📥 Moved {imported} chunk(s) from {SPOOL_FOLDER}/ into the spool")
+uploader = Uploader(
+    spool,
+    API_ENDPOINT,
+    BATCH_ENDPOINT,
+    DEVICE_ID,
+    UPLOAD_BATCH_SIZE,
+    UPLOAD_TIMEOUT,
+    SPOOL_MAX_ATTEMPTS,
+    DEFAULT_RETRY_AFTER
+)
+
+if not encode.is_supported(AUDIO_FORMAT, SAMPLE_RATE):
+    # Opus needs libsndfile >= 1.0.29 and an Opus sample rate
+    print(f"⚠️  {AUDIO_FORMAT} encoding not available at {SAMPLE_RATE}Hz, using FLAC")
+    AUDIO_FORMAT = "flac"
+
 print("=" * 60)
 print("🎤 AUDIO RECORDING & SENDING SYSTEM")
 print("=" * 60)
-print(f"📁 Saving audio to: {AUDIO_FOLDER}/")
+print(f"📁 Saving audio to: {AUDIO_FOLDER}/" if ARCHIVE_AUDIO else "📁 Archiving off")
+print(f"📮 Spool: {SPOOL_PATH} ({spool.counts().get('pending', 0)} pending, max {SPOOL_MAX_MB} MB)")
 print(f"🌐 Backend API: {API_ENDPOINT}")
+print("📦 Catch-up: " + (f"batches of {UPLOAD_BATCH_SIZE} to {BATCH_ENDPOINT}" if BATCH_ENDPOINT else "single uploads"))
+print(f"🏷️  Device ID: {DEVICE_ID}")
 print(f"🔊 Sample Rate: {SAMPLE_RATE}Hz, Channels: {CHANNELS}")
 print(f"⏱️  Chunk Duration: {CHUNK_DURATION} seconds")
-print(f"💾 Format: MP3")
+print(f"🎚️  Source: {AUDIO_SOURCE}, buffer: {CAPTURE_BUFFER_SECONDS} seconds")
+print(f"💾 Format: {AUDIO_FORMAT}")
+print("🗣️  Speech gate: " + (f"on (hangover {EDGE_VAD_HANGOVER_MS} ms, heartbeat every {HEARTBEAT_SECONDS}s)" if EDGE_VAD else "off"))
 print("=" * 60)
 print()
 
-# Check if ffmpeg is available
-def check_ffmpeg():
-    try:
-        subprocess.run(['ffmpeg', '-version'], capture_output=True, check=True)
-        return True
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        return False
-
-if not check_ffmpeg():
-    print("❌ ffmpeg not found! Please install ffmpeg:")
-    print("   macOS: brew install ffmpeg")
-    print("   Linux: sudo apt-get install ffmpeg")
-    exit(1)
-
-# List available audio devices
-print("Available audio devices:")
-devices = sd.query_devices()
-print(devices)
-print()
-
-# Get default input device
-default_device = sd.query_devices(kind='input')
-print(f"Using input device: {default_device['name']}")
-print()
+if AUDIO_SOURCE == "mic":
+    import sounddevice as sd
+
+    # List available audio devices
+    print("Available audio devices:")
+    devices = sd.query_devices()
+    print(devices)
+    print()
+
+    # Get default input device
+    default_device = sd.query_devices(kind='input')
+    print(f"Using input device: {default_device['name']}")
+    print()
+    source = SoundDeviceSource(SAMPLE_RATE, CHANNELS)
+elif AUDIO_SOURCE == "tone":
+    source = SyntheticSource(SAMPLE_RATE, CHANNELS)
+else:
+    source = SyntheticSource(SAMPLE_RATE, CHANNELS, wav_path=AUDIO_SOURCE)
 
 print("🎙️  Press Ctrl+C to stop recording")
 print("🔴 Recording will start in 3 seconds...\n")
 time.sleep(3)
 
 chunk_number = 0
-
-def convert_wav_to_mp3(wav_path, mp3_path):
-    """Convert WAV file to MP3 using ffmpeg"""
-    try:
-        subprocess.run([
-            'ffmpeg', '-i', wav_path, 
-            '-codec:a', 'mp3', 
-            '-b:a', '128k',
-            '-y',  # Overwrite output file
-            mp3_path
-        ], capture_output=True, check=True)
-        
-        # Remove the temporary WAV file
-        os.remove(wav_path)
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"   ❌ FFmpeg error: {e}")
-        return False
-
-
-def send_to_backend(filepath, chunk_num, timestamp_us):
-    """Send audio chunk to backend API"""
-    try:
-        with open(filepath, 'rb') as f:
-            audio_bytes = f.read()
-        
-        files = {
-            "audio_file": (os.path.basename(filepath), audio_bytes, "audio/mpeg")
-        }
-        
-        data = {
-            "chunk_number": chunk_num,
-            "time": timestamp_us,
-            "timestamp_us": timestamp_us
-        }
-        
-        print(f"   📤 Sending to backend...")
-        response = requests.post(API_ENDPOINT, files=files, data=data, timeout=30)
-        
-        if response.status_code == 200:
-            print(f"   ✅ Successfully sent to backend")
-            print(f"   📊 Response: {response.json()}")
-        else:
-            print(f"   ❌ Backend error: {response.status_code}")
-            print(f"   📄 Error: {response.text}")
-            
-    except requests.exceptions.RequestException as e:
-        print(f"   ❌ Network error: {e}")
-    except Exception as e:
-        print(f"   ❌ Error sending: {e}")
-
+gate = SpeechGate(
+    SAMPLE_RATE,
+    EDGE_VAD_AGGRESSIVENESS,
+    EDGE_VAD_MIN_SPEECH_MS,
+    EDGE_VAD_HANGOVER_MS,
+    HEARTBEAT_SECONDS
+) if EDGE_VAD else None
+
+stopping = threading.Event()
+send_wakeup = threading.Event()
+# Recorded chunks waiting to be encoded; when full, audio backs up in the ring buffer
+encode_queue = queue.Queue(maxsize=8)
+# Encoded chunks waiting to be archived to AUDIO_FOLDER
+archive_queue = queue.Queue()
+
+
+def encode_chunk(chunk_num, timestamp_us, recording):
+    """Gate a recorded chunk, then encode it in memory, spool it and queue it for archiving"""
+    if gate is not None:
+        reason = gate.check(recording, timestamp_us / 1_000_000)
+        stats = gate.stats()
+        if reason is None:
+            print(f"   🤫 No speech in chunk {chunk_num}, not sent "
+                  f"({stats['suppressed']} suppressed / {stats['sent']} sent)")
+            return
+        if reason != "speech":
+            print(f"   📎 Sending chunk {chunk_num} as {reason}")
+
+    # ISO 8601 format with milliseconds and UTC timezone
+    timestamp_str = datetime.fromtimestamp(timestamp_us / 1_000_000).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+    file_stamp = timestamp_str.replace(':', '-').replace('.', '_')
+    filename = f"chunk_{chunk_num:04d}_{file_stamp}{encode.extension(AUDIO_FORMAT)}"
+
+    started = time.perf_counter()
+    audio_bytes = encode.encode(recording, SAMPLE_RATE, AUDIO_FORMAT)
+    print(f"   🔄 Encoded chunk {chunk_num} to {AUDIO_FORMAT} in {(time.perf_counter() - started) * 1000:.0f} ms")
+    print(f"   📏 Size: {len(audio_bytes) / 1024:.2f} KB")
+    print(f"   🕐 Timestamp: {timestamp_str}")
+
+    # Spool, then let the sender send everything pending (oldest first)
+    dropped = spool.add(audio_bytes, filename, chunk_num, timestamp_us)
+    if dropped:
+        print(f"   🗑️  Spool over {SPOOL_MAX_MB} MB, dropped the {dropped} oldest unsent chunk(s)")
+    send_wakeup.set()
+
+    if ARCHIVE_AUDIO:
+        archive_queue.put((filename, audio_bytes))
+
+
+def archiver_loop():
+    """Write archive copies in order until the None sentinel"""
+    while True:
+        item = archive_queue.get()
+        if item is None:
+            return
+        filename, audio_bytes = item
+        try:
+            with open(os.path.join(AUDIO_FOLDER, filename), 'wb') as f:
+                f.write(audio_bytes)
+            print(f"   💾 Saved locally: {filename}")
+        except OSError as e:
+            print(f"   ❌ Error archiving {filename}: {e}")
+
+
+def encoder_loop():
+    """Encode recorded chunks in order until the None sentinel"""
+    while True:
+        item = encode_queue.get()
+        if item is None:
+            return
+        try:
+            encode_chunk(*item)
+        except Exception as e:
+            print(f"   ❌ Error encoding chunk {item[0]}: {e}")
+
+
+def sender_loop():
+    """Send spooled chunks whenever one is added or a back-off expires"""
+    while not stopping.is_set():
+        try:
+            wait = uploader.drain(stopping)
+        except Exception as e:
+            print(f"   ❌ Error sending: {e}")
+            wait = DEFAULT_RETRY_AFTER
+        send_wakeup.wait(timeout=wait)
+        send_wakeup.clear()
+
+
+capture = AudioCapture(source, SAMPLE_RATE, CHANNELS, CAPTURE_BUFFER_SECONDS)
+encoder = threading.Thread(target=encoder_loop, name="encoder")
+archiver = threading.Thread(target=archiver_loop, name="archiver")
+sender = threading.Thread(target=sender_loop, name="sender")
 
 try:
     print("🔴 RECORDING STARTED\n")
-    
+    encoder.start()
+    archiver.start()
+    sender.start()
+    capture.start()
+
     while True:
+        chunk = capture.read_chunk(CHUNK_DURATION, timeout=1.0)
+        if chunk is None:
+            continue
+
         chunk_number += 1
-        
-        # Get timestamp in microseconds
-        timestamp_us = int(time.time() * 1_000_000)
-        # ISO 8601 format with milliseconds and UTC timezone
-        timestamp_str = datetime.now().strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
-        
-        print(f"🎙️  Recording chunk {chunk_number} ({CHUNK_DURATION}s)...")
-        
-        # Record audio
-        recording = sd.rec(
-            int(CHUNK_DURATION * SAMPLE_RATE),
-            samplerate=SAMPLE_RATE,
-            channels=CHANNELS,
-            dtype='int16'
-        )
-        sd.wait()  # Wait until recording is finished
-        
-        print(f"   ⏸️  Recording complete")
-        
-        # Save as WAV first
-        wav_filename = f"chunk_{chunk_number:04d}_{timestamp_str.replace(':', '-').replace('.', '_')}.wav"
-        wav_filepath = os.path.join(AUDIO_FOLDER, wav_filename)
-        write(wav_filepath, SAMPLE_RATE, recording)
-        
-        # Convert to MP3
-        print(f"   🔄 Converting to MP3...")
-        mp3_filename = f"chunk_{chunk_number:04d}_{timestamp_str.replace(':', '-').replace('.', '_')}.mp3"
-        mp3_filepath = os.path.join(AUDIO_FOLDER, mp3_filename)
-        
-        if convert_wav_to_mp3(wav_filepath, mp3_filepath):
-            print(f"   💾 Saved locally: {mp3_filename}")
-            
-            # Get file size
-            file_size = os.path.getsize(mp3_filepath)
-            print(f"   📏 Size: {file_size / 1024:.2f} KB")
-            print(f"   🕐 Timestamp: {timestamp_str}")
-            
-            # Send to backend
-            send_to_backend(mp3_filepath, chunk_number, timestamp_us)
-        else:
-            print(f"   ❌ Failed to convert to MP3")
-        
-        print()  # Empty line for readability
+        timestamp_us, recording = chunk
+        stats = capture.stats()
+        print(f"🎙️  Recorded chunk {chunk_number} ({CHUNK_DURATION}s) — "
+              f"buffer {stats['occupancy']:.0%} (peak {stats['peak_occupancy']:.0%}), "
+              f"dropped {stats['dropped_frames']} frames, {stats['overflows']} overflows")
+        # Blocks only when encoding is far behind; capture keeps filling the ring meanwhile
+        encode_queue.put((chunk_number, timestamp_us, recording))
 
 except KeyboardInterrupt:
+    # Keep the audio captured so far, including the last partial chunk
+    capture.stop()
+    while (chunk := capture.read_chunk(CHUNK_DURATION)) is not None:
+        chunk_number += 1
+        encode_queue.put((chunk_number, *chunk))
+    encode_queue.put(None)
+    encoder.join()
+    archive_queue.put(None)
+    stopping.set()
+    send_wakeup.set()
+    archiver.join()
+    sender.join()
+
+    stats = capture.stats()
     print("\n" + "=" * 60)
     print("🛑 RECORDING STOPPED")
     print("=" * 60)
     print(f"📊 Total chunks recorded: {chunk_number}")
-    print(f"📁 Audio files saved in: {AUDIO_FOLDER}/")
-    print(f"⏱️  Total duration: {chunk_number * CHUNK_DURATION} seconds")
+    if ARCHIVE_AUDIO:
+        print(f"📁 Audio files saved in: {AUDIO_FOLDER}/")
+    counts = spool.counts()
+    print(f"📮 Chunks still spooled: {counts.get('pending', 0)} "
+          f"({uploader.sent} sent in {uploader.requests} requests, {counts.get('rejected', 0)} rejected, "
+          f"{counts.get('dropped', 0)} dropped)")
+    uploader.close()
+    spool.close()
+    print(f"⏱️  Total duration: {stats['total_frames'] / SAMPLE_RATE:.0f} seconds")
+    print(f"🕳️  Dropped frames: {stats['dropped_frames']}, overflows: {stats['overflows']}, "
+          f"peak buffer: {stats['peak_occupancy']:.0%}")
+    if gate is not None:
+        stats = gate.stats()
+        print(f"🗣️  Sent {stats['sent']} chunks ({stats['speech']} speech, {stats['hangover']} hangover, "
+              f"{stats['heartbeat']} heartbeat), suppressed {stats['suppressed']} "
+              f"({stats['suppressed_seconds']:.0f}s of silence not uploaded)")
     print("=" * 60)
-    
+
 except Exception as e:
     print(f"\n❌ Error: {e}")
     import traceback
-    traceback.print_exc()
\ No newline at end of file
+    traceback.print_exc()
+    capture.stop()
+    encode_queue.put(None)
+    archive_queue.put(None)
+    stopping.set()
+    send_wakeup.set()
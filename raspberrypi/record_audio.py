@@ -1,17 +1,18 @@
 #!/usr/bin/env python3
 """
-Audio Recording Producer - Records from microphone and enqueues chunks to Redis
+Audio Recording Producer - Records from microphone and adds chunks to a Redis stream
+Each chunk is a binary frame (chunk_protocol.py): a small header plus the raw PCM
 """
 import sounddevice as sd
-import numpy as np
 import redis
-import pickle
 import time
 import os
 from datetime import datetime
 from scipy.io.wavfile import write
 from dotenv import load_dotenv
 from pathlib import Path
+from speech_gate import SpeechGate
+import chunk_protocol
 
 # Load environment variables
 load_dotenv()
@@ -20,15 +21,27 @@ load_dotenv()
 REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
 REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
 REDIS_DB = int(os.getenv("REDIS_DB", "0"))
-QUEUE_NAME = os.getenv("QUEUE_NAME", "audio_queue:PASTE_SESSION_NAME_HERE")
+STREAM_NAME = os.getenv("STREAM_NAME", "audio_stream:PASTE_SESSION_NAME_HERE")
+# Entries kept in the stream (~320KB each for 10s at 16kHz); the oldest are trimmed,
+# consumed or not, so an offline consumer can't exhaust Redis memory
+STREAM_MAXLEN = int(os.getenv("STREAM_MAXLEN", "1000"))
 
 # Audio settings
 SAMPLE_RATE = int(os.getenv("SAMPLE_RATE", "16000"))  # 16kHz for speech
 CHUNK_DURATION = int(os.getenv("CHUNK_DURATION", "10"))  # seconds per chunk
 CHANNELS = int(os.getenv("CHANNELS", "1"))  # Mono
 
+# On-device speech gate: only chunks with speech are enqueued (see speech_gate.py)
+EDGE_VAD = os.getenv("EDGE_VAD", "true").lower() == "true"
+EDGE_VAD_AGGRESSIVENESS = int(os.getenv("EDGE_VAD_AGGRESSIVENESS", "2"))
+EDGE_VAD_MIN_SPEECH_MS = int(os.getenv("EDGE_VAD_MIN_SPEECH_MS", "300"))
+EDGE_VAD_HANGOVER_MS = int(os.getenv("EDGE_VAD_HANGOVER_MS", "1500"))
+HEARTBEAT_SECONDS = int(os.getenv("HEARTBEAT_SECONDS", "300"))
+
 # Storage settings
 AUDIO_FOLDER = os.getenv("AUDIO_FOLDER", "recorded_audio")
+# Keep a WAV copy of every chunk in AUDIO_FOLDER
+ARCHIVE_AUDIO = os.getenv("ARCHIVE_AUDIO", "true").lower() == "true"
 # =========================================
 
 # Create audio storage folder
@@ -38,8 +51,8 @@ Path(AUDIO_FOLDER).mkdir(exist_ok=True)
 r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB)
 
 print("🎤 Audio Recording Producer Started")
-print(f"📁 Saving audio to: {AUDIO_FOLDER}/")
-print(f"🧵 Queue: {QUEUE_NAME}")
+print(f"📁 Saving audio to: {AUDIO_FOLDER}/" if ARCHIVE_AUDIO else "📁 Archiving off")
+print(f"🧵 Stream: {STREAM_NAME} (max {STREAM_MAXLEN} entries)")
 print(f"🔊 Sample Rate: {SAMPLE_RATE}Hz, Channels: {CHANNELS}")
 print(f"⏱️  Chunk Duration: {CHUNK_DURATION}s\n")
 
@@ -49,6 +62,13 @@ print(sd.query_devices())
 print()
 
 chunk_number = 0
+gate = SpeechGate(
+    SAMPLE_RATE,
+    EDGE_VAD_AGGRESSIVENESS,
+    EDGE_VAD_MIN_SPEECH_MS,
+    EDGE_VAD_HANGOVER_MS,
+    HEARTBEAT_SECONDS
+) if EDGE_VAD else None
 
 try:
     while True:
@@ -69,37 +89,37 @@ try:
         )
         sd.wait()  # Wait until recording is finished
         
-        # Save to file
-        filename = f"chunk_{chunk_number:04d}_{timestamp_str}.wav"
-        filepath = os.path.join(AUDIO_FOLDER, filename)
-        write(filepath, SAMPLE_RATE, recording)
-        
-        print(f"💾 Saved: {filepath}")
+        # Skip chunks without speech (heartbeats still go out)
+        if gate is not None:
+            reason = gate.check(recording, timestamp_us / 1_000_000)
+            if reason is None:
+                stats = gate.stats()
+                print(f"🤫 No speech, not enqueued ({stats['suppressed']} suppressed / {stats['sent']} sent)\n")
+                continue
+            if reason != "speech":
+                print(f"📎 Enqueuing as {reason}")
         
-        # Read file as bytes for API transmission
-        with open(filepath, 'rb') as f:
-            audio_bytes = f.read()
+        # Save to file
+        if ARCHIVE_AUDIO:
+            filepath = os.path.join(AUDIO_FOLDER, f"chunk_{chunk_number:04d}_{timestamp_str}.wav")
+            write(filepath, SAMPLE_RATE, recording)
+            print(f"💾 Saved: {filepath}")
         
-        # Create payload
-        payload = {
-            "chunk_number": chunk_number,
-            "time": timestamp_us,
-            "audio_file": {
-                "filename": filename,
-                "bytes": audio_bytes,
-                "filepath": filepath
-            }
-        }
+        # Frame straight from the recorded buffer, nothing read back from disk
+        frame = chunk_protocol.pack(chunk_number, timestamp_us, SAMPLE_RATE, recording)
         
-        # Enqueue to Redis
-        r.rpush(QUEUE_NAME, pickle.dumps(payload))
-        print(f"📤 Enqueued chunk {chunk_number} to Redis")
+        # Add to the stream; consumers of the group share and acknowledge entries
+        entry_id = r.xadd(STREAM_NAME, {chunk_protocol.FIELD: frame}, maxlen=STREAM_MAXLEN, approximate=True)
+        print(f"📤 Added chunk {chunk_number} to Redis ({entry_id.decode()}, {len(frame) / 1024:.1f} KB)")
         print(f"   Timestamp: {timestamp_us}")
         print(f"   Time: {datetime.fromtimestamp(timestamp_us / 1_000_000).strftime('%Y-%m-%d %H:%M:%S')}\n")
 
 except KeyboardInterrupt:
     print("\n\n🛑 Recording stopped by user")
     print(f"📊 Total chunks recorded: {chunk_number}")
+    if gate is not None:
+        stats = gate.stats()
+        print(f"🗣️  Enqueued {stats['sent']}, suppressed {stats['suppressed']} without speech")
 except Exception as e:
     print(f"\n❌ Error: {e}")
     import traceback
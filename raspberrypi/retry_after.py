@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+Retry-After header parsing for the uploaders
+
+The header is either a number of seconds ("120") or an HTTP date
+("Wed, 21 Oct 2026 07:28:00 GMT"). A missing or unreadable value falls
+back to the caller's default instead of failing the upload loop.
+"""
+import time
+from email.utils import parsedate_to_datetime
+
+
+def parse_retry_after(value, default):
+    """Seconds to wait for a Retry-After header value (None when absent)"""
+    if value is None:
+        return default
+    try:
+        return max(0, int(value))
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    if date.tzinfo is None:
+        # No zone (or "-0000"): HTTP dates are always GMT
+        return default
+    return max(0, round(date.timestamp() - time.time()))
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+On-device speech gate
+
+Runs WebRTC VAD over each recorded int16 chunk and decides whether it is
+worth uploading, so silent chunks cost neither uplink nor server time:
+- a chunk with at least `min_speech_ms` of speech is sent
+- a chunk right after speech is sent while the last speech frame is less
+  than `hangover_ms` back, so trailing words cut at a chunk boundary
+  (often too quiet for VAD) aren't lost
+- when nothing was sent for `heartbeat_seconds`, the chunk goes out anyway
+  as a heartbeat, so the backend can tell a quiet room from a dead device
+- everything else is suppressed
+"""
+import time
+import numpy as np
+import webrtcvad
+
+FRAME_MS = 30
+VAD_SAMPLE_RATES = (8000, 16000, 32000, 48000)
+# Frames quieter than this (-60 dBFS, as the service's VAD prefilter) are
+# silent without asking VAD, which tends to call steady noise speech
+ENERGY_FLOOR = 32768 * 1e-3
+
+
+class SpeechGate:
+    def __init__(self, sample_rate, aggressiveness=2, min_speech_ms=300, hangover_ms=1500, heartbeat_seconds=300):
+        if sample_rate not in VAD_SAMPLE_RATES:
+            raise ValueError(f"WebRTC VAD needs 8/16/32/48kHz audio, got {sample_rate}Hz")
+
+        self.sample_rate = sample_rate
+        self.vad = webrtcvad.Vad(aggressiveness)
+        self.frame_size = sample_rate * FRAME_MS // 1000
+        self.min_speech_frames = max(1, min_speech_ms // FRAME_MS)
+        self.hangover_seconds = hangover_ms / 1000
+        self.heartbeat_seconds = heartbeat_seconds
+
+        # Stream time (seconds) of the last speech frame seen
+        self._last_speech_at = None
+        self._last_sent = time.monotonic()
+
+        # Counters
+        self.counts = {"speech": 0, "hangover": 0, "heartbeat": 0, "suppressed": 0}
+        self.sent_seconds = 0.0
+        self.suppressed_seconds = 0.0
+
+    def speech_frames(self, recording):
+        """Per-frame VAD decisions for an int16 (frames,) or (frames, channels) array"""
+        if recording.ndim > 1:
+            recording = recording.mean(axis=1).astype(np.int16) if recording.shape[1] > 1 else recording[:, 0]
+
+        usable = len(recording) - len(recording) % self.frame_size
+        frames = np.ascontiguousarray(recording[:usable], dtype=np.int16).reshape(-1, self.frame_size)
+        loud = np.sqrt(np.mean(frames.astype(np.float32) ** 2, axis=1)) >= ENERGY_FLOOR
+
+        speech = np.zeros(len(frames), dtype=bool)
+        for i in np.flatnonzero(loud):
+            speech[i] = self.vad.is_speech(frames[i].tobytes(), self.sample_rate)
+        return speech
+
+    def check(self, recording, start_seconds):
+        """
+        Decide whether to send a chunk that starts `start_seconds` into the
+        stream. Returns the reason to send ("speech", "hangover",
+        "heartbeat") or None to suppress it.
+        """
+        speech = self.speech_frames(recording)
+        duration = len(recording) / self.sample_rate
+
+        in_hangover = (
+            self._last_speech_at is not None
+            and start_seconds - self._last_speech_at < self.hangover_seconds
+        )
+        if speech.any():
+            last = np.flatnonzero(speech)[-1]
+            self._last_speech_at = start_seconds + (last + 1) * FRAME_MS / 1000
+
+        if speech.sum() >= self.min_speech_frames:
+            reason = "speech"
+        elif in_hangover:
+            reason = "hangover"
+        elif time.monotonic() - self._last_sent >= self.heartbeat_seconds:
+            reason = "heartbeat"
+        else:
+            reason = None
+
+        if reason is None:
+            self.counts["suppressed"] += 1
+            self.suppressed_seconds += duration
+        else:
+            self.counts[reason] += 1
+            self.sent_seconds += duration
+            self._last_sent = time.monotonic()
+        return reason
+
+    def stats(self):
+        sent = self.counts["speech"] + self.counts["hangover"] + self.counts["heartbeat"]
+        total = sent + self.counts["suppressed"]
+        return {
+            **self.counts,
+            "sent": sent,
+            "suppressed_ratio": self.counts["suppressed"] / total if total else 0.0,
+            "sent_seconds": self.sent_seconds,
+            "suppressed_seconds": self.suppressed_seconds
+        }
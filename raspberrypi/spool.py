@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Persistent upload spool
+
+Every encoded chunk is recorded in a SQLite database (WAL mode) with its
+upload state, before any attempt to send it:
+- pending: waiting to be sent (new, or the last attempt failed)
+- sent: accepted by the transcription service; the audio is freed
+- rejected: refused for good (4xx, or too many server errors)
+- dropped: evicted unsent because the spool outgrew its size limit
+
+Chunks survive network outages, backend errors and restarts, and are
+handed out oldest first. Rows are kept after sending so the state of
+every chunk can be looked up; only the most recent `keep_rows` are.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+
+@dataclass
+class SpooledChunk:
+    id: int
+    chunk_number: int
+    timestamp_us: int
+    filename: str
+    audio: bytes
+    attempts: int
+
+
+class Spool:
+    def __init__(self, path, max_bytes, keep_rows=10000):
+        self.max_bytes = max_bytes
+        self.keep_rows = keep_rows
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS chunks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                chunk_number INTEGER NOT NULL,
+                timestamp_us INTEGER NOT NULL,
+                filename TEXT NOT NULL,
+                audio BLOB,
+                size INTEGER NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS chunks_state ON chunks (state, id)")
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def add(self, audio, filename, chunk_number, timestamp_us):
+        """Record a chunk as pending; returns how many old pending chunks were dropped for room"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT INTO chunks (chunk_number, timestamp_us, filename, audio, size, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (chunk_number, timestamp_us, filename, audio, len(audio), now, now)
+                )
+                dropped = self._evict(now)
+                self._conn.execute(
+                    "DELETE FROM chunks WHERE state != 'pending' AND id NOT IN "
+                    "(SELECT id FROM chunks ORDER BY id DESC LIMIT ?)",
+                    (self.keep_rows,)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return dropped
+
+    def _evict(self, now):
+        # Oldest pending audio goes first once the spool is over its limit
+        pending_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM chunks WHERE state = 'pending'").fetchone()[0]
+        dropped = 0
+        for chunk_id, size in self._conn.execute(
+            "SELECT id, size FROM chunks WHERE state = 'pending' ORDER BY id"
+        ).fetchall():
+            if pending_bytes <= self.max_bytes:
+                break
+            self._conn.execute(
+                "UPDATE chunks SET state = 'dropped', audio = NULL, updated_at = ? WHERE id = ?",
+                (now, chunk_id)
+            )
+            pending_bytes -= size
+            dropped += 1
+        return dropped
+
+    def pending(self, limit):
+        """The oldest `limit` pending chunks"""
+        rows = self._execute(
+            "SELECT id, chunk_number, timestamp_us, filename, audio, attempts FROM chunks "
+            "WHERE state = 'pending' ORDER BY id LIMIT ?",
+            (limit,)
+        )
+        return [SpooledChunk(*row) for row in rows]
+
+    def mark_sent(self, ids):
+        self._execute_many("UPDATE chunks SET state = 'sent', audio = NULL, updated_at = ? WHERE id = ?", ids)
+
+    def mark_rejected(self, ids, error):
+        self._execute_many(
+            "UPDATE chunks SET state = 'rejected', audio = NULL, last_error = ?, updated_at = ? WHERE id = ?",
+            ids,
+            error
+        )
+
+    def mark_failed(self, ids, error):
+        """A failed attempt: the chunks stay pending"""
+        self._execute_many(
+            "UPDATE chunks SET attempts = attempts + 1, last_error = ?, updated_at = ? WHERE id = ?",
+            ids,
+            error
+        )
+
+    def _execute_many(self, sql, ids, *params):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(sql, [(*params, now, chunk_id) for chunk_id in ids])
+
+    def counts(self):
+        """Chunks per state"""
+        return dict(self._execute("SELECT state, COUNT(*) FROM chunks GROUP BY state"))
+
+    def import_legacy(self, folder):
+        """
+        Move chunks spooled by older versions (a JSON entry per chunk
+        pointing at its audio file) into the database. Returns how many.
+        """
+        imported = 0
+        for name in sorted(os.listdir(folder)):
+            if not name.endswith(".json"):
+                continue
+            entry = os.path.join(folder, name)
+            with open(entry) as f:
+                pending = json.load(f)
+            if os.path.exists(pending["filepath"]):
+                with open(pending["filepath"], "rb") as f:
+                    audio = f.read()
+                self.add(audio, os.path.basename(pending["filepath"]), pending["chunk_number"], pending["timestamp_us"])
+                imported += 1
+                if os.path.dirname(pending["filepath"]) == folder:
+                    os.remove(pending["filepath"])
+            os.remove(entry)
+        return imported
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
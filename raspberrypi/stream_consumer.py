@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Redis Streams consumer for the queue method
+
+Reads chunk frames (chunk_protocol.py) from a stream as one consumer of
+a consumer group, encodes them and uploads them to the transcription
+service with a pooled keep-alive httpx.AsyncClient:
+- up to `concurrency` chunks are encoded and uploaded at once; more are
+  read from the stream as uploads finish, without polling
+- an entry is acknowledged (XACK) only once the service has it, or has
+  refused it for good; until then it stays pending in the group
+- 429, 503 and network errors pause every upload until Retry-After (plus
+  jitter) has passed, then the chunk is retried; other 5xx answers are
+  retried the same way up to `max_attempts` times, then the entry is
+  acknowledged as failed like a 4xx answer
+- chunks are encoded in `audio_format` when this libsndfile can write it
+  at the chunk's sample rate, in FLAC otherwise
+- entries this consumer read before a crash are processed first on
+  start, and entries left idle by a dead consumer for `claim_idle_ms`
+  are claimed (XAUTOCLAIM)
+
+Several consumers (processes or hosts) with different names share the
+stream's chunks. The Redis client (redis.asyncio, or fakeredis for a
+local stand-in) and the HTTP client are passed in.
+"""
+import asyncio
+import random
+import time
+from datetime import datetime
+import httpx
+from redis.exceptions import ResponseError
+import chunk_protocol
+import encode
+from retry_after import parse_retry_after
+
+
+class StreamConsumer:
+    def __init__(self, redis, http, stream, group, consumer, endpoint, session_id, audio_format="opus",
+                 concurrency=4, claim_idle_ms=60000, default_retry_after=10, block_ms=5000, max_attempts=5):
+        self.redis = redis
+        self.http = http
+        self.stream = stream
+        self.group = group
+        self.consumer = consumer
+        self.endpoint = endpoint
+        self.session_id = session_id
+        self.audio_format = audio_format
+        self.concurrency = concurrency
+        self.claim_idle_ms = claim_idle_ms
+        self.default_retry_after = default_retry_after
+        self.block_ms = block_ms
+        self.max_attempts = max_attempts
+        self.retry_not_before = 0.0
+        self._in_flight = {}  # entry id -> upload task
+        self._server_errors = {}  # entry id -> 5xx answers so far
+        self._formats = {}  # sample rate -> upload format
+        self._last_claim = 0.0
+
+        # Counters
+        self.counts = {"sent": 0, "failed": 0, "malformed": 0, "retries": 0, "claimed": 0}
+
+    async def ensure_group(self):
+        """Create the stream and group if needed; new groups start at the oldest entry"""
+        try:
+            await self.redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def run(self, stop_when_idle=False):
+        """
+        Consume until cancelled (or, with stop_when_idle, until nothing is
+        pending, in flight or arriving within `block_ms`).
+        """
+        await self.ensure_group()
+        # Our own pending entries first: read, but not acknowledged before a restart
+        recovering = "0"
+        try:
+            while True:
+                free = self.concurrency - len(self._in_flight)
+                if free <= 0:
+                    await asyncio.wait(self._in_flight.values(), return_when=asyncio.FIRST_COMPLETED)
+                    continue
+
+                entries = await self._claim(free)
+                if not entries:
+                    if recovering is not None:
+                        entries = await self._read(recovering, free, block=None)
+                        if entries:
+                            recovering = entries[-1][0]
+                        else:
+                            recovering = None
+                            continue
+                    else:
+                        # Waiting for new entries doesn't hold up the uploads in flight
+                        entries = await self._read(">", free, block=self.block_ms)
+
+                if not entries and stop_when_idle and not self._in_flight:
+                    return
+                for entry_id, fields in entries:
+                    if entry_id not in self._in_flight:
+                        self._in_flight[entry_id] = asyncio.create_task(self._process(entry_id, fields))
+        finally:
+            for task in self._in_flight.values():
+                task.cancel()
+
+    async def _read(self, start, count, block):
+        response = await self.redis.xreadgroup(self.group, self.consumer, {self.stream: start}, count=count, block=block)
+        return response[0][1] if response else []
+
+    async def _claim(self, count):
+        """Entries another consumer read but hasn't acknowledged for claim_idle_ms"""
+        if time.monotonic() - self._last_claim < self.claim_idle_ms / 1000:
+            return []
+        self._last_claim = time.monotonic()
+        response = await self.redis.xautoclaim(
+            self.stream, self.group, self.consumer, self.claim_idle_ms, start_id="0-0", count=count
+        )
+        entries = [(entry_id, fields) for entry_id, fields in response[1] if entry_id not in self._in_flight]
+        if entries:
+            print(f"🪝 Claimed {len(entries)} chunk(s) left by another consumer")
+            self.counts["claimed"] += len(entries)
+        return entries
+
+    async def _process(self, entry_id, fields):
+        try:
+            try:
+                chunk = chunk_protocol.unpack(fields[chunk_protocol.FIELD.encode()])
+            except (KeyError, TypeError, ValueError) as e:
+                # Trimmed away, or not one of ours: retrying can't help
+                print(f"❌ Dropping malformed entry {entry_id.decode()}: {e}")
+                self.counts["malformed"] += 1
+                await self.redis.xack(self.stream, self.group, entry_id)
+                return
+
+            print(f"🎧 Processing chunk: {chunk.chunk_number}")
+            fmt = self._format(chunk.sample_rate)
+            audio = await asyncio.to_thread(encode.encode, chunk.pcm, chunk.sample_rate, fmt)
+            stamp = datetime.fromtimestamp(chunk.timestamp_us / 1_000_000).strftime("%Y%m%d_%H%M%S")
+            filename = f"chunk_{chunk.chunk_number:04d}_{stamp}{encode.extension(fmt)}"
+
+            await self._hold(entry_id)
+            while (retry_after := await self._upload(entry_id, chunk, filename, audio)) is not None:
+                self.counts["retries"] += 1
+                # Jitter keeps consumers from retrying in lockstep
+                self.retry_not_before = max(
+                    self.retry_not_before,
+                    time.time() + retry_after + random.uniform(0, retry_after * 0.1)
+                )
+                await self._hold(entry_id)
+
+            await self.redis.xack(self.stream, self.group, entry_id)
+        except Exception as e:
+            # Left pending: claimed and retried once idle for claim_idle_ms
+            print(f"❌ Error processing entry {entry_id.decode()}: {e}")
+        finally:
+            del self._in_flight[entry_id]
+            self._server_errors.pop(entry_id, None)
+
+    def _format(self, sample_rate):
+        """audio_format if it can be written at this rate, else FLAC"""
+        if sample_rate not in self._formats:
+            fmt = self.audio_format
+            if not encode.is_supported(fmt, sample_rate):
+                # Opus needs libsndfile >= 1.0.29 and an Opus sample rate
+                print(f"⚠️  {fmt} encoding not available at {sample_rate}Hz, using FLAC")
+                fmt = "flac"
+            self._formats[sample_rate] = fmt
+        return self._formats[sample_rate]
+
+    async def _hold(self, entry_id):
+        """
+        Wait out a back-off. Claiming the entry again every half
+        claim_idle_ms resets its idle time, so no other consumer takes it over.
+        """
+        while (wait := self.retry_not_before - time.time()) > 0:
+            await self.redis.xclaim(self.stream, self.group, self.consumer, 0, [entry_id], justid=True)
+            await asyncio.sleep(min(wait, self.claim_idle_ms / 2000))
+
+    async def _upload(self, entry_id, chunk, filename, audio):
+        """
+        Send one chunk. Returns the seconds to wait before retrying when the
+        service is overloaded, failing or unreachable, None when it is done with.
+        """
+        # Get current timestamp in microseconds (Unix epoch)
+        timestamp_us = int(time.time() * 1_000_000)
+
+        files = {
+            "audio_file": (filename, audio, encode.mime_type(filename))
+        }
+
+        data = {
+            "chunk_number": str(chunk.chunk_number),
+            "time": str(chunk.timestamp_us),
+            "timestamp_us": str(timestamp_us),  # Microsecond precision timestamp
+            "session_id": self.session_id
+        }
+
+        try:
+            response = await self.http.post(self.endpoint, files=files, data=data)
+        except httpx.HTTPError as e:
+            print(f"❌ Network error sending chunk {chunk.chunk_number}: {e!r}")
+            return self.default_retry_after
+
+        if response.status_code in (429, 503):
+            wait = parse_retry_after(response.headers.get("Retry-After"), self.default_retry_after)
+            print(f"⏳ Service busy, chunk {chunk.chunk_number} will be retried in {wait}s")
+            return wait
+
+        if response.is_server_error:
+            errors = self._server_errors[entry_id] = self._server_errors.get(entry_id, 0) + 1
+            if errors < self.max_attempts:
+                # Kept pending like a 503: the service may well take it once it recovers
+                print(f"❌ Service error {response.status_code} for chunk {chunk.chunk_number}, retrying in {self.default_retry_after}s")
+                return self.default_retry_after
+            # The chunk itself may be what the service chokes on: stop holding up the rest
+            print(f"❌ Service error {response.status_code} for chunk {chunk.chunk_number}, giving up after {errors} attempts")
+            self.counts["failed"] += 1
+            return None
+
+        if response.is_success:
+            print(f"✅ Chunk {chunk.chunk_number} sent successfully ({len(audio) / 1024:.1f} KB {self.audio_format})")
+            print(f"   Response: {response.json()}")
+            self.counts["sent"] += 1
+        else:
+            print(f"❌ Failed to send chunk {chunk.chunk_number}: {response.status_code}")
+            print(f"   Error: {response.text}")
+            self.counts["failed"] += 1
+        return None
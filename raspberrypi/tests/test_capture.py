@@ -0,0 +1,123 @@
+import numpy as np
+from capture import AudioCapture, RingBuffer, SyntheticSource
+
+
+def ramp(start, count):
+    return np.arange(start, start + count, dtype=np.int16)
+
+
+class ManualSource:
+    """Calls back only when the test pushes a block."""
+
+    overflows = 0
+
+    def start(self, callback):
+        self.callback = callback
+
+    def stop(self):
+        pass
+
+    def push(self, frames):
+        self.callback(frames)
+
+
+def test_ring_wraps_around():
+    ring = RingBuffer(10)
+    ring.write(ramp(0, 7))
+    position, frames = ring.read(5)
+    assert position == 0 and (frames[:, 0] == ramp(0, 5)).all()
+
+    ring.write(ramp(7, 6))  # wraps past the end of the buffer
+    position, frames = ring.read(8)
+    assert position == 5 and (frames[:, 0] == ramp(5, 8)).all()
+    assert ring.stats()["dropped_frames"] == 0
+
+
+def test_overrun_drops_new_frames_and_keeps_positions():
+    ring = RingBuffer(10)
+    ring.write(ramp(0, 8))
+    ring.write(ramp(8, 5))  # only 2 fit
+    stats = ring.stats()
+    assert stats["dropped_frames"] == 3
+    assert stats["peak_occupancy"] == 1.0
+
+    position, frames = ring.read(10)
+    assert position == 0 and (frames[:, 0] == ramp(0, 10)).all()
+
+    # Frames 10-12 were lost; the next ones start at stream position 13
+    ring.write(ramp(13, 4))
+    position, frames = ring.read(4)
+    assert position == 13 and (frames[:, 0] == ramp(13, 4)).all()
+
+
+def test_read_times_out():
+    ring = RingBuffer(10)
+    ring.write(ramp(0, 3))
+    assert ring.read(5, timeout=0.01) is None
+    assert ring.stats()["buffered_frames"] == 3
+
+
+def test_close_drains_the_rest():
+    ring = RingBuffer(10)
+    ring.write(ramp(0, 3))
+    ring.close()
+    position, frames = ring.read(5)
+    assert position == 0 and len(frames) == 3
+    assert ring.read(5) is None
+
+
+def test_chunks_are_back_to_back():
+    source = ManualSource()
+    capture = AudioCapture(source, sample_rate=1000, buffer_seconds=5)
+    capture.start()
+    # Blocks that don't line up with chunk boundaries
+    for start in range(0, 2500, 300):
+        source.push(ramp(start, 300))
+
+    first, second = capture.read_chunk(1.0), capture.read_chunk(1.0)
+    assert first[0] == capture.started_at_us
+    assert (first[1][:, 0] == ramp(0, 1000)).all()
+    assert second[0] == capture.started_at_us + 1_000_000
+    assert (second[1][:, 0] == ramp(1000, 1000)).all()
+    assert capture.read_chunk(1.0, timeout=0.01) is None
+
+    capture.stop()
+    timestamp_us, rest = capture.read_chunk(1.0)
+    assert timestamp_us == capture.started_at_us + 2_000_000
+    assert (rest[:, 0] == ramp(2000, 700)).all()
+    assert capture.read_chunk(1.0) is None
+
+
+def test_overrun_shifts_later_timestamps():
+    source = ManualSource()
+    capture = AudioCapture(source, sample_rate=1000, buffer_seconds=1)
+    capture.start()
+    source.push(ramp(0, 1500))  # 500 frames don't fit
+
+    timestamp_us, frames = capture.read_chunk(1.0)
+    assert timestamp_us == capture.started_at_us
+    assert (frames[:, 0] == ramp(0, 1000)).all()
+
+    source.push(ramp(1500, 1000))
+    timestamp_us, frames = capture.read_chunk(1.0)
+    # Starts 1.5s in: the dropped half second is not papered over
+    assert timestamp_us == capture.started_at_us + 1_500_000
+    assert (frames[:, 0] == ramp(1500, 1000)).all()
+    assert capture.stats()["dropped_frames"] == 500
+
+
+def test_synthetic_source_faster_than_real_time():
+    source = SyntheticSource(8000, 1, blocksize=256, realtime=False)
+    capture = AudioCapture(source, sample_rate=8000, buffer_seconds=2)
+    capture.start()
+    chunks = [capture.read_chunk(0.5, timeout=5) for _ in range(4)]
+    capture.stop()
+
+    signal = source._signal[:, 0]
+    timestamps = [timestamp_us for timestamp_us, _ in chunks]
+    assert all(b - a >= 500_000 for a, b in zip(timestamps, timestamps[1:]))
+    for timestamp_us, frames in chunks:
+        assert len(frames) == 4000
+        # Each chunk starts where its timestamp says, drops or not
+        position = (timestamp_us - capture.started_at_us) * 8000 // 1_000_000
+        assert frames[0, 0] == signal[position % len(signal)]
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+import chunk_protocol
+
+
+def test_round_trip_mono():
+    pcm = (np.random.default_rng(0).standard_normal(16000) * 3000).astype(np.int16)
+    chunk = chunk_protocol.unpack(chunk_protocol.pack(7, 1737158400000000, 16000, pcm))
+    assert chunk.chunk_number == 7
+    assert chunk.timestamp_us == 1737158400000000
+    assert chunk.sample_rate == 16000
+    assert chunk.pcm.shape == (16000, 1)
+    assert (chunk.pcm[:, 0] == pcm).all()
+
+
+def test_round_trip_stereo():
+    pcm = np.arange(2 * 480, dtype=np.int16).reshape(480, 2)
+    frame = chunk_protocol.pack(1, 0, 48000, pcm)
+    assert len(frame) == chunk_protocol.HEADER.size + pcm.nbytes
+    chunk = chunk_protocol.unpack(frame)
+    assert chunk.sample_rate == 48000
+    assert (chunk.pcm == pcm).all()
+
+
+@pytest.fixture
+def frame():
+    return chunk_protocol.pack(3, 42, 16000, np.zeros(100, dtype=np.int16))
+
+
+def test_rejects_short_frame(frame):
+    with pytest.raises(ValueError, match="too short"):
+        chunk_protocol.unpack(frame[:10])
+
+
+def test_rejects_truncated_payload(frame):
+    with pytest.raises(ValueError, match="payload"):
+        chunk_protocol.unpack(frame[:-2])
+
+
+def test_rejects_bad_magic(frame):
+    with pytest.raises(ValueError, match="magic"):
+        chunk_protocol.unpack(b"XXXX" + frame[4:])
+
+
+def test_rejects_unknown_version(frame):
+    with pytest.raises(ValueError, match="version"):
+        chunk_protocol.unpack(frame[:4] + bytes([chunk_protocol.VERSION + 1]) + frame[5:])
+
+
+def test_rejects_pickle():
+    import pickle
+    with pytest.raises(ValueError):
+        chunk_protocol.unpack(pickle.dumps({"chunk_number": 1}))
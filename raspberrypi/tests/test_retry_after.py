@@ -0,0 +1,24 @@
+import time
+from email.utils import formatdate
+import pytest
+from retry_after import parse_retry_after
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, 10),
+    ("120", 120),
+    (" 5 ", 5),
+    ("-3", 0),
+    ("soon", 10),
+    ("", 10),
+    # Already passed
+    ("Wed, 21 Oct 2015 07:28:00 GMT", 0),
+    # Not an HTTP date: no zone
+    ("Wed, 21 Oct 2015 07:28:00", 10),
+])
+def test_parse(value, expected):
+    assert parse_retry_after(value, 10) == expected
+
+
+def test_http_date_in_the_future():
+    assert 58 <= parse_retry_after(formatdate(time.time() + 60, usegmt=True), 10) <= 60
@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+import speech_gate
+from speech_gate import SpeechGate
+
+RATE = 16000
+CHUNK = 10  # seconds
+
+
+def samples(seconds):
+    return np.arange(int(RATE * seconds)) / RATE
+
+
+def silence(seconds=CHUNK):
+    return np.zeros((int(RATE * seconds), 1), dtype=np.int16)
+
+
+def speech(seconds=CHUNK):
+    # Voiced harmonics with a gliding pitch, in syllable-rate bursts
+    t = samples(seconds)
+    pitch = 140 + 30 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / RATE
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 20))
+    wave = 0.2 * voiced * np.clip(np.sin(2 * np.pi * 3 * t), 0, None)
+    return (wave * 32767).astype(np.int16).reshape(-1, 1)
+
+
+def trailing_speech(speech_seconds):
+    """Silence with speech in its last `speech_seconds`"""
+    return np.concatenate([silence(CHUNK - speech_seconds), speech(speech_seconds)])
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(speech_gate.time, "monotonic", lambda: now[0])
+    return now
+
+
+def gate(**kwargs):
+    return SpeechGate(RATE, **{"min_speech_ms": 300, "hangover_ms": 1500, "heartbeat_seconds": 300, **kwargs})
+
+
+def test_rejects_rates_vad_cant_handle():
+    with pytest.raises(ValueError):
+        SpeechGate(44100)
+
+
+def test_speech_is_sent_silence_suppressed(clock):
+    g = gate()
+    assert g.check(speech(), 0) == "speech"
+    clock[0] += CHUNK
+    assert g.check(silence(), 100) is None
+    assert g.counts == {"speech": 1, "hangover": 0, "heartbeat": 0, "suppressed": 1}
+    assert g.stats()["suppressed_ratio"] == 0.5
+    assert g.stats()["sent_seconds"] == g.stats()["suppressed_seconds"] == CHUNK
+
+
+def test_too_little_speech_is_suppressed(clock):
+    g = gate(min_speech_ms=3000)
+    assert g.check(trailing_speech(1), 0) is None
+
+
+@pytest.mark.parametrize("gap, expected", [
+    # Speech ran up to the chunk boundary: the next chunk is sent
+    (0, "hangover"),
+    # The next chunk starts after the hangover has run out
+    (2, None),
+])
+def test_hangover_after_speech(clock, gap, expected):
+    g = gate()
+    assert g.check(trailing_speech(2), 0) == "speech"
+    clock[0] += CHUNK
+    assert g.check(silence(), CHUNK + gap) == expected
+    # A chunk later the hangover is over either way
+    clock[0] += CHUNK
+    assert g.check(silence(), 2 * CHUNK + gap) is None
+
+
+def test_heartbeat_after_quiet_period(clock):
+    g = gate(heartbeat_seconds=30)
+    results = []
+    for i in range(6):
+        clock[0] += CHUNK
+        results.append(g.check(silence(), i * CHUNK))
+    # Nothing sent since the gate started at t=1000: due at 1030, then again 30s later
+    assert results == [None, None, "heartbeat", None, None, "heartbeat"]
+    assert g.counts["heartbeat"] == 2 and g.counts["suppressed"] == 4
+
+
+def test_speech_resets_the_heartbeat(clock):
+    g = gate(heartbeat_seconds=30)
+    clock[0] += 25
+    assert g.check(speech(), 0) == "speech"
+    clock[0] += 25
+    assert g.check(silence(), 100) is None
+
+
+def test_stereo_is_mixed_down(clock):
+    stereo = np.repeat(speech(), 2, axis=1)
+    assert gate().check(stereo, 0) == "speech"
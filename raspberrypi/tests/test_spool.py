@@ -0,0 +1,96 @@
+import json
+from spool import Spool
+
+
+def spool(tmp_path, max_bytes=1000, keep_rows=100):
+    return Spool(str(tmp_path / "spool.db"), max_bytes, keep_rows)
+
+
+def add(s, *numbers, size=100):
+    return sum(s.add(b"x" * size, f"chunk_{n:04d}.wav", n, n * 1_000_000) for n in numbers)
+
+
+def audio(s, state):
+    return [row[0] for row in s._execute("SELECT audio FROM chunks WHERE state = ? ORDER BY id", (state,))]
+
+
+def test_pending_oldest_first(tmp_path):
+    s = spool(tmp_path)
+    add(s, 1, 2, 3)
+    chunks = s.pending(2)
+    assert [c.chunk_number for c in chunks] == [1, 2]
+    assert chunks[0].audio == b"x" * 100 and chunks[0].attempts == 0
+    assert s.counts() == {"pending": 3}
+
+
+def test_state_transitions(tmp_path):
+    s = spool(tmp_path)
+    add(s, 1, 2, 3)
+    one, two, three = s.pending(3)
+    s.mark_sent([one.id])
+    s.mark_rejected([two.id], "HTTP 400")
+    s.mark_failed([three.id], "HTTP 500")
+
+    assert s.counts() == {"sent": 1, "rejected": 1, "pending": 1}
+    # Only what is still pending keeps its audio
+    assert audio(s, "sent") == [None] and audio(s, "rejected") == [None]
+    retry, = s.pending(3)
+    assert (retry.id, retry.attempts) == (three.id, 1)
+    assert s._execute("SELECT last_error FROM chunks WHERE id = ?", (two.id,)) == [("HTTP 400",)]
+
+
+def test_eviction_drops_oldest_pending(tmp_path):
+    s = spool(tmp_path, max_bytes=350)
+    assert add(s, 1, 2, 3) == 0
+    assert add(s, 4) == 1
+    assert add(s, 5, 6) == 2
+    assert [c.chunk_number for c in s.pending(10)] == [4, 5, 6]
+    assert s.counts() == {"dropped": 3, "pending": 3}
+    assert audio(s, "dropped") == [None, None, None]
+
+
+def test_eviction_ignores_sent_audio(tmp_path):
+    s = spool(tmp_path, max_bytes=250)
+    add(s, 1, 2)
+    s.mark_sent([c.id for c in s.pending(2)])
+    assert add(s, 3, 4) == 0
+    assert s.counts() == {"sent": 2, "pending": 2}
+
+
+def test_keep_rows_trims_finished_rows_only(tmp_path):
+    s = spool(tmp_path, max_bytes=10_000, keep_rows=3)
+    add(s, 1, 2)
+    s.mark_sent([c.id for c in s.pending(2)])
+    add(s, 3, 4, 5)
+    # Sent rows beyond the newest keep_rows go; pending ones never do
+    assert s.counts() == {"pending": 3}
+    add(s, 6)
+    assert [c.chunk_number for c in s.pending(10)] == [3, 4, 5, 6]
+
+
+def test_survives_reopen(tmp_path):
+    s = spool(tmp_path)
+    add(s, 1, 2)
+    s.mark_failed([s.pending(1)[0].id], "timeout")
+    s.close()
+    reopened = spool(tmp_path)
+    assert [(c.chunk_number, c.attempts) for c in reopened.pending(10)] == [(1, 1), (2, 0)]
+
+
+def test_import_legacy(tmp_path):
+    folder = tmp_path / "spool"
+    folder.mkdir()
+    for n in (2, 1):
+        (folder / f"chunk_{n}.wav").write_bytes(b"audio%d" % n)
+        (folder / f"chunk_{n}.json").write_text(json.dumps(
+            {"filepath": str(folder / f"chunk_{n}.wav"), "chunk_number": n, "timestamp_us": n}
+        ))
+    # An entry whose audio is gone is cleaned up, not imported
+    (folder / "chunk_3.json").write_text(json.dumps(
+        {"filepath": str(folder / "missing.wav"), "chunk_number": 3, "timestamp_us": 3}
+    ))
+
+    s = spool(tmp_path)
+    assert s.import_legacy(str(folder)) == 2
+    assert [(c.chunk_number, c.audio) for c in s.pending(10)] == [(1, b"audio1"), (2, b"audio2")]
+    assert list(folder.iterdir()) == []
@@ -0,0 +1,204 @@
+import asyncio
+import re
+import fakeredis
+import httpx
+import numpy as np
+import chunk_protocol
+from stream_consumer import StreamConsumer
+
+STREAM = "audio_stream:test"
+GROUP = "transcribers"
+PCM = np.zeros((1600, 1), dtype=np.int16)
+
+
+def chunk_number(request):
+    return int(re.search(rb'name="chunk_number"\r\n\r\n(\d+)', request.read()).group(1))
+
+
+class Backend:
+    """MockTransport handler answering from a list of status codes, then 200."""
+
+    def __init__(self, statuses=(), headers=None):
+        self.statuses = list(statuses)
+        self.headers = headers or {}
+        self.uploads = []
+
+    def __call__(self, request):
+        number = chunk_number(request)
+        if self.statuses:
+            return httpx.Response(self.statuses.pop(0), headers=self.headers)
+        self.uploads.append(number)
+        return httpx.Response(200, json={"chunk": number})
+
+
+def consumer(redis, backend, name="a", **kwargs):
+    http = httpx.AsyncClient(transport=httpx.MockTransport(backend))
+    kwargs = {"audio_format": "wav", "block_ms": 100, "default_retry_after": 1, **kwargs}
+    return StreamConsumer(redis, http, STREAM, GROUP, name, "http://service/transcribe-chunk", "pendant-1", **kwargs)
+
+
+async def add_chunks(redis, numbers):
+    for number in numbers:
+        await redis.xadd(STREAM, {chunk_protocol.FIELD: chunk_protocol.pack(number, number, 16000, PCM)})
+
+
+async def pending(redis):
+    return (await redis.xpending(STREAM, GROUP))["pending"]
+
+
+def test_acks_after_success():
+    async def scenario():
+        r = fakeredis.aioredis.FakeRedis()
+        await add_chunks(r, [1, 2, 3])
+        backend = Backend()
+        c = consumer(r, backend)
+        await c.run(stop_when_idle=True)
+        return backend, c, await pending(r)
+
+    backend, c, left = asyncio.run(scenario())
+    assert sorted(backend.uploads) == [1, 2, 3]
+    assert c.counts["sent"] == 3
+    assert left == 0
+
+
+def test_malformed_entry_is_acked():
+    async def scenario():
+        r = fakeredis.aioredis.FakeRedis()
+        await r.xadd(STREAM, {chunk_protocol.FIELD: b"garbage"})
+        await r.xadd(STREAM, {"other": b"field"})
+        c = consumer(r, Backend())
+        await c.run(stop_when_idle=True)
+        return c, await pending(r)
+
+    c, left = asyncio.run(scenario())
+    assert c.counts["malformed"] == 2
+    assert left == 0
+
+
+def test_429_holds_the_entry_until_retried():
+    async def scenario():
+        server = fakeredis.FakeServer()
+        r = fakeredis.aioredis.FakeRedis(server=server)
+        await add_chunks(r, [1])
+        backend = Backend([429], {"Retry-After": "1"})
+        # b would take over an entry idle for 300ms; a's hold keeps it busy
+        a = consumer(r, backend, "a", claim_idle_ms=300)
+        b = consumer(fakeredis.aioredis.FakeRedis(server=server), backend, "b", claim_idle_ms=300)
+        await a.ensure_group()
+        run_a = asyncio.create_task(a.run(stop_when_idle=True))
+        await asyncio.sleep(0.5)
+        await b.run(stop_when_idle=True)
+        await run_a
+        return backend, a, b, await pending(r)
+
+    backend, a, b, left = asyncio.run(scenario())
+    assert backend.uploads == [1]
+    assert a.counts["retries"] == 1 and a.counts["sent"] == 1
+    assert b.counts["claimed"] == 0
+    assert left == 0
+
+
+def test_server_error_keeps_the_entry_pending():
+    async def scenario():
+        r = fakeredis.aioredis.FakeRedis()
+        await add_chunks(r, [1])
+        backend = Backend([500])
+        c = consumer(r, backend)
+        task = asyncio.create_task(c.run(stop_when_idle=True))
+        await asyncio.sleep(0.5)
+        # Backing off: not acknowledged
+        during = await pending(r)
+        await task
+        return backend, c, during, await pending(r)
+
+    backend, c, during, left = asyncio.run(scenario())
+    assert during == 1
+    assert backend.uploads == [1]
+    assert c.counts == {**c.counts, "sent": 1, "failed": 0, "retries": 1}
+    assert left == 0
+
+
+def test_server_error_is_given_up_after_max_attempts():
+    async def scenario():
+        r = fakeredis.aioredis.FakeRedis()
+        await add_chunks(r, [1, 2])
+        backend = Backend([500, 500])
+        c = consumer(r, backend, default_retry_after=0, max_attempts=2, concurrency=1)
+        await c.run(stop_when_idle=True)
+        return backend, c, await pending(r)
+
+    backend, c, left = asyncio.run(scenario())
+    # Chunk 1 failed twice and was dropped; chunk 2 was not held up by it
+    assert backend.uploads == [2]
+    assert c.counts == {**c.counts, "sent": 1, "failed": 1, "retries": 1}
+    assert left == 0
+
+
+def test_falls_back_to_flac_when_the_rate_cant_be_encoded():
+    names = []
+
+    def backend(request):
+        names.append(re.search(rb'filename="([^"]+)"', request.read()).group(1).decode())
+        return httpx.Response(200, json={})
+
+    async def scenario():
+        r = fakeredis.aioredis.FakeRedis()
+        # Opus has no 44.1kHz mode
+        await r.xadd(STREAM, {chunk_protocol.FIELD: chunk_protocol.pack(1, 1, 44100, PCM)})
+        c = consumer(r, backend, audio_format="opus")
+        await c.run(stop_when_idle=True)
+        return c
+
+    c = asyncio.run(scenario())
+    assert c.counts["sent"] == 1
+    assert names[0].endswith(".flac")
+
+
+def test_client_error_is_final():
+    async def scenario():
+        r = fakeredis.aioredis.FakeRedis()
+        await add_chunks(r, [1])
+        c = consumer(r, Backend([400]))
+        await c.run(stop_when_idle=True)
+        return c, await pending(r)
+
+    c, left = asyncio.run(scenario())
+    assert c.counts["failed"] == 1 and c.counts["retries"] == 0
+    assert left == 0
+
+
+def test_resends_own_pending_entries_after_a_restart():
+    async def scenario():
+        r = fakeredis.aioredis.FakeRedis()
+        await add_chunks(r, [1, 2, 3])
+        await r.xgroup_create(STREAM, GROUP, id="0")
+        # Read by "a" before it crashed, never acknowledged
+        await r.xreadgroup(GROUP, "a", {STREAM: ">"}, count=2)
+        backend = Backend()
+        c = consumer(r, backend, "a")
+        await c.run(stop_when_idle=True)
+        return backend, c, await pending(r)
+
+    backend, c, left = asyncio.run(scenario())
+    assert sorted(backend.uploads) == [1, 2, 3]
+    assert c.counts["claimed"] == 0
+    assert left == 0
+
+
+def test_claims_entries_a_dead_consumer_left():
+    async def scenario():
+        r = fakeredis.aioredis.FakeRedis()
+        await add_chunks(r, [1, 2, 3])
+        await r.xgroup_create(STREAM, GROUP, id="0")
+        await r.xreadgroup(GROUP, "dead", {STREAM: ">"}, count=2)
+        await asyncio.sleep(0.2)
+        backend = Backend()
+        c = consumer(r, backend, "b", claim_idle_ms=100)
+        await c.run(stop_when_idle=True)
+        consumers = {entry["name"]: entry["pending"] for entry in await r.xinfo_consumers(STREAM, GROUP)}
+        return backend, c, consumers
+
+    backend, c, consumers = asyncio.run(scenario())
+    assert sorted(backend.uploads) == [1, 2, 3]
+    assert c.counts["claimed"] == 2
+    assert consumers.get(b"dead", 0) == 0
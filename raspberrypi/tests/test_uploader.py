@@ -0,0 +1,88 @@
+import threading
+import time
+from email.utils import formatdate
+import requests
+from spool import Spool
+from uploader import Uploader
+
+
+class Response:
+    def __init__(self, status_code, payload=None, headers=None):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.headers = headers or {}
+        self.text = ""
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+
+class Session:
+    """Stands in for requests.Session, answering from a list of responses, then OK."""
+
+    def __init__(self, responses=()):
+        self.responses = list(responses)
+        self.posts = []
+
+    def post(self, url, files, data, timeout):
+        numbers = data.get("chunk_numbers") or [data["chunk_number"]]
+        self.posts.append((url, numbers))
+        if self.responses:
+            response = self.responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+        if "chunk_numbers" in data:
+            return Response(200, {"results": [{"status": "queued"} for _ in numbers]})
+        return Response(200, {"status": "queued"})
+
+    def close(self):
+        pass
+
+
+def uploader(tmp_path, numbers, responses=(), batch_size=2):
+    spool = Spool(str(tmp_path / "spool.db"), 10_000)
+    for n in numbers:
+        spool.add(b"audio", f"chunk_{n:04d}.wav", n, n)
+    u = Uploader(spool, "http://service/transcribe-chunk", "http://service/transcribe-chunk/batch", "pendant-1",
+                 batch_size=batch_size, default_retry_after=30)
+    u.session = Session(responses)
+    return u
+
+
+def test_backlog_goes_out_in_order(tmp_path):
+    u = uploader(tmp_path, range(1, 8))
+    assert u.drain(threading.Event()) is None
+    assert [numbers for _, numbers in u.session.posts] == [[1, 2], [3, 4], [5, 6], [7]]
+    assert u.spool.counts() == {"sent": 7}
+
+
+def test_busy_backend_stops_the_drain(tmp_path):
+    u = uploader(tmp_path, range(1, 6), [Response(200, {"results": [{"status": "queued"}] * 2}),
+                                         Response(503, headers={"Retry-After": "5"})])
+    wait = u.drain(threading.Event())
+    assert 0 < wait <= 5.5
+    # Nothing after the refused batch was sent ahead of it
+    assert [numbers for _, numbers in u.session.posts] == [[1, 2], [3, 4]]
+    assert [c.chunk_number for c in u.spool.pending(10)] == [3, 4, 5]
+
+
+def test_retry_after_as_http_date(tmp_path):
+    later = formatdate(time.time() + 20, usegmt=True)
+    u = uploader(tmp_path, [1, 2], [Response(429, headers={"Retry-After": later})])
+    assert 18 <= u.drain(threading.Event()) <= 22.5
+    assert [c.chunk_number for c in u.spool.pending(10)] == [1, 2]
+
+
+def test_network_error_keeps_chunks_pending(tmp_path):
+    u = uploader(tmp_path, [1], [requests.exceptions.ConnectionError("down")])
+    assert u.drain(threading.Event()) > 0
+    assert [c.chunk_number for c in u.spool.pending(10)] == [1]
+
+
+def test_client_error_rejects_server_error_retries(tmp_path):
+    u = uploader(tmp_path, [1, 2], [Response(400), Response(500)], batch_size=1)
+    assert u.drain(threading.Event()) > 0
+    assert u.spool.counts() == {"rejected": 1, "pending": 1}
+    assert u.spool.pending(1)[0].attempts == 1
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Spool uploader
+
+Sends the chunks pending in the spool (spool.py) to the transcription
+service, oldest first, over one keep-alive requests.Session:
+- a single pending chunk goes to the regular endpoint, as it always did
+- a backlog (after an outage, or a slow uplink) goes out in batches of
+  `batch_size` chunks per request to the batch endpoint, one request at
+  a time so the service receives them in chunk order
+- 429/503 (or chunks the batch endpoint rejected) and network errors stop
+  the drain until Retry-After (plus jitter) has passed; the chunks stay
+  pending, however long the outage
+- other server errors count as an attempt and back off too; after
+  `max_attempts` the chunk is rejected, as are chunks the service
+  refuses outright (4xx)
+- a service without the batch endpoint (404/405) gets single uploads
+"""
+import random
+import time
+import requests
+from requests.adapters import HTTPAdapter
+import encode
+from retry_after import parse_retry_after
+
+# Per-chunk batch results that mean the service has the chunk
+DONE_STATUSES = ("queued", "skipped", "pending", "processing", "completed")
+
+
+class Uploader:
+    def __init__(self, spool, endpoint, batch_endpoint, session_id, batch_size=8,
+                 timeout=30, max_attempts=5, default_retry_after=10):
+        self.spool = spool
+        self.endpoint = endpoint
+        self.batch_endpoint = batch_endpoint
+        self.session_id = session_id
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.default_retry_after = default_retry_after
+        self.batching = batch_size > 1 and bool(batch_endpoint)
+        self.retry_not_before = 0.0
+
+        # One keep-alive connection, reused for every request
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        # Counters
+        self.requests = 0
+        self.sent = 0
+
+    def drain(self, stopping):
+        """
+        Send pending chunks until the spool is empty, the backend asks us to
+        back off, or `stopping` is set. Returns the seconds until the next
+        attempt is due, or None when nothing is left to send.
+        """
+        while not stopping.is_set():
+            wait = self.retry_not_before - time.time()
+            if wait > 0:
+                print(f"   💤 Backend asked us to back off, {self.spool.counts().get('pending', 0)} chunk(s) spooled")
+                return wait
+
+            chunks = self.spool.pending(self.batch_size if self.batching else 1)
+            if not chunks:
+                return None
+
+            # Oldest chunks first, one request at a time, so they arrive in order
+            retry_after = self._send(chunks)
+            if retry_after is not None:
+                # Jitter keeps a fleet of devices from retrying in lockstep
+                self.retry_not_before = time.time() + retry_after + random.uniform(0, retry_after * 0.1)
+        return None
+
+    def _send(self, chunks):
+        """Send one group; returns seconds to back off, or None"""
+        try:
+            if len(chunks) == 1 or not self.batching:
+                return self._send_single(chunks[0])
+            return self._send_batch(chunks)
+        except requests.exceptions.RequestException as e:
+            print(f"   ❌ Network error: {e}")
+            return self.default_retry_after
+
+    def _send_single(self, chunk):
+        files = {
+            "audio_file": (chunk.filename, chunk.audio, encode.mime_type(chunk.filename))
+        }
+
+        data = {
+            "chunk_number": chunk.chunk_number,
+            "time": chunk.timestamp_us,
+            "timestamp_us": chunk.timestamp_us,
+            "session_id": self.session_id
+        }
+
+        print(f"   📤 Sending chunk {chunk.chunk_number} to backend...")
+        response = self.session.post(self.endpoint, files=files, data=data, timeout=self.timeout)
+        self.requests += 1
+
+        if response.status_code in (429, 503):
+            return self._retry_after(response)
+
+        if response.ok:
+            print(f"   ✅ Successfully sent chunk {chunk.chunk_number} to backend")
+            print(f"   📊 Response: {response.json()}")
+            self.spool.mark_sent([chunk.id])
+            self.sent += 1
+        else:
+            print(f"   ❌ Backend error for chunk {chunk.chunk_number}: {response.status_code}")
+            print(f"   📄 Error: {response.text}")
+            return self._failed([chunk], f"HTTP {response.status_code}", permanent=response.status_code < 500)
+        return None
+
+    def _send_batch(self, chunks):
+        files = [
+            ("audio_files", (chunk.filename, chunk.audio, encode.mime_type(chunk.filename)))
+            for chunk in chunks
+        ]
+
+        data = {
+            "chunk_numbers": [chunk.chunk_number for chunk in chunks],
+            "times": [chunk.timestamp_us for chunk in chunks],
+            "session_id": self.session_id
+        }
+
+        first, last = chunks[0].chunk_number, chunks[-1].chunk_number
+        print(f"   📤 Sending chunks {first}-{last} to backend as a batch...")
+        response = self.session.post(self.batch_endpoint, files=files, data=data, timeout=self.timeout)
+        self.requests += 1
+
+        if response.status_code in (404, 405):
+            print("   ⚠️  Backend has no batch endpoint, sending chunks one at a time")
+            self.batching = False
+            return None
+
+        if response.status_code == 413 and self.batch_size > 1:
+            self.batch_size //= 2
+            print(f"   ⚠️  Batch too large, sending {self.batch_size} chunks per batch")
+            return None
+
+        if response.status_code in (429, 503):
+            return self._retry_after(response)
+
+        if not response.ok:
+            print(f"   ❌ Backend error for chunks {first}-{last}: {response.status_code}")
+            print(f"   📄 Error: {response.text}")
+            return self._failed(chunks, f"HTTP {response.status_code}", permanent=response.status_code < 500)
+
+        results = response.json()["results"]
+        statuses = [result["status"] for result in results]
+        sent = [chunk.id for chunk, status in zip(chunks, statuses) if status in DONE_STATUSES]
+        self.spool.mark_sent(sent)
+        self.sent += len(sent)
+        self.spool.mark_rejected([chunk.id for chunk, status in zip(chunks, statuses) if status == "invalid"], "invalid")
+        failed = self._failed([chunk for chunk, status in zip(chunks, statuses) if status == "failed"], "failed")
+        print(f"   ✅ Sent chunks {first}-{last}: {len(sent)}/{len(chunks)} accepted")
+
+        if "rejected" in statuses:
+            # Admission control stopped partway; the rest stay pending
+            return self._retry_after(response)
+        return failed
+
+    def _retry_after(self, response):
+        wait = parse_retry_after(response.headers.get("Retry-After"), self.default_retry_after)
+        print(f"   ⏳ Backend busy, retrying in {wait}s")
+        return wait
+
+    def _failed(self, chunks, error, permanent=False):
+        """
+        Count a failed attempt; chunks out of attempts (or refused for good)
+        are rejected. Returns seconds to back off while any are left to retry.
+        """
+        if not chunks:
+            return None
+        if permanent:
+            self.spool.mark_rejected([chunk.id for chunk in chunks], error)
+            return None
+        self.spool.mark_failed([chunk.id for chunk in chunks if chunk.attempts + 1 < self.max_attempts], error)
+        exhausted = [chunk.id for chunk in chunks if chunk.attempts + 1 >= self.max_attempts]
+        if exhausted:
+            print(f"   🗑️  Giving up on {len(exhausted)} chunk(s) after {self.max_attempts} attempts")
+            self.spool.mark_rejected(exhausted, error)
+        return self.default_retry_after if len(exhausted) < len(chunks) else None
+
+    def close(self):
+        self.session.close()